@@ -0,0 +1,97 @@
+"""Benchmark: fact-extraction throughput, FactExtractor vs. the previous per-pattern loop.
+
+Builds large synthetic session summaries, checks both implementations produce the
+same facts, and reports lines/sec for each.
+
+Run with ``python benchmarks/bench_extract.py``.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+
+from michigram.core.primitives import sha256_short
+from michigram.pipeline.extraction import FactExtractor
+
+_LINES = [
+    "- Bash: pytest tests/ -q",
+    "- Edit: /src/app/models/user.py",
+    "- Read: /src/app/views.py",
+    "- Grep: def handle_request",
+    "we use postgres and redis for caching",
+    "running migrations before the deploy",
+    "pip install orjson",
+    "from michigram.core import primitives",
+    "const x = require('express')",
+    "git rebase onto main",
+    "Traceback: KeyError raised in loader",
+    "The refactor keeps behaviour identical for callers",
+    "Looking at the failing assertion in the constructor tests",
+]
+
+
+def legacy_extract(line: str) -> dict[str, str]:
+    """The per-line body of ContextEvaluator._extract_facts before FactExtractor."""
+    facts = {}
+    tool_patterns = [
+        r"uses?\s+(\w[\w\s]*\w)",
+        r"running\s+(\w[\w\s]*)",
+        r"(?:install|pip install|npm install|yarn add)\s+([\w@/.-]+)",
+        r"(?:import|from)\s+([\w.]+)",
+        r"(?:require)\s*\(\s*['\"]([^'\"]+)",
+        r"(?:docker|git|npm|pip|cargo|brew)\s+\w+",
+    ]
+    for pattern in tool_patterns:
+        m = re.search(pattern, line, re.IGNORECASE)
+        if m:
+            value = m.group(1).strip() if m.lastindex else m.group(0).strip()
+            facts[sha256_short(value, 8)] = value
+            break
+    file_path_match = re.search(r"(?:Read|Write|Edit|Bash|Glob|Grep):\s*(\S+)", line)
+    if file_path_match:
+        path = file_path_match.group(1)
+        parts = path.rsplit("/", 1)
+        if len(parts) > 1:
+            facts[sha256_short("dir_" + parts[0], 8)] = f"Project dir: {parts[0]}"
+        ext_match = re.search(r"\.\w+$", path)
+        if ext_match:
+            ext = ext_match.group(0)
+            facts[sha256_short("ext_" + ext, 8)] = f"File type: {ext}"
+    error_match = re.search(r"(TypeError|ImportError|ValueError|KeyError|AttributeError|RuntimeError|SyntaxError|NameError|FileNotFoundError|ModuleNotFoundError)", line)
+    if error_match:
+        err_type = error_match.group(1)
+        facts[sha256_short("errtype_" + err_type, 8)] = f"Error encountered: {err_type}"
+    return facts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    lines = [f"{rng.choice(_LINES)} {i}" for i in range(args.lines)]
+    extractor = FactExtractor()
+
+    for line in lines[:5000]:
+        assert dict(extractor.extract(line)) == legacy_extract(line), line
+
+    start = time.perf_counter()
+    for line in lines:
+        legacy_extract(line)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for line in lines:
+        extractor.extract(line)
+    engine = time.perf_counter() - start
+
+    print(f"{'implementation':<16} {'lines/s':>10}")
+    print(f"{'legacy':<16} {args.lines / legacy:>10.0f}")
+    print(f"{'FactExtractor':<16} {args.lines / engine:>10.0f}  ({legacy / engine:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
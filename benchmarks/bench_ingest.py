@@ -0,0 +1,87 @@
+"""Benchmark: peak RSS and throughput of HistoryRepository.ingest_session vs. transcript size.
+
+Generates synthetic Claude Code sessions with large inlined tool outputs and ingests
+each one in a fresh subprocess so peak RSS is measured per run.
+
+Run with ``python benchmarks/bench_ingest.py`` (default sizes 64 MB, 256 MB, 1 GB).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+_TOOL_OUTPUT = "lorem ipsum dolor sit amet " * 4000  # ~108 KB per tool result
+
+
+def generate(path: Path, size_mb: int) -> None:
+    target = size_mb * 1024 * 1024
+    written = 0
+    i = 0
+    with open(path, "w") as f:
+        while written < target:
+            entries = [
+                {"type": "user", "message": {"content": f"prompt {i}: fix the failing test"}},
+                {"type": "assistant", "message": {"content": [
+                    {"type": "text", "text": f"Looking at step {i}."},
+                    {"type": "tool_use", "name": "Bash", "input": {"command": f"pytest -k t{i}"}},
+                ]}},
+                {"type": "user", "message": {"content": [
+                    {"type": "tool_result", "content": _TOOL_OUTPUT},
+                ]}},
+            ]
+            for entry in entries:
+                line = json.dumps(entry) + "\n"
+                f.write(line)
+                written += len(line)
+            i += 1
+
+
+def ingest(path: Path) -> None:
+    from michigram.afs.mount import FilesystemMount
+    from michigram.afs.namespace import Namespace
+    from michigram.repository.history import HistoryRepository
+    from michigram.storage.filesystem import FilesystemBackend
+
+    with tempfile.TemporaryDirectory() as store:
+        ns = Namespace()
+        ns.mount("/context", FilesystemMount(FilesystemBackend(Path(store))))
+        start = time.perf_counter()
+        HistoryRepository(ns).ingest_session(path, "bench")
+        elapsed = time.perf_counter() - start
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": rss_mb}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 256, 1024],
+                        help="transcript sizes in MB")
+    parser.add_argument("--ingest", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.ingest:
+        ingest(args.ingest)
+        return
+
+    print(f"{'size MB':>8} {'seconds':>8} {'MB/s':>7} {'peak RSS MB':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = Path(tmp) / f"session-{size}.jsonl"
+            generate(path, size)
+            out = subprocess.run([sys.executable, __file__, "--ingest", str(path)],
+                                 check=True, capture_output=True, text=True).stdout
+            result = json.loads(out)
+            path.unlink()
+            print(f"{size:>8} {result['seconds']:>8.2f} {size / result['seconds']:>7.0f} "
+                  f"{result['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark: ContextConstructor.construct latency as a project's history grows.
+
+Fills a store with N sessions plus some memories, then times construct() against
+the previous approach of loading every candidate's metadata and sorting it all.
+
+Run with ``python benchmarks/bench_inject.py``.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from michigram.afs.mount import FilesystemMount
+from michigram.afs.namespace import Namespace
+from michigram.afs.node import ContextNode, NodeMetadata, NodeType
+from michigram.pipeline.constructor import ContextConstructor
+from michigram.repository.history import HistoryRepository
+from michigram.repository.memory import MemoryRepository, MemoryType
+
+
+def _open(kind: str, root: Path):
+    if kind == "sqlite":
+        from michigram.storage.sqlite import SqliteBackend
+        return SqliteBackend(root / "store.db")
+    from michigram.storage.filesystem import FilesystemBackend
+    return FilesystemBackend(root / "store")
+
+
+def _populate(ns: Namespace, sessions: int, memories: int) -> None:
+    rng = random.Random(0)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    types = [mt.value for mt in MemoryType]
+    paths = [f"/context/history/proj/s{i}" for i in range(sessions)]
+    paths += [f"/context/memory/proj/{rng.choice(types)}/k{i}" for i in range(memories)]
+    with ns.batch():
+        for path in paths:
+            ts = (start + timedelta(seconds=rng.randrange(10**8))).isoformat()
+            content = "session text " * rng.randrange(20, 2000)
+            meta = NodeMetadata(created_at=ts, updated_at=ts,
+                                token_estimate=len(content) // 4)
+            ns.write(path, ContextNode(path=path, node_type=NodeType.FILE, metadata=meta,
+                                       content=content))
+
+
+def full_sort(history: HistoryRepository, memory: MemoryRepository, budget: int) -> int:
+    """The constructor before streaming selection: every candidate, one sort, then greedy."""
+    candidates = []
+    for mt in MemoryType:
+        candidates.extend(memory.recall_all("proj", mt, include_content=False))
+    for sid in history.list_sessions("proj"):
+        candidates.append(history.get_session("proj", sid, include_content=False))
+    candidates.sort(key=lambda n: n.metadata.updated_at, reverse=True)
+    total = 0
+    for node in candidates:
+        if total + node.metadata.token_estimate <= budget:
+            node.load()
+            total += node.metadata.token_estimate
+    return total
+
+
+def _time(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=("sqlite", "filesystem"), default="sqlite")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--budget", type=int, default=8000)
+    args = parser.parse_args()
+
+    print(f"{'sessions':>9} {'full sort ms':>13} {'streaming ms':>13}")
+    for n in args.sessions:
+        with tempfile.TemporaryDirectory() as tmp:
+            ns = Namespace()
+            ns.mount("/context", FilesystemMount(_open(args.backend, Path(tmp))))
+            history, memory = HistoryRepository(ns), MemoryRepository(ns)
+            _populate(ns, n, memories=200)
+            constructor = ContextConstructor(history, memory)
+            streaming = _time(lambda: constructor.construct("proj", args.budget))
+            baseline = _time(lambda: full_sort(history, memory, args.budget))
+            print(f"{n:>9} {baseline:>13.1f} {streaming:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
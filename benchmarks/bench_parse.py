@@ -0,0 +1,88 @@
+"""Benchmark: session-parse throughput (lines/sec, MB/sec) on synthetic transcripts.
+
+Compares stdlib decoding of every line with the "type" pre-filter, using the
+stdlib decoder and orjson when it is installed.
+
+Run with ``python benchmarks/bench_parse.py``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from michigram.core import primitives
+from michigram.repository import history
+
+_WORDS = "the quick brown fox jumps over lazy dog error test file module".split()
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def generate(path: Path, lines: int, tool_output_kb: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for i in range(lines):
+            kind = i % 5
+            if kind == 0:
+                entry = {"type": "user", "message": {"content": _text(rng, 20)}}
+            elif kind == 1:
+                entry = {"type": "assistant", "message": {"content": [
+                    {"type": "text", "text": _text(rng, 40)},
+                    {"type": "tool_use", "name": "Bash", "input": {"command": _text(rng, 5)}},
+                ]}}
+            elif kind in (2, 3):
+                entry = {"type": "user", "message": {"content": [
+                    {"type": "tool_result", "content": _text(rng, tool_output_kb * 180)},
+                ]}}
+            else:
+                entry = {"type": "system", "subtype": "progress", "data": _text(rng, 30)}
+            f.write(json.dumps(entry) + "\n")
+
+
+def _run(path: Path, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        history.parse_session(path, "bench")
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--tool-output-kb", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "session.jsonl"
+        generate(path, args.lines, args.tool_output_kb)
+        size_mb = path.stat().st_size / (1024 * 1024)
+        print(f"{args.lines} lines, {size_mb:.1f} MB\n")
+
+        orjson = primitives.orjson
+        may_matter = history._may_matter
+        variants = [("stdlib, no pre-filter", None, lambda raw: True),
+                    ("stdlib + pre-filter", None, may_matter)]
+        if orjson is not None:
+            variants.append(("orjson + pre-filter", orjson, may_matter))
+
+        print(f"{'variant':<24} {'lines/s':>10} {'MB/s':>8}")
+        try:
+            for name, decoder, prefilter in variants:
+                primitives.orjson = decoder
+                history._may_matter = prefilter
+                elapsed = _run(path, args.rounds)
+                print(f"{name:<24} {args.lines / elapsed:>10.0f} {size_mb / elapsed:>8.1f}")
+        finally:
+            primitives.orjson = orjson
+            history._may_matter = may_matter
+
+
+if __name__ == "__main__":
+    main()
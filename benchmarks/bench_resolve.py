@@ -0,0 +1,78 @@
+"""Micro-benchmark: Namespace path resolution cost as the number of mounts grows.
+
+Run with ``python benchmarks/bench_resolve.py``.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from michigram.afs.mount import MountPoint
+from michigram.afs.namespace import Namespace
+
+
+class _NullMount(MountPoint):
+    def read(self, rel_path):
+        return None
+
+    def write(self, rel_path, node):
+        pass
+
+    def list(self, rel_path):
+        return []
+
+    def delete(self, rel_path):
+        return False
+
+    def search(self, rel_path, tags=None, source=None, since=None, include_content=True):
+        return []
+
+
+def _linear_resolve(mounts: dict, path: str):
+    # The pre-trie algorithm, kept here as the baseline.
+    path = "/" + path.strip("/")
+    best_prefix, best_mount = "", None
+    for prefix, mp in mounts.items():
+        if (path == prefix or path.startswith(prefix + "/")) and len(prefix) > len(best_prefix):
+            best_prefix, best_mount = prefix, mp
+    return best_mount, path[len(best_prefix):].lstrip("/")
+
+
+def _time(fn, paths, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for p in paths:
+            fn(p)
+    return (time.perf_counter() - start) / (rounds * len(paths)) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--paths", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'mounts':>8} {'linear ns':>11} {'trie ns':>9} {'cached ns':>10}")
+    for count in (1, 10, 100, 500, 1000):
+        ns = Namespace()
+        ns.mount("/context", _NullMount())
+        for i in range(count - 1):
+            tier = ("history", "memory")[i % 2]
+            ns.mount(f"/context/{tier}/project-{i}", _NullMount())
+        paths = [f"/context/{('history', 'memory')[i % 2]}/project-{i % count}/facts/k{i}"
+                 for i in range(args.paths)]
+        mounts = ns.mounts
+        linear = _time(lambda p: _linear_resolve(mounts, p), paths, args.rounds)
+
+        def uncached(p, ns=ns):
+            ns._resolved.clear()
+            return ns._resolve(p)
+
+        clear_cost = _time(lambda p: ns._resolved.clear(), paths, args.rounds)
+        trie = _time(uncached, paths, args.rounds) - clear_cost
+        cached = _time(ns._resolve, paths, args.rounds)
+        print(f"{count:>8} {linear:>11.0f} {trie:>9.0f} {cached:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
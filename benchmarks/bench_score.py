@@ -0,0 +1,79 @@
+"""Benchmark: decay-strategy scoring cost for a project's candidates.
+
+Builds a CandidateTable of N synthetic candidates and times scoring all of them
+with the exponential time-decay hybrid and ranking the top 256, against the same
+score computed per candidate in Python from ISO timestamp strings and a full sort.
+
+Run with ``python benchmarks/bench_score.py``.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from michigram.afs.node import ContextNode, NodeMetadata, NodeType
+from michigram.pipeline import candidates
+from michigram.pipeline.candidates import CandidateTable, descending
+
+WEIGHTS = [1.0, 0.9, 0.8, 0.7, 0.6, 0.5]
+HALF_LIFE = 7 * 86400.0
+
+
+def _rows(n: int) -> list[tuple[int, ContextNode]]:
+    rng = random.Random(0)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(n):
+        ts = (start + timedelta(seconds=rng.randrange(10**8))).isoformat()
+        meta = NodeMetadata(created_at=ts, updated_at=ts, token_estimate=rng.randrange(10, 2000),
+                            tags=[f"tag{rng.randrange(40)}"])
+        rows.append((rng.randrange(len(WEIGHTS)), ContextNode(path=f"/n{i}", node_type=NodeType.FILE,
+                                                              metadata=meta)))
+    return rows
+
+
+def per_candidate(rows: list[tuple[int, ContextNode]], now: float) -> list[str]:
+    """Score each candidate in Python from its ISO timestamp, then sort everything."""
+    def score(row):
+        tier, node = row
+        age = now - datetime.fromisoformat(node.metadata.updated_at).timestamp()
+        return WEIGHTS[tier] * 0.5 ** (max(age, 0.0) / HALF_LIFE)
+    return [node.path for _, node in sorted(rows, key=score, reverse=True)[:256]]
+
+
+def columnar(table: CandidateTable, now: float) -> list[int]:
+    scores = table.decay_keys(WEIGHTS, now, HALF_LIFE)
+    return list(islice(descending(scores), 256))
+
+
+def _time(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+    now = datetime(2028, 1, 1, tzinfo=timezone.utc).timestamp()
+    print(f"{'candidates':>10} {'per-candidate ms':>17} {'score ms':>9} {'score+top256 ms':>16}")
+    for n in args.candidates:
+        rows = _rows(n)
+        table = CandidateTable.from_nodes(rows)
+        baseline = _time(lambda: per_candidate(rows, now), repeat=1)
+        score = _time(lambda: table.decay_keys(WEIGHTS, now, HALF_LIFE))
+        ranked = _time(lambda: columnar(table, now))
+        print(f"{n:>10} {baseline:>17.1f} {score:>9.2f} {ranked:>16.2f}")
+    if candidates.np is None:
+        print("(NumPy not installed: columns are Python lists)")
+
+
+if __name__ == "__main__":
+    main()
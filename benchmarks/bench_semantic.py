@@ -0,0 +1,64 @@
+"""Benchmark: semantic-strategy scoring latency as a project grows.
+
+Embeds N synthetic nodes into a VectorIndex, then times a full-project search
+(embed the query, score every row, resolve the top page of paths) with NumPy's
+memory-mapped matrix-vector product and with the pure-Python fallback.
+
+Run with ``python benchmarks/bench_semantic.py``.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+from michigram.storage import vectors
+from michigram.storage.vectors import HashingEmbedder, VectorIndex
+
+
+def _fill(index: VectorIndex, n: int) -> None:
+    rng = random.Random(0)
+    words = [f"term{i}" for i in range(20000)]
+    with index.batch():
+        for i in range(n):
+            index.add(f"memory/proj/facts/k{i}", " ".join(rng.choices(words, k=60)))
+
+
+def _time(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+    numpy = vectors.np
+
+    def search() -> None:
+        list(islice(index.search("memory/proj", "term17 term42 term99"), 64))
+
+    print(f"{'nodes':>8} {'numpy ms':>9} {'python ms':>10}")
+    for n in args.nodes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = VectorIndex(Path(tmp), HashingEmbedder(args.dim))
+            _fill(index, n)
+            vectors.np = numpy
+            fast = _time(search) if numpy is not None else float("nan")
+            vectors.np = None
+            slow = _time(search, repeat=1)
+            vectors.np = numpy
+            index.close()
+        print(f"{n:>8} {fast:>9.1f} {slow:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: version storage size and read latency, full copies vs. reverse deltas.
+
+Writes a node many times the way history and memory nodes change (appending a
+few lines, or editing one line of a long text), once storing every old version
+as a full copy and once through FilesystemBackend.write, which stores reverse
+deltas with periodic snapshots. Reports bytes under .versions/ and the time to
+read each version back.
+
+Run with ``python benchmarks/bench_versions.py``.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from michigram.afs.node import ContextNode, NodeMetadata, NodeType
+from michigram.core.primitives import now_iso
+from michigram.storage.filesystem import FilesystemBackend
+
+
+def _node(content: str, version: int) -> ContextNode:
+    ts = now_iso()
+    return ContextNode(path="bench/node", node_type=NodeType.FILE,
+                       metadata=NodeMetadata(created_at=ts, updated_at=ts, version=version),
+                       content=content)
+
+
+def appending(versions: int) -> list[str]:
+    lines, texts = [], []
+    for v in range(versions):
+        lines.extend(f"- Edit: /src/module_{v}_{i}.py after prompt {v}\n" for i in range(5))
+        texts.append("".join(lines))
+    return texts
+
+
+def editing(versions: int, size: int = 2000) -> list[str]:
+    rng = random.Random(0)
+    lines = [f"fact {i}: the service talks to postgres via pool {i % 7}\n" for i in range(size)]
+    texts = []
+    for v in range(versions):
+        lines[rng.randrange(size)] = f"fact edited in version {v}\n"
+        texts.append("".join(lines))
+    return texts
+
+
+def _versions_bytes(root: Path) -> int:
+    return sum(p.stat().st_size for p in (root / ".versions").rglob("*")
+               if p.is_file() and not p.name.endswith(".meta.json"))
+
+
+def run(name: str, texts: list[str]) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        full = FilesystemBackend(Path(tmp) / "full")
+        for v, text in enumerate(texts[:-1], start=1):
+            full.write_version("bench/node", _node(text, v))
+        delta = FilesystemBackend(Path(tmp) / "delta")
+        start = time.perf_counter()
+        for v, text in enumerate(texts, start=1):
+            delta.write("bench/node", _node(text, v))
+        write_ms = (time.perf_counter() - start) * 1000 / len(texts)
+
+        timings = []
+        for v in range(1, len(texts)):
+            start = time.perf_counter()
+            content = delta.read_version("bench/node", v).content
+            timings.append((time.perf_counter() - start) * 1000)
+            assert content == texts[v - 1]
+        full_bytes = _versions_bytes(Path(tmp) / "full")
+        delta_bytes = _versions_bytes(Path(tmp) / "delta")
+        timings.sort()
+        print(f"{name:<10} {full_bytes / 1e6:>9.2f} {delta_bytes / 1e6:>9.2f} "
+              f"{full_bytes / max(delta_bytes, 1):>7.1f}x {write_ms:>9.2f} "
+              f"{timings[len(timings) // 2]:>9.2f} {timings[-1]:>9.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--versions", type=int, default=200)
+    args = parser.parse_args()
+    print(f"{'workload':<10} {'full MB':>9} {'delta MB':>9} {'saved':>8} {'write ms':>9} "
+          f"{'read p50':>9} {'read max':>9}")
+    run("append", appending(args.versions))
+    run("edit", editing(args.versions))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,19 @@ class AgentAdapter(ABC):
         """Ingest raw session data. Returns list of session IDs created."""
         ...
 
+    def ingest_incremental(self, raw_data: Path, project: str,
+                           cursor: dict | None = None) -> tuple[list[str], dict | None]:
+        """Ingest only what changed since ``cursor``. Returns session IDs and the new cursor.
+
+        Adapters that cannot resume re-ingest everything and return no cursor.
+        """
+        return self.ingest(raw_data, project), None
+
+    def ingest_incremental_many(self, items: list[tuple[Path, dict | None]],
+                                project: str) -> list[tuple[list[str], dict | None]]:
+        """ingest_incremental over several (file, cursor) pairs, results in input order."""
+        return [self.ingest_incremental(path, project, cursor) for path, cursor in items]
+
     @abstractmethod
     def format_context(self, manifest: ContextManifest) -> str:
         """Format a ContextManifest into the agent's expected format."""
@@ -5,12 +5,16 @@ from pathlib import Path
 
 from michigram.adapters.base import AgentAdapter
 from michigram.pipeline.constructor import ContextManifest
-from michigram.repository.history import HistoryRepository
+from michigram.core.primitives import parallel_map
+from michigram.repository.history import (
+    HistoryRepository, SessionDigest, parse_session, resume_session,
+)
 
 
 class ClaudeCodeAdapter(AgentAdapter):
-    def __init__(self, history: HistoryRepository) -> None:
+    def __init__(self, history: HistoryRepository, workers: int = 1) -> None:
         self._history = history
+        self._workers = workers
 
     def ingest(self, raw_data: Path, project: str) -> list[str]:
         session_ids = []
@@ -18,11 +22,35 @@ class ClaudeCodeAdapter(AgentAdapter):
             sid = self._history.ingest_session(raw_data, project)
             session_ids.append(sid)
         elif raw_data.is_dir():
-            for f in sorted(raw_data.glob("*.jsonl")):
-                sid = self._history.ingest_session(f, project)
-                session_ids.append(sid)
+            files = sorted(raw_data.glob("*.jsonl"))
+            # Parse in worker processes; write from this one, in file order.
+            with self._history.batch():
+                for digest in parallel_map(parse_session, files, workers=self._workers):
+                    self._history.write_digest(project, digest)
+                    session_ids.append(digest.session_id)
         return session_ids
 
+    def ingest_incremental(self, raw_data: Path, project: str,
+                           cursor: dict | None = None) -> tuple[list[str], dict | None]:
+        if not (raw_data.is_file() and raw_data.suffix == ".jsonl"):
+            return super().ingest_incremental(raw_data, project, cursor)
+        digest = SessionDigest.from_dict(cursor) if cursor else None
+        digest = self._history.ingest_incremental(raw_data, project, digest)
+        return [digest.session_id], digest.to_dict()
+
+    def ingest_incremental_many(self, items: list[tuple[Path, dict | None]],
+                                project: str) -> list[tuple[list[str], dict | None]]:
+        if not all(p.is_file() and p.suffix == ".jsonl" for p, _ in items):
+            return super().ingest_incremental_many(items, project)
+        paths = [p for p, _ in items]
+        digests = [SessionDigest.from_dict(c) if c else None for _, c in items]
+        results = []
+        with self._history.batch():
+            for digest in parallel_map(resume_session, paths, digests, workers=self._workers):
+                self._history.write_digest(project, digest)
+                results.append(([digest.session_id], digest.to_dict()))
+        return results
+
     def format_context(self, manifest: ContextManifest) -> str:
         sections = []
         for node in manifest.items:
@@ -5,17 +5,23 @@ from pathlib import Path
 from michigram.adapters.base import AgentAdapter
 from michigram.afs.namespace import Namespace
 from michigram.afs.node import ContextNode, NodeType, NodeMetadata
-from michigram.core.primitives import now_iso, estimate_tokens, sha256_short
+from michigram.core.primitives import now_iso, estimate_tokens, parallel_map, sha256_short
 from michigram.pipeline.constructor import ContextManifest
 
 
+def _read_session(path: Path) -> tuple[str, str]:
+    content = path.read_text()
+    return sha256_short(path.name + content, 12), content
+
+
 class GenericAdapter(AgentAdapter):
-    def __init__(self, namespace: Namespace, history_prefix: str = "/context/history") -> None:
+    def __init__(self, namespace: Namespace, history_prefix: str = "/context/history",
+                 workers: int = 1) -> None:
         self._ns = namespace
         self._history_prefix = history_prefix
+        self._workers = workers
 
     def ingest(self, raw_data: Path, project: str) -> list[str]:
-        session_ids = []
         files = []
         if raw_data.is_file():
             files.append(raw_data)
@@ -23,27 +29,36 @@ class GenericAdapter(AgentAdapter):
             files.extend(sorted(raw_data.glob("*.md")))
             files.extend(sorted(raw_data.glob("*.txt")))
 
-        for f in files:
-            content = f.read_text()
-            sid = sha256_short(f.name + content, 12)
-            ts = now_iso()
-            path = f"{self._history_prefix}/{project}/{sid}"
-            node = ContextNode(
-                path=path,
-                node_type=NodeType.FILE,
-                metadata=NodeMetadata(
-                    created_at=ts,
-                    updated_at=ts,
-                    source="generic",
-                    token_estimate=estimate_tokens(content),
-                    tags=["session", "generic"],
-                ),
-                content=content,
-            )
-            self._ns.write(path, node)
-            session_ids.append(sid)
+        return self._ingest_files(files, project)
+
+    def _ingest_files(self, files: list[Path], project: str) -> list[str]:
+        session_ids = []
+        with self._ns.batch():
+            for sid, content in parallel_map(_read_session, files, workers=self._workers):
+                ts = now_iso()
+                path = f"{self._history_prefix}/{project}/{sid}"
+                node = ContextNode(
+                    path=path,
+                    node_type=NodeType.FILE,
+                    metadata=NodeMetadata(
+                        created_at=ts,
+                        updated_at=ts,
+                        source="generic",
+                        token_estimate=estimate_tokens(content),
+                        tags=["session", "generic"],
+                    ),
+                    content=content,
+                )
+                self._ns.write(path, node)
+                session_ids.append(sid)
         return session_ids
 
+    def ingest_incremental_many(self, items: list[tuple[Path, dict | None]],
+                                project: str) -> list[tuple[list[str], dict | None]]:
+        if not all(p.is_file() for p, _ in items):
+            return super().ingest_incremental_many(items, project)
+        return [([sid], None) for sid in self._ingest_files([p for p, _ in items], project)]
+
     def format_context(self, manifest: ContextManifest) -> str:
         sections = []
         for node in manifest.items:
@@ -1,5 +1,11 @@
 from __future__ import annotations
+import contextlib
+import dataclasses
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, ContextManager, Iterator
 from michigram.afs.node import ContextNode
 from michigram.storage.base import StorageBackend
 
@@ -7,9 +13,19 @@ class MountPoint(ABC):
     @abstractmethod
     def read(self, rel_path: str) -> ContextNode | None: ...
 
+    def read_metadata(self, rel_path: str) -> ContextNode | None:
+        return self.read(rel_path)
+
     @abstractmethod
     def write(self, rel_path: str, node: ContextNode) -> None: ...
 
+    def write_metadata(self, rel_path: str, node: ContextNode) -> None:
+        node.load()
+        self.write(rel_path, node)
+
+    def batch(self) -> ContextManager[None]:
+        return contextlib.nullcontext()
+
     @abstractmethod
     def list(self, rel_path: str) -> list[str]: ...
 
@@ -18,24 +34,251 @@ class MountPoint(ABC):
 
     @abstractmethod
     def search(self, rel_path: str, tags: list[str] | None = None,
-               source: str | None = None, since: str | None = None) -> list[ContextNode]: ...
+               source: str | None = None, since: str | None = None,
+               include_content: bool = True) -> list[ContextNode]: ...
+
+    def iter_by_updated(self, rel_path: str, newest_first: bool = True,
+                        max_tokens: Callable[[], int] | None = None) -> Iterator[ContextNode]:
+        nodes = self.search(rel_path, include_content=False)
+        yield from sorted(nodes, key=lambda n: n.metadata.updated_at, reverse=newest_first)
+
+    def token_stats(self, rel_path: str) -> tuple[int, int]:
+        nodes = self.search(rel_path, include_content=False)
+        return len(nodes), min((n.metadata.token_estimate for n in nodes), default=0)
+
+    def search_text(self, rel_path: str, query: str,
+                    limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        raise NotImplementedError(f"{type(self).__name__} does not support text search")
+
+    def search_similar(self, rel_path: str, query: str,
+                       limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        raise NotImplementedError(f"{type(self).__name__} does not support vector search")
 
 class FilesystemMount(MountPoint):
-    def __init__(self, backend: StorageBackend) -> None:
+    def __init__(self, backend: StorageBackend, root: str = "") -> None:
         self._backend = backend
+        self._root = root.strip("/")
+
+    def _rel(self, rel_path: str) -> str:
+        if not self._root:
+            return rel_path
+        return f"{self._root}/{rel_path}" if rel_path else self._root
+
+    def read(self, rel_path: str) -> ContextNode | None:
+        return self._backend.read(self._rel(rel_path))
+
+    def read_metadata(self, rel_path: str) -> ContextNode | None:
+        return self._backend.read_metadata(self._rel(rel_path))
+
+    def write(self, rel_path: str, node: ContextNode) -> None:
+        self._backend.write(self._rel(rel_path), node)
+
+    def write_metadata(self, rel_path: str, node: ContextNode) -> None:
+        self._backend.write_metadata(self._rel(rel_path), node)
+
+    def batch(self) -> ContextManager[None]:
+        return self._backend.batch()
+
+    def list(self, rel_path: str) -> list[str]:
+        return self._backend.list(self._rel(rel_path))
+
+    def delete(self, rel_path: str) -> bool:
+        return self._backend.delete(self._rel(rel_path))
+
+    def search(self, rel_path: str, tags: list[str] | None = None,
+               source: str | None = None, since: str | None = None,
+               include_content: bool = True) -> list[ContextNode]:
+        return self._backend.search(self._rel(rel_path), tags=tags, source=source, since=since,
+                                    include_content=include_content)
+
+    def iter_by_updated(self, rel_path: str, newest_first: bool = True,
+                        max_tokens: Callable[[], int] | None = None) -> Iterator[ContextNode]:
+        return self._backend.iter_by_updated(self._rel(rel_path), newest_first, max_tokens)
+
+    def token_stats(self, rel_path: str) -> tuple[int, int]:
+        return self._backend.token_stats(self._rel(rel_path))
+
+    def search_text(self, rel_path: str, query: str,
+                    limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        for path, score in self._backend.search_text(self._rel(rel_path), query, limit):
+            node = self._backend.read_metadata(path)
+            if node is not None:
+                yield node, score
+
+    def search_similar(self, rel_path: str, query: str,
+                       limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        for path, score in self._backend.search_vectors(self._rel(rel_path), query, limit):
+            node = self._backend.read_metadata(path)
+            if node is not None:
+                yield node, score
+
+CACHE_UNITS = ("bytes", "tokens")
+
+def _clone(node: ContextNode) -> ContextNode:
+    meta = dataclasses.replace(node.metadata, tags=list(node.metadata.tags),
+                               extra=dict(node.metadata.extra))
+    return ContextNode(path=node.path, node_type=node.node_type, metadata=meta,
+                       content=node.content)
+
+class CachedMount(MountPoint):
+    """Wraps another mount with a size-bounded LRU of fully read nodes.
+
+    Writes and deletes go straight through and invalidate the cached entry. The size
+    limit counts content bytes (``unit="bytes"``) or ``token_estimate`` (``unit="tokens"``).
+    ``ttl_seconds`` bounds staleness from writers that bypass this mount, such as
+    another process sharing the store.
+
+    A read only fills the cache if nothing was invalidated while it ran, so a
+    concurrent write can never be shadowed by the node it replaced.
+    """
+
+    def __init__(self, inner: MountPoint, max_size: int = 16 * 1024 * 1024,
+                 unit: str = "bytes", ttl_seconds: float | None = None) -> None:
+        if unit not in CACHE_UNITS:
+            raise ValueError(f"Unknown cache unit: {unit}. Available: {list(CACHE_UNITS)}")
+        self._inner = inner
+        self._max_size = max_size
+        self._unit = unit
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[str, tuple[ContextNode, int, float]] = OrderedDict()
+        self._size = 0
+        self._generation = 0  # bumped by every invalidation
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def _weigh(self, node: ContextNode) -> int:
+        if self._unit == "tokens":
+            return max(node.metadata.token_estimate, 1)
+        return len((node.content or "").encode()) + 1
+
+    def _lookup(self, rel_path: str, count_miss: bool = True) -> ContextNode | None:
+        with self._lock:
+            entry = self._entries.get(rel_path)
+            if entry is not None:
+                node, weight, stored_at = entry
+                if self._ttl is None or time.monotonic() - stored_at <= self._ttl:
+                    self._entries.move_to_end(rel_path)
+                    self.hits += 1
+                    return _clone(node)
+                del self._entries[rel_path]
+                self._size -= weight
+            if count_miss:
+                self.misses += 1
+            return None
+
+    def _store(self, rel_path: str, node: ContextNode, generation: int) -> None:
+        if getattr(self._local, "batch_depth", 0):
+            return  # may be uncommitted; a rollback would leave the cache wrong
+        weight = self._weigh(node)
+        if weight > self._max_size:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return  # read before a write that invalidated it; may be stale
+            self._evict(rel_path)
+            self._entries[rel_path] = (_clone(node), weight, time.monotonic())
+            self._size += weight
+            while self._size > self._max_size:
+                _, (_, w, _) = self._entries.popitem(last=False)
+                self._size -= w
+
+    def _evict(self, rel_path: str) -> None:
+        entry = self._entries.pop(rel_path, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def invalidate(self, rel_path: str | None = None) -> None:
+        with self._lock:
+            self._generation += 1
+            if rel_path is None:
+                self._entries.clear()
+                self._size = 0
+            else:
+                self._evict(rel_path)
 
     def read(self, rel_path: str) -> ContextNode | None:
-        return self._backend.read(rel_path)
+        cached = self._lookup(rel_path)
+        if cached is not None:
+            return cached
+        with self._lock:
+            generation = self._generation
+        node = self._inner.read(rel_path)
+        if node is not None:
+            self._store(rel_path, node, generation)
+        return node
+
+    def read_metadata(self, rel_path: str) -> ContextNode | None:
+        # Metadata-only reads are served from the cache but never fill it.
+        cached = self._lookup(rel_path, count_miss=False)
+        if cached is not None:
+            return cached
+        return self._inner.read_metadata(rel_path)
 
     def write(self, rel_path: str, node: ContextNode) -> None:
-        self._backend.write(rel_path, node)
+        try:
+            self._inner.write(rel_path, node)
+        finally:
+            self.invalidate(rel_path)
+
+    def write_metadata(self, rel_path: str, node: ContextNode) -> None:
+        try:
+            self._inner.write_metadata(rel_path, node)
+        finally:
+            self.invalidate(rel_path)
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        self._local.batch_depth = getattr(self._local, "batch_depth", 0) + 1
+        try:
+            with self._inner.batch():
+                yield
+        except BaseException:
+            self.invalidate()
+            raise
+        finally:
+            self._local.batch_depth -= 1
 
     def list(self, rel_path: str) -> list[str]:
-        return self._backend.list(rel_path)
+        return self._inner.list(rel_path)
 
     def delete(self, rel_path: str) -> bool:
-        return self._backend.delete(rel_path)
+        try:
+            return self._inner.delete(rel_path)
+        finally:
+            self.invalidate(rel_path)
 
     def search(self, rel_path: str, tags: list[str] | None = None,
-               source: str | None = None, since: str | None = None) -> list[ContextNode]:
-        return self._backend.search(rel_path, tags=tags, source=source, since=since)
+               source: str | None = None, since: str | None = None,
+               include_content: bool = True) -> list[ContextNode]:
+        return self._inner.search(rel_path, tags=tags, source=source, since=since,
+                                  include_content=include_content)
+
+    def iter_by_updated(self, rel_path: str, newest_first: bool = True,
+                        max_tokens: Callable[[], int] | None = None) -> Iterator[ContextNode]:
+        return self._inner.iter_by_updated(rel_path, newest_first, max_tokens)
+
+    def token_stats(self, rel_path: str) -> tuple[int, int]:
+        return self._inner.token_stats(rel_path)
+
+    def search_text(self, rel_path: str, query: str,
+                    limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        return self._inner.search_text(rel_path, query, limit)
+
+    def search_similar(self, rel_path: str, query: str,
+                       limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        return self._inner.search_similar(rel_path, query, limit)
+
+    def stats(self) -> dict[str, float | str]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "size": self._size,
+                "max_size": self._max_size,
+                "unit": self._unit,
+            }
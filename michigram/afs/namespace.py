@@ -1,44 +1,128 @@
 from __future__ import annotations
+import itertools
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Iterable, Iterator
 from michigram.afs.mount import MountPoint
 from michigram.afs.node import ContextNode
 
+RESOLVE_CACHE_SIZE = 4096
+
+
+class _TrieNode:
+    __slots__ = ("children", "mount", "prefix")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.mount: MountPoint | None = None
+        self.prefix = ""
+
+
 class Namespace:
-    """Hierarchical namespace with mount points. Resolves paths via longest-prefix match."""
+    """Hierarchical namespace with mount points. Resolves paths via longest-prefix match on a segment trie."""
 
     def __init__(self) -> None:
         self._mounts: dict[str, MountPoint] = {}
+        self._trie = _TrieNode()
+        self._resolved: dict[str, tuple[MountPoint, str]] = {}
+        self._counter = itertools.count(1)
+        self._generations: dict[str, int] = {}
+        self._mount_generation = 0
 
     def mount(self, prefix: str, mount_point: MountPoint) -> None:
         # Normalize: ensure prefix starts with / and doesn't end with /
         prefix = "/" + prefix.strip("/")
         self._mounts[prefix] = mount_point
+        self._rebuild_trie()
 
     def unmount(self, prefix: str) -> None:
         prefix = "/" + prefix.strip("/")
         self._mounts.pop(prefix, None)
+        self._rebuild_trie()
+
+    def _rebuild_trie(self) -> None:
+        # Swap in a fresh trie and cache so concurrent resolvers never see a half-built one.
+        root = _TrieNode()
+        for prefix, mp in self._mounts.items():
+            node = root
+            for seg in prefix.strip("/").split("/"):
+                if seg:
+                    node = node.children.setdefault(seg, _TrieNode())
+            node.mount = mp
+            node.prefix = prefix
+        self._trie = root
+        self._resolved = {}
+        self._mount_generation = next(self._counter)
+
+    def _bump(self, path: str) -> None:
+        gen = next(self._counter)
+        parts = path.strip("/").split("/")
+        self._generations["/"] = gen
+        for i in range(1, len(parts)):
+            self._generations["/" + "/".join(parts[:i])] = gen
+
+    def generation(self, prefix: str) -> int:
+        """Monotonic counter that changes whenever a node under prefix is written or deleted."""
+        prefix = "/" + prefix.strip("/")
+        return max(self._generations.get(prefix, 0), self._mount_generation)
 
     def _resolve(self, path: str) -> tuple[MountPoint, str]:
         """Find the mount with the longest matching prefix and return (mount, relative_path)."""
-        path = "/" + path.strip("/")
-        best_prefix = ""
-        best_mount = None
-        for prefix, mp in self._mounts.items():
-            if path == prefix or path.startswith(prefix + "/"):
-                if len(prefix) > len(best_prefix):
-                    best_prefix = prefix
-                    best_mount = mp
-        if best_mount is None:
-            raise KeyError(f"No mount found for path: {path}")
-        rel_path = path[len(best_prefix):].lstrip("/")
-        return best_mount, rel_path
+        resolved = self._resolved
+        hit = resolved.get(path)
+        if hit is not None:
+            return hit
+        norm = "/" + path.strip("/")
+        node = self._trie
+        best = node if node.mount is not None else None
+        for seg in norm[1:].split("/"):
+            node = node.children.get(seg)
+            if node is None:
+                break
+            if node.mount is not None:
+                best = node
+        if best is None:
+            raise KeyError(f"No mount found for path: {norm}")
+        result = (best.mount, norm[len(best.prefix):].lstrip("/"))
+        if len(resolved) >= RESOLVE_CACHE_SIZE:
+            resolved.clear()
+        resolved[path] = result
+        return result
 
     def read(self, path: str) -> ContextNode | None:
         mount, rel = self._resolve(path)
         return mount.read(rel)
 
+    def read_metadata(self, path: str) -> ContextNode | None:
+        mount, rel = self._resolve(path)
+        return mount.read_metadata(rel)
+
     def write(self, path: str, node: ContextNode) -> None:
         mount, rel = self._resolve(path)
         mount.write(rel, node)
+        self._bump(path)
+
+    def write_metadata(self, path: str, node: ContextNode) -> None:
+        """Update an existing node's metadata without rewriting content or adding a version."""
+        mount, rel = self._resolve(path)
+        mount.write_metadata(rel, node)
+        self._bump(path)
+
+    def write_many(self, items: Iterable[tuple[str, ContextNode]]) -> int:
+        count = 0
+        with self.batch():
+            for path, node in items:
+                self.write(path, node)
+                count += 1
+        return count
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Open a batch on every mounted backend so grouped writes commit together."""
+        unique = {id(mp): mp for mp in self._mounts.values()}
+        with ExitStack() as stack:
+            for mp in unique.values():
+                stack.enter_context(mp.batch())
+            yield
 
     def list(self, path: str) -> list[str]:
         mount, rel = self._resolve(path)
@@ -46,12 +130,49 @@ class Namespace:
 
     def delete(self, path: str) -> bool:
         mount, rel = self._resolve(path)
-        return mount.delete(rel)
+        deleted = mount.delete(rel)
+        if deleted:
+            self._bump(path)
+        return deleted
 
     def search(self, path: str, tags: list[str] | None = None,
-               source: str | None = None, since: str | None = None) -> list[ContextNode]:
+               source: str | None = None, since: str | None = None,
+               include_content: bool = True) -> list[ContextNode]:
+        mount, rel = self._resolve(path)
+        return mount.search(rel, tags=tags, source=source, since=since,
+                            include_content=include_content)
+
+    def iter_by_updated(self, path: str, newest_first: bool = True,
+                        max_tokens: Callable[[], int] | None = None) -> Iterator[ContextNode]:
+        """Yield nodes under path without content, ordered by updated_at, reading lazily.
+
+        ``max_tokens`` lets the caller shrink an upper bound on token_estimate as it goes.
+        """
+        mount, rel = self._resolve(path)
+        return mount.iter_by_updated(rel, newest_first, max_tokens)
+
+    def token_stats(self, path: str) -> tuple[int, int]:
+        """Return (node count, smallest token_estimate) under path."""
+        mount, rel = self._resolve(path)
+        return mount.token_stats(rel)
+
+    def search_text(self, path: str, query: str,
+                    limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        """Yield (node without content, BM25 score) for nodes under path matching query, best first.
+
+        The backends keep the text index up to date on every write and delete.
+        """
+        mount, rel = self._resolve(path)
+        return mount.search_text(rel, query, limit)
+
+    def search_similar(self, path: str, query: str,
+                       limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        """Yield (node without content, cosine similarity) for nodes under path, most similar first.
+
+        Vectors come from the backend's embedder, computed when each node was written.
+        """
         mount, rel = self._resolve(path)
-        return mount.search(rel, tags=tags, source=source, since=since)
+        return mount.search_similar(rel, query, limit)
 
     @property
     def mounts(self) -> dict[str, MountPoint]:
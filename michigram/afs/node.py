@@ -1,7 +1,7 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import Any, Callable
 import json
 
 class NodeType(Enum):
@@ -26,6 +26,18 @@ class ContextNode:
     node_type: NodeType
     metadata: NodeMetadata
     content: str | None = None
+    loader: Callable[[], str | None] | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loader is None
+
+    def load(self) -> ContextNode:
+        """Fetch deferred content for a node returned by a metadata-only read."""
+        if self.loader is not None:
+            self.content = self.loader()
+            self.loader = None
+        return self
 
 def node_to_dict(node: ContextNode) -> dict[str, Any]:
     """Serialize a ContextNode to a plain dict."""
@@ -44,7 +44,7 @@ def export_bundle(namespace: Namespace, base_path: str, output_path: Path) -> in
 def import_bundle(namespace: Namespace, bundle_path: Path, target_prefix: str | None = None) -> int:
     """Import nodes from a tar.gz bundle into the namespace. Returns count of imported nodes."""
     imported = 0
-    with tarfile.open(bundle_path, "r:gz") as tar:
+    with tarfile.open(bundle_path, "r:gz") as tar, namespace.batch():
         for member in tar.getmembers():
             if not member.name.startswith("nodes/") or not member.name.endswith(".json"):
                 continue
@@ -4,26 +4,24 @@ import argparse
 import json
 import sys
 import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
 
-from michigram.afs.mount import FilesystemMount
 from michigram.afs.namespace import Namespace
 from michigram.core.config import Config, load_config, get_adapter_class
-from michigram.core.state import get_state, save_state
+from michigram.core.state import get_capture_cursor, get_state, save_capture_cursor, save_state
 from michigram.pipeline.constructor import ContextConstructor
 from michigram.pipeline.evaluator import ContextEvaluator
 from michigram.pipeline.updater import ContextUpdater, UpdateMode
 from michigram.repository.history import HistoryRepository
 from michigram.repository.memory import MemoryRepository, MemoryType
+from michigram.storage.factory import BACKENDS, build_namespace, create_backend
 from michigram.storage.filesystem import FilesystemBackend
 
 
 def _build_stack(config: Config) -> tuple[Namespace, HistoryRepository, MemoryRepository]:
-    store_root = config.base_dir / "store"
-    backend = FilesystemBackend(store_root)
-    mount = FilesystemMount(backend)
-    ns = Namespace()
-    ns.mount("/context", mount)
+    ns = build_namespace(config)
     history = HistoryRepository(ns)
     memory = MemoryRepository(ns)
     return ns, history, memory
@@ -33,34 +31,54 @@ def _project_name(project_path: str) -> str:
     return Path(project_path).resolve().name
 
 
+def _make_adapter(name: str, ns: Namespace, history: HistoryRepository, workers: int = 1):
+    adapter_cls = get_adapter_class(name)
+    if name == "claude-code":
+        return adapter_cls(history, workers=workers)
+    return adapter_cls(ns, workers=workers)
+
+
+def _capture_sessions(adapter, base_dir: Path, state: dict, project: str,
+                      session_paths: list[Path]) -> int:
+    """Re-capture changed session files, parsing only appended tails when possible."""
+    captured = state.setdefault("captured_sessions", {})
+    pending = []
+    for path in session_paths:
+        key = f"{project}:{path.name}"
+        mtime = path.stat().st_mtime
+        prev = captured.get(key)
+        if prev and prev.get("mtime") == mtime:
+            continue
+        pending.append((path, key, mtime, get_capture_cursor(base_dir, key) if prev else None))
+    if not pending:
+        return 0
+
+    results = adapter.ingest_incremental_many([(p, c) for p, _, _, c in pending], project)
+    ingested = 0
+    for (_, key, mtime, _), (sids, cursor) in zip(pending, results):
+        save_capture_cursor(base_dir, key, cursor)
+        for sid in sids:
+            entry = {"mtime": mtime, "session_id": sid}
+            if cursor is not None:
+                entry["offset"] = cursor.get("offset", 0)
+            captured[key] = entry
+            ingested += 1
+    return ingested
+
+
 def cmd_capture(args: argparse.Namespace) -> None:
     config = load_config()
     ns, history, _ = _build_stack(config)
     project = _project_name(args.project)
 
-    adapter_cls = get_adapter_class(args.adapter)
-    if args.adapter == "claude-code":
-        adapter = adapter_cls(history)
-    else:
-        adapter = adapter_cls(ns)
+    adapter = _make_adapter(args.adapter, ns, history,
+                            workers=args.workers or config.ingest_workers)
 
     sessions = adapter.detect_sessions(args.project)
     state = get_state(config.base_dir)
-    ingested = 0
 
-    for session_path in sessions:
-        key = f"{project}:{session_path.name}"
-        mtime = session_path.stat().st_mtime
-        prev = state.get("captured_sessions", {}).get(key)
-        if prev and prev.get("mtime") == mtime:
-            continue
-        sids = adapter.ingest(session_path, project)
-        for sid in sids:
-            state.setdefault("captured_sessions", {})[key] = {
-                "mtime": mtime,
-                "session_id": sid,
-            }
-            ingested += 1
+    with ns.batch():
+        ingested = _capture_sessions(adapter, config.base_dir, state, project, sessions)
 
     save_state(config.base_dir, state)
     print(f"Captured {ingested} new sessions for {project}")
@@ -71,33 +89,42 @@ def cmd_inject(args: argparse.Namespace) -> None:
     ns, history, memory = _build_stack(config)
     project = _project_name(args.project)
 
-    constructor = ContextConstructor(history, memory)
-    manifest = constructor.construct(project, config.token_budget, args.strategy)
-
-    adapter_cls = get_adapter_class(args.adapter)
-    if args.adapter == "claude-code":
-        adapter = adapter_cls(history)
-    else:
-        adapter = adapter_cls(ns)
+    constructor = ContextConstructor(history, memory,
+                                     pack_time_limit=config.pack_time_limit_ms / 1000,
+                                     pack_pool_size=config.pack_pool_size,
+                                     decay_half_life=config.decay_half_life_hours * 3600)
+    manifest = constructor.construct(project, config.token_budget, args.strategy,
+                                     query=getattr(args, "query", None),
+                                     tags=getattr(args, "tag", None))
 
+    adapter = _make_adapter(args.adapter, ns, history)
     output = adapter.format_context(manifest)
     print(output)
 
 
+def _learn(evaluator: ContextEvaluator, base_dir: Path, state: dict, project: str,
+           workers: int = 1, executor: Executor | None = None) -> dict[str, int]:
+    """Run continuous_learn, saving evaluated_sessions after every committed batch."""
+    def checkpoint(evaluated: set[str]) -> None:
+        state.setdefault("evaluated_sessions", {})[project] = sorted(evaluated)
+        save_state(base_dir, state)
+
+    evaluated = set(state.get("evaluated_sessions", {}).get(project, []))
+    result = evaluator.continuous_learn(project, evaluated, workers=workers, checkpoint=checkpoint,
+                                        executor=executor)
+    checkpoint(evaluated)
+    return result
+
+
 def cmd_learn(args: argparse.Namespace) -> None:
     config = load_config()
     _, history, memory = _build_stack(config)
     project = _project_name(args.project)
 
     state = get_state(config.base_dir)
-    evaluated = set(state.get("evaluated_sessions", {}).get(project, []))
-
     evaluator = ContextEvaluator(history, memory)
-    result = evaluator.continuous_learn(project, evaluated)
-
-    state.setdefault("evaluated_sessions", {})[project] = list(evaluated)
-    save_state(config.base_dir, state)
-
+    result = _learn(evaluator, config.base_dir, state, project,
+                    workers=args.workers or config.learn_workers)
     print(f"Learned from sessions: {result}")
 
 
@@ -128,47 +155,35 @@ def cmd_prune(args: argparse.Namespace) -> None:
 
 def cmd_daemon(args: argparse.Namespace) -> None:
     print(f"Starting daemon (interval={args.interval}s)")
-    while True:
-        _daemon_tick()
-        time.sleep(args.interval)
+    workers = load_config().learn_workers
+    # One extraction pool for the daemon's lifetime rather than one per project per tick.
+    with ExitStack() as stack:
+        pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers)) if workers > 1 else None
+        while True:
+            _daemon_tick(pool)
+            time.sleep(args.interval)
 
 
-def _daemon_tick() -> None:
+def _daemon_tick(pool: Executor | None = None) -> None:
     config = load_config()
     ns, history, memory = _build_stack(config)
     state = get_state(config.base_dir)
 
+    adapter = _make_adapter(config.default_adapter, ns, history, workers=config.ingest_workers)
+    evaluator = ContextEvaluator(history, memory)
     for key_info in state.get("project_map", {}).values():
         proj_name = key_info.get("name", "")
         proj_path = key_info.get("path", "")
         if not proj_name or not proj_path:
             continue
 
-        adapter_cls = get_adapter_class(config.default_adapter)
-        if config.default_adapter == "claude-code":
-            adapter = adapter_cls(history)
-        else:
-            adapter = adapter_cls(ns)
-
-        sessions = adapter.detect_sessions(proj_path)
-        for sp in sessions:
-            mtime = sp.stat().st_mtime
-            if time.time() - mtime < 300:
-                continue
-            key = f"{proj_name}:{sp.name}"
-            prev = state.get("captured_sessions", {}).get(key)
-            if prev and prev.get("mtime") == mtime:
-                continue
-            sids = adapter.ingest(sp, proj_name)
-            for sid in sids:
-                state.setdefault("captured_sessions", {})[key] = {
-                    "mtime": mtime, "session_id": sid,
-                }
-
-        evaluated = set(state.get("evaluated_sessions", {}).get(proj_name, []))
-        evaluator = ContextEvaluator(history, memory)
-        evaluator.continuous_learn(proj_name, evaluated)
-        state.setdefault("evaluated_sessions", {})[proj_name] = list(evaluated)
+        # Skip files written in the last five minutes; the session is likely still active.
+        sessions = [sp for sp in adapter.detect_sessions(proj_path)
+                    if time.time() - sp.stat().st_mtime >= 300]
+        _capture_sessions(adapter, config.base_dir, state, proj_name, sessions)
+
+        _learn(evaluator, config.base_dir, state, proj_name, workers=config.learn_workers,
+               executor=pool)
 
     save_state(config.base_dir, state)
 
@@ -224,7 +239,7 @@ def cmd_memory(args: argparse.Namespace) -> None:
 def cmd_serve(args: argparse.Namespace) -> None:
     from michigram.server import run_server
     config = load_config()
-    run_server(host=args.host, port=args.port, config=config)
+    run_server(host=args.host, port=args.port, config=config, workers=args.workers or None)
 
 
 def cmd_export(args: argparse.Namespace) -> None:
@@ -277,6 +292,64 @@ def cmd_afs(args: argparse.Namespace) -> None:
             print(f"Path not found: {args.path}")
 
 
+def cmd_reindex(args: argparse.Namespace) -> None:
+    config = load_config()
+    backend = FilesystemBackend(config.base_dir / "store")
+    if args.check:
+        report = backend.check_index()
+        problems = sum(len(v) for v in report.values())
+        for kind, paths in report.items():
+            for p in paths:
+                print(f"  {kind}: {p}")
+        print(f"Index check: {problems} inconsistencies")
+    else:
+        count = backend.rebuild_index()
+        print(f"Reindexed {count} nodes")
+    backend.close()
+
+
+def cmd_migrate_store(args: argparse.Namespace) -> None:
+    from michigram.storage.migrate import migrate_store
+    config = load_config()
+    source_name = args.source or config.default_backend
+    if source_name == args.to:
+        print(f"Source and target are both {args.to}; nothing to do")
+        return
+    source = create_backend(config, source_name)
+    target = create_backend(config, args.to)
+
+    def report(done: int) -> None:
+        print(f"  {done} nodes")
+
+    try:
+        copied = migrate_store(source, target, batch_size=args.batch_size, progress=report)
+    finally:
+        source.close()
+        target.close()
+    print(f"Migrated {copied} nodes from {source_name} to {args.to}")
+    if config.default_backend != args.to:
+        print(f'Set "default_backend": "{args.to}" in config.json to switch over')
+
+
+def cmd_compact(args: argparse.Namespace) -> None:
+    from michigram.storage.retention import RetentionPolicy, compact
+    config = load_config()
+    policy = RetentionPolicy.from_dict(config.version_retention)
+    if args.keep_last is not None or args.max_age_days is not None or args.exponential:
+        policy = RetentionPolicy(keep_last=args.keep_last, max_age_days=args.max_age_days,
+                                 exponential=args.exponential)
+    if not policy.enabled:
+        print("No retention policy: pass --keep-last, --max-age-days or --exponential,"
+              " or set version_retention in config.json")
+        return
+    backend = create_backend(config, args.backend or None)
+    try:
+        nodes, dropped = compact(backend, policy, args.path.strip("/"))
+    finally:
+        backend.close()
+    print(f"Compacted {nodes} nodes, removed {dropped} old versions")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(prog="michigram",
                                      description="Context engineering system for AI agents")
@@ -285,14 +358,18 @@ def main() -> None:
     p_capture = sub.add_parser("capture")
     p_capture.add_argument("--project", default=".")
     p_capture.add_argument("--adapter", default="claude-code")
+    p_capture.add_argument("--workers", type=int, default=0)
 
     p_inject = sub.add_parser("inject")
     p_inject.add_argument("--project", default=".")
     p_inject.add_argument("--adapter", default="claude-code")
     p_inject.add_argument("--strategy", default="recency")
+    p_inject.add_argument("--query", default=None)
+    p_inject.add_argument("--tag", action="append", default=None)
 
     p_learn = sub.add_parser("learn")
     p_learn.add_argument("--project", default=".")
+    p_learn.add_argument("--workers", type=int, default=0)
 
     p_prune = sub.add_parser("prune")
     p_prune.add_argument("--max-age", type=int, default=30)
@@ -320,6 +397,7 @@ def main() -> None:
     p_serve = sub.add_parser("serve")
     p_serve.add_argument("--host", default="127.0.0.1")
     p_serve.add_argument("--port", type=int, default=8420)
+    p_serve.add_argument("--workers", type=int, default=0)
 
     p_export = sub.add_parser("export")
     p_export.add_argument("--path", default="/context")
@@ -329,6 +407,21 @@ def main() -> None:
     p_import.add_argument("--bundle", required=True)
     p_import.add_argument("--target", default="")
 
+    p_reindex = sub.add_parser("reindex")
+    p_reindex.add_argument("--check", action="store_true")
+
+    p_migrate = sub.add_parser("migrate-store")
+    p_migrate.add_argument("--to", required=True, choices=BACKENDS)
+    p_migrate.add_argument("--source", default="", choices=("",) + BACKENDS)
+    p_migrate.add_argument("--batch-size", type=int, default=500)
+
+    p_compact = sub.add_parser("compact")
+    p_compact.add_argument("--keep-last", type=int, default=None)
+    p_compact.add_argument("--max-age-days", type=float, default=None)
+    p_compact.add_argument("--exponential", action="store_true")
+    p_compact.add_argument("--path", default="")
+    p_compact.add_argument("--backend", default="", choices=("",) + BACKENDS)
+
     args = parser.parse_args()
 
     commands = {
@@ -343,6 +436,9 @@ def main() -> None:
         "serve": cmd_serve,
         "export": cmd_export,
         "import": cmd_import,
+        "reindex": cmd_reindex,
+        "migrate-store": cmd_migrate_store,
+        "compact": cmd_compact,
     }
 
     if args.command in commands:
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from pathlib import Path
 
 DEFAULT_BASE_DIR = Path.home() / ".michigram"
@@ -15,6 +15,26 @@ class Config:
     default_adapter: str = "claude-code"
     prune_max_age_days: int = 30
     daemon_interval_seconds: int = 1800
+    ingest_workers: int = 1
+    learn_workers: int = 1
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_pool_size: int = 4
+    server_workers: int = 8
+    server_keepalive_seconds: float = 5.0
+    manifest_cache_size: int = 256
+    manifest_cache_ttl_seconds: float = 30.0
+    pack_time_limit_ms: float = 50.0
+    pack_pool_size: int = 128
+    decay_half_life_hours: float = 168.0
+    # Namespace prefix -> CachedMount options, e.g. {"/context/memory": {"max_size": 8388608}}
+    mount_cache: dict[str, dict] = field(default_factory=dict)
+    # Applied on every write, e.g. {"keep_last": 20, "max_age_days": 90, "exponential": true}
+    version_retention: dict = field(default_factory=dict)
+    content_addressed: bool = False
+    # Embedder for the semantic strategy ("" disables the vector index); see storage.vectors
+    embedding: str = "hashing"
+    embedding_dim: int = 256
 
 
 def load_config(config_path: Path | None = None) -> Config:
@@ -26,9 +46,9 @@ def load_config(config_path: Path | None = None) -> Config:
     kwargs: dict = {}
     if "base_dir" in data:
         kwargs["base_dir"] = Path(data["base_dir"])
-    for key in ("default_backend", "token_budget", "default_adapter", "prune_max_age_days", "daemon_interval_seconds"):
-        if key in data:
-            kwargs[key] = data[key]
+    for f in fields(Config):
+        if f.name != "base_dir" and f.name in data:
+            kwargs[f.name] = data[f.name]
     return Config(**kwargs)
 
 
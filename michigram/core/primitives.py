@@ -1,10 +1,18 @@
 from __future__ import annotations
 
 import hashlib
+import json
 import os
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+try:
+    import orjson
+except ImportError:  # optional: faster decoding when installed
+    orjson = None
 
 
 def atomic_write(path: Path, content: str) -> None:
@@ -31,3 +39,22 @@ def estimate_tokens(text: str) -> int:
 
 def sha256_short(text: str, length: int = 12) -> str:
     return hashlib.sha256(text.encode()).hexdigest()[:length]
+
+
+def parallel_map(fn: Callable, *iterables: Iterable, workers: int = 1) -> Iterator:
+    """Like map(), but runs fn in a process pool when workers > 1. Results keep input order."""
+    if workers <= 1:
+        yield from map(fn, *iterables)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(fn, *iterables)
+
+
+def json_loads(data: str | bytes) -> Any:
+    """Decode JSON with orjson when it is installed, else (or if orjson rejects it) the stdlib."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN or >64-bit ints, which the stdlib accepts
+    return json.loads(data)
@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
-from .primitives import atomic_write
+from .primitives import atomic_write, sha256_short
 
 _DEFAULT_STATE = {
     "captured_sessions": {},
@@ -29,3 +29,26 @@ def get_state(base_dir: Path) -> dict:
 def save_state(base_dir: Path, state: dict) -> None:
     path = _state_path(base_dir)
     atomic_write(path, json.dumps(state, indent=2) + "\n")
+
+
+def _cursor_path(base_dir: Path, key: str) -> Path:
+    return base_dir / ".capture" / f"{sha256_short(key, 16)}.json"
+
+
+def get_capture_cursor(base_dir: Path, key: str) -> dict | None:
+    """Partial parse state saved by the last capture of a session file, if any."""
+    path = _cursor_path(base_dir, key)
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text())
+    except ValueError:
+        return None
+
+
+def save_capture_cursor(base_dir: Path, key: str, cursor: dict | None) -> None:
+    path = _cursor_path(base_dir, key)
+    if cursor is None:
+        path.unlink(missing_ok=True)
+    else:
+        atomic_write(path, json.dumps(cursor))
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from michigram.pipeline.constructor import ContextManifest
+
+
+class ManifestCache:
+    """LRU cache of built manifests, validated against namespace write generations.
+
+    An entry is served only while the generation it was built at is still current.
+    ``ttl_seconds`` bounds staleness from writes made by other processes, which this
+    process's namespace never sees.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 30.0) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[Hashable, float, ContextManifest]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, generation: Hashable) -> ContextManifest | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                gen, stored_at, manifest = entry
+                if gen == generation and time.monotonic() - stored_at <= self._ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return manifest
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, generation: Hashable, manifest: ContextManifest) -> None:
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic(), manifest)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
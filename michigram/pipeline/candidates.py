@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Sequence
+
+from michigram.afs.node import ContextNode
+
+try:
+    import numpy as np
+except ImportError:  # optional: vectorized scoring when installed
+    np = None
+
+# Candidates ranked by a partial sort at first; the window doubles if a walk gets past it.
+RANK_HEAD = 256
+
+
+def epoch_seconds(ts: str) -> float:
+    """Parse an ISO-8601 timestamp to POSIX seconds; naive times are UTC, bad ones 0."""
+    try:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def descending(scores) -> Iterator[int]:
+    """Indices of scores from highest to lowest, ties in index order.
+
+    With NumPy only a window of top indices is sorted, so a caller that stops
+    early never pays for sorting everything.
+    """
+    if np is None:
+        yield from sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        return
+    n = len(scores)
+    keys = -scores
+    start, window = 0, RANK_HEAD
+    while start < n:
+        stop = min(start + window, n)
+        if stop == n:
+            part = np.arange(n)
+        else:
+            # Everything tied with the stop-th key too, so ties break as in a full sort.
+            kth = keys[np.argpartition(keys, stop - 1)[stop - 1]]
+            part = np.flatnonzero(keys <= kth)
+        part = part[np.lexsort((part, keys[part]))]
+        yield from (int(i) for i in part[start:stop])
+        start, window = stop, window * 2
+
+
+class CandidateTable:
+    """A project's candidate metadata as columns, for vectorized scoring.
+
+    Each row is a memory or session: its path, tier id (an index into the
+    constructor's tier order), ``updated_at`` as epoch seconds, token estimate,
+    and a bitset of its tags. With NumPy the columns are arrays and tag bitsets
+    are rows of uint64 words; without it they are lists and Python ints.
+    """
+
+    def __init__(self, paths: list[str], tiers: Sequence[int], updated: Sequence[float],
+                 tokens: Sequence[int], tag_bits: Sequence[int], tag_ids: dict[str, int]) -> None:
+        self.paths = paths
+        self.tag_ids = tag_ids
+        self.min_tokens = min(tokens, default=0)
+        self._decay_cache: dict = {}
+        if np is None:
+            self.tiers, self.updated, self.tokens = list(tiers), list(updated), list(tokens)
+            self.tag_bits = list(tag_bits)
+            return
+        self.tiers = np.asarray(tiers, dtype=np.int8)
+        self.updated = np.asarray(updated, dtype=np.float64)
+        self.tokens = np.asarray(tokens, dtype=np.int64)
+        words = max(1, -(-len(tag_ids) // 64))
+        self.tag_bits = np.array([[(bits >> (64 * w)) & 0xFFFFFFFFFFFFFFFF for w in range(words)]
+                                  for bits in tag_bits], dtype=np.uint64).reshape(-1, words)
+
+    @classmethod
+    def from_nodes(cls, rows: Iterable[tuple[int, ContextNode]]) -> CandidateTable:
+        """Build from (tier id, node) pairs; only metadata is read."""
+        paths, tiers, updated, tokens, tag_bits = [], [], [], [], []
+        tag_ids: dict[str, int] = {}
+        for tier, node in rows:
+            meta = node.metadata
+            paths.append(node.path)
+            tiers.append(tier)
+            updated.append(epoch_seconds(meta.updated_at))
+            tokens.append(meta.token_estimate)
+            bits = 0
+            for tag in meta.tags:
+                bits |= 1 << tag_ids.setdefault(tag, len(tag_ids))
+            tag_bits.append(bits)
+        return cls(paths, tiers, updated, tokens, tag_bits, tag_ids)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _decay_columns(self, tier_weights: tuple[float, ...], half_life: float):
+        """Per-row log2 tier weight and updated / half_life, cached per parameters."""
+        key = (tier_weights, half_life)
+        cached = self._decay_cache.get(key)
+        if cached is None:
+            logs = [math.log2(w) if w > 0 else -math.inf for w in tier_weights]
+            if np is None:
+                cached = ([logs[t] for t in self.tiers], [u / half_life for u in self.updated])
+            else:
+                cached = (np.asarray(logs)[self.tiers], self.updated / half_life)
+            self._decay_cache = {key: cached}
+        return cached
+
+    def decay_keys(self, tier_weights: Sequence[float], now: float, half_life: float):
+        """Rank keys for the decay score, tier weight * 0.5 ** (age / half_life).
+
+        Each key is log2 of the score plus now / half_life, which orders candidates
+        the same way at two array operations per call. Future timestamps count as
+        age 0, and a zero weight gives -inf.
+        """
+        base, scaled = self._decay_columns(tuple(tier_weights), half_life)
+        cap = now / half_life
+        if np is None:
+            return [b + min(x, cap) for b, x in zip(base, scaled)]
+        return base + np.minimum(scaled, cap)
+
+    def with_tags(self, scores, tags: list[str]):
+        """Scores with candidates lacking any of tags set to -inf."""
+        if any(tag not in self.tag_ids for tag in tags):
+            wanted = None
+        else:
+            wanted = sum(1 << self.tag_ids[tag] for tag in tags)
+        if np is None:
+            return [s if wanted is not None and bits & wanted == wanted else -math.inf
+                    for s, bits in zip(scores, self.tag_bits)]
+        if wanted is None:
+            return np.full(len(self), -np.inf)
+        words = self.tag_bits.shape[1]
+        mask = np.array([(wanted >> (64 * w)) & 0xFFFFFFFFFFFFFFFF for w in range(words)],
+                        dtype=np.uint64)
+        keep = np.all((self.tag_bits & mask) == mask, axis=1)
+        return np.where(keep, scores, -np.inf)
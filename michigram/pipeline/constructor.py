@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Iterator
 
 from michigram.afs.node import ContextNode
+from michigram.pipeline.candidates import CandidateTable, descending
+from michigram.pipeline.packing import knapsack_pack
 from michigram.repository.history import HistoryRepository
 from michigram.repository.memory import MemoryRepository, MemoryType
 
+if TYPE_CHECKING:
+    from michigram.pipeline.cache import ManifestCache
+
 
 @dataclass
 class ContextManifest:
@@ -13,6 +25,12 @@ class ContextManifest:
     total_tokens: int = 0
     strategy: str = "recency"
     excluded_count: int = 0
+    token_budget: int = 0
+
+    @property
+    def utilization(self) -> float:
+        """Fraction of the token budget the items use."""
+        return self.total_tokens / self.token_budget if self.token_budget else 0.0
 
 
 MEMORY_TYPE_PRIORITY = {
@@ -23,55 +41,204 @@ MEMORY_TYPE_PRIORITY = {
     MemoryType.USER: 5,
 }
 
+# Tier weights for the decay strategy; sessions rank as one tier after every memory type.
+DECAY_TIER_WEIGHTS = {
+    MemoryType.FACT: 1.0,
+    MemoryType.EXPERIENTIAL: 0.9,
+    MemoryType.EPISODIC: 0.8,
+    MemoryType.PROCEDURAL: 0.7,
+    MemoryType.USER: 0.6,
+}
+SESSION_DECAY_WEIGHT = 0.5
 
-class ContextConstructor:
-    def __init__(self, history: HistoryRepository, memory: MemoryRepository) -> None:
-        self._history = history
-        self._memory = memory
+# Candidate tables kept (one per project), and how long one serves before a rebuild,
+# which bounds staleness from other processes' writes like the manifest cache's TTL.
+TABLE_CACHE_SIZE = 16
+TABLE_TTL_SECONDS = 30.0
 
-    def construct(self, project: str, token_budget: int = 8000,
-                  strategy: str = "recency") -> ContextManifest:
-        candidates: list[ContextNode] = []
+_TIERS = sorted(MemoryType, key=lambda t: MEMORY_TYPE_PRIORITY.get(t, 99))
+_SESSION_TIER = len(_TIERS)
 
-        for mt in MemoryType:
-            candidates.extend(self._memory.recall_all(project, mt))
 
-        session_ids = self._history.list_sessions(project)
-        for sid in session_ids:
-            node = self._history.get_session(project, sid)
-            if node:
-                candidates.append(node)
+class ContextConstructor:
+    """Builds token-budgeted manifests from a project's memories and sessions.
+
+    ``recency`` and ``relevance`` take candidates greedily in score order.
+    ``optimal`` knapsack-packs the ``pack_pool_size`` most recent candidates for
+    recency-weighted tokens, spending at most ``pack_time_limit`` seconds; above
+    PACK_RESOLUTION tokens the packing is approximate (see ``knapsack_pack``).
+    ``lexical`` ranks candidates matching ``query`` by BM25, and ``semantic`` by the
+    cosine similarity of their stored embeddings to it; both follow with the rest
+    by recency. ``decay`` scores every candidate as its tier weight halved every
+    ``decay_half_life`` seconds of age, over a cached columnar CandidateTable.
+
+    Given ``tags``, only candidates carrying all of them are considered.
+    """
+
+    def __init__(self, history: HistoryRepository, memory: MemoryRepository,
+                 cache: ManifestCache | None = None, pack_time_limit: float = 0.05,
+                 pack_pool_size: int = 128, decay_half_life: float = 7 * 86400.0) -> None:
+        if not decay_half_life > 0:
+            raise ValueError(f"decay_half_life must be positive, got {decay_half_life}")
+        self._history = history
+        self._memory = memory
+        self._cache = cache
+        self._pack_time_limit = pack_time_limit
+        self._pack_pool_size = pack_pool_size
+        self._decay_half_life = decay_half_life
+        self._decay_weights = [DECAY_TIER_WEIGHTS[t] for t in _TIERS] + [SESSION_DECAY_WEIGHT]
+        self._tables: OrderedDict[str, tuple[tuple[int, int], float, CandidateTable]] = OrderedDict()
+        self._tables_lock = threading.Lock()
+
+    def construct(self, project: str, token_budget: int = 8000, strategy: str = "recency",
+                  query: str | None = None, tags: list[str] | None = None) -> ContextManifest:
+        if self._cache is None:
+            return self._build(project, token_budget, strategy, query, tags)
+        key = (project, token_budget, strategy, query, tuple(tags or ()))
+        generation = self._generation(project)
+        manifest = self._cache.get(key, generation)
+        if manifest is None:
+            manifest = self._build(project, token_budget, strategy, query, tags)
+            self._cache.put(key, generation, manifest)
+        return manifest
+
+    def _generation(self, project: str) -> tuple[int, int]:
+        return self._history.generation(project), self._memory.generation(project)
+
+    def _build(self, project: str, token_budget: int, strategy: str,
+               query: str | None = None, tags: list[str] | None = None) -> ContextManifest:
+        memory_count, memory_min = self._memory.token_stats(project)
+        history_count, history_min = self._history.token_stats(project)
+        mins = [m for m, count in ((memory_min, memory_count), (history_min, history_count))
+                if count]
+        if strategy == "optimal":
+            items = self._pack(project, token_budget, tags)
+        elif strategy == "decay":
+            items = self._decay(project, token_budget, tags)
+        else:
+            items = self._greedy(project, token_budget, strategy, min(mins, default=0),
+                                 query, tags)
+        return ContextManifest(
+            items=items,
+            total_tokens=sum(n.metadata.token_estimate for n in items),
+            strategy=strategy,
+            excluded_count=memory_count + history_count - len(items),
+            token_budget=token_budget,
+        )
 
-        scored = self._score(candidates, strategy)
+    def _greedy(self, project: str, token_budget: int, strategy: str, cheapest: int,
+                query: str | None = None, tags: list[str] | None = None) -> list[ContextNode]:
+        """Take candidates in score order while they fit in the budget.
 
+        Candidates stream from storage already in score order. Storage leaves out
+        candidates larger than the budget still left, and the walk stops once that
+        is below the cheapest candidate, so only nodes that could still be picked
+        are read.
+        """
         items: list[ContextNode] = []
         total = 0
-        excluded = 0
-        for node in scored:
+        for node in self._stream(project, strategy, lambda: token_budget - total, query, tags):
             cost = node.metadata.token_estimate
             if total + cost <= token_budget:
-                items.append(node)
+                items.append(node.load())
                 total += cost
+            if token_budget - total < cheapest:
+                break
+        return items
+
+    def _pack(self, project: str, token_budget: int,
+              tags: list[str] | None = None) -> list[ContextNode]:
+        """Knapsack-pack the most recent candidates, valued at score × tokens.
+
+        The score falls linearly with recency rank from 1 to 0.5, so filling the
+        budget outweighs strict recency order.
+        """
+        pool = list(itertools.islice(
+            self._stream(project, "recency", lambda: token_budget, tags=tags),
+            self._pack_pool_size))
+        costs = [n.metadata.token_estimate for n in pool]
+        values = [cost * (1 - rank / (2 * len(pool))) for rank, cost in enumerate(costs)]
+        chosen = knapsack_pack(costs, values, token_budget, self._pack_time_limit)
+        return [pool[i].load() for i in chosen]
+
+    def _decay(self, project: str, token_budget: int,
+               tags: list[str] | None = None) -> list[ContextNode]:
+        """Take candidates greedily in order of the vectorized decay score."""
+        table = self._table(project)
+        scores = table.decay_keys(self._decay_weights, time.time(), self._decay_half_life)
+        if tags:
+            scores = table.with_tags(scores, tags)
+        items: list[ContextNode] = []
+        total = 0
+        for i in descending(scores):
+            if scores[i] == -math.inf or token_budget - total < table.min_tokens:
+                break
+            if total + int(table.tokens[i]) > token_budget:
+                continue
+            repo = self._history if table.tiers[i] == _SESSION_TIER else self._memory
+            node = repo.read_path(table.paths[i])
+            # The table may predate another process's write; trust the node read now.
+            if node is not None and total + node.metadata.token_estimate <= token_budget:
+                items.append(node)
+                total += node.metadata.token_estimate
+        return items
+
+    def _table(self, project: str) -> CandidateTable:
+        """The project's CandidateTable, rebuilt after writes or once TABLE_TTL_SECONDS pass."""
+        generation = self._generation(project)
+        with self._tables_lock:
+            entry = self._tables.get(project)
+            if (entry is not None and entry[0] == generation
+                    and time.monotonic() - entry[1] <= TABLE_TTL_SECONDS):
+                self._tables.move_to_end(project)
+                return entry[2]
+        rows = [(tier, node) for tier, mt in enumerate(_TIERS)
+                for node in self._memory.iter_by_updated(project, mt, False)]
+        rows += [(_SESSION_TIER, node)
+                 for node in self._history.iter_sessions_by_updated(project, False)]
+        table = CandidateTable.from_nodes(rows)
+        with self._tables_lock:
+            self._tables[project] = (generation, time.monotonic(), table)
+            self._tables.move_to_end(project)
+            while len(self._tables) > TABLE_CACHE_SIZE:
+                self._tables.popitem(last=False)
+        return table
+
+    def _stream(self, project: str, strategy: str, max_tokens: Callable[[], int],
+                query: str | None = None, tags: list[str] | None = None) -> Iterator[ContextNode]:
+        """Yield the candidates for project that may still fit, without content, best first."""
+        nodes = self._ranked(project, strategy, max_tokens, query)
+        if not tags:
+            return nodes
+        wanted = set(tags)
+        return (n for n in nodes if wanted <= set(n.metadata.tags))
+
+    def _ranked(self, project: str, strategy: str, max_tokens: Callable[[], int],
+                query: str | None = None) -> Iterator[ContextNode]:
+        if strategy in ("lexical", "semantic"):
+            # Index hits by score first, then everything else newest first.
+            if strategy == "lexical":
+                streams = (self._memory.search_text(project, query or ""),
+                           self._history.search_sessions_text(project, query or ""))
             else:
-                excluded += 1
-
-        return ContextManifest(
-            items=items,
-            total_tokens=total,
-            strategy=strategy,
-            excluded_count=excluded,
-        )
-
-    def _score(self, candidates: list[ContextNode], strategy: str) -> list[ContextNode]:
-        if strategy == "recency":
-            return sorted(candidates, key=lambda n: n.metadata.updated_at, reverse=True)
-
+                streams = (self._memory.search_similar(project, query or ""),
+                           self._history.search_sessions_similar(project, query or ""))
+            matched = set()
+            for node, _ in heapq.merge(*streams, key=lambda hit: hit[1], reverse=True):
+                matched.add(node.path)
+                yield node
+            for node in self._ranked(project, "recency", max_tokens):
+                if node.path not in matched:
+                    yield node
+            return
         if strategy == "relevance":
-            def relevance_key(n: ContextNode) -> tuple[int, str]:
-                for mt in MemoryType:
-                    if f"/{mt.value}/" in n.path:
-                        return (MEMORY_TYPE_PRIORITY.get(mt, 99), n.metadata.updated_at)
-                return (100, n.metadata.updated_at)
-            return sorted(candidates, key=relevance_key)
-
-        return sorted(candidates, key=lambda n: n.metadata.updated_at, reverse=True)
+            # Memory tiers in priority order, then sessions; oldest first within each.
+            for mt in sorted(MemoryType, key=lambda t: MEMORY_TYPE_PRIORITY.get(t, 99)):
+                yield from self._memory.iter_by_updated(project, mt, False, max_tokens)
+            yield from self._history.iter_sessions_by_updated(project, False, max_tokens)
+            return
+        yield from heapq.merge(
+            self._memory.iter_by_updated(project, max_tokens=max_tokens),
+            self._history.iter_sessions_by_updated(project, max_tokens=max_tokens),
+            key=lambda n: n.metadata.updated_at, reverse=True,
+        )
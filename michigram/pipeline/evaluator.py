@@ -1,39 +1,120 @@
 from __future__ import annotations
 
+import pickle
 import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import ExitStack
+from itertools import repeat
+from typing import Callable
 
 from michigram.afs.node import ContextNode
 from michigram.core.primitives import sha256_short
+from michigram.pipeline.extraction import ExtractionRule, FactExtractor
 from michigram.repository.history import HistoryRepository
 from michigram.repository.memory import MemoryRepository, MemoryType
 
 
-class ContextEvaluator:
-    def __init__(self, history: HistoryRepository, memory: MemoryRepository) -> None:
-        self._history = history
-        self._memory = memory
+# Fewer pending sessions than this are extracted in-process; pool startup would dominate.
+PARALLEL_MIN_SESSIONS = 8
 
-    def evaluate_session(self, project: str, session_id: str) -> dict[str, int]:
-        node = self._history.get_session(project, session_id)
-        if node is None:
-            return {"facts": 0, "patterns": 0, "errors": 0}
+_FILE_OP_RE = re.compile(r"(?:Read|Write|Edit|Bash|Glob|Grep):\s*(.+)")
+
+
+def extract_facts(content: str, extractor: FactExtractor) -> dict[str, str]:
+    facts = {}
+    lines = content.split("\n")
+
+    prompts_section = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped == "## Prompts":
+            prompts_section = True
+            continue
+        if stripped.startswith("## ") and prompts_section:
+            prompts_section = False
+            continue
+        if prompts_section and stripped.startswith("- "):
+            prompt_text = stripped[2:].strip()
+            if prompt_text:
+                key = sha256_short("prompt_" + prompt_text, 8)
+                facts[key] = f"Goal: {prompt_text}"
+            continue
+
+        if not stripped or stripped.startswith("#"):
+            continue
+
+        for key, value in extractor.extract(stripped):
+            facts[key] = value
+
+    return facts
 
-        content = node.content or ""
-        facts = self._extract_facts(content)
-        patterns = self._extract_patterns(content)
-        errors = self._extract_errors(content)
 
-        for key, value in facts.items():
-            self._memory.store(project, MemoryType.FACT, key, value,
-                             source="evaluator", tags=["auto-extracted"])
+def extract_patterns(content: str) -> dict[str, str]:
+    patterns = {}
+    if "## File Operations" in content:
+        section = content.split("## File Operations")[1].split("##")[0]
+        file_refs = _FILE_OP_RE.findall(section)
+        if file_refs:
+            unique_files = sorted(set(f.strip() for f in file_refs))
+            key = sha256_short("files_" + ",".join(unique_files), 8)
+            patterns[key] = "Modified files: " + ", ".join(unique_files)
+    return patterns
 
-        for key, value in patterns.items():
-            self._memory.store(project, MemoryType.EXPERIENTIAL, key, value,
-                             source="evaluator", tags=["pattern"])
 
-        for key, value in errors.items():
-            self._memory.store(project, MemoryType.EPISODIC, key, value,
-                             source="evaluator", tags=["error"])
+def extract_errors(content: str) -> dict[str, str]:
+    errors = {}
+    if "## Errors" in content:
+        section = content.split("## Errors")[1].split("##")[0]
+        for line in section.strip().split("\n"):
+            line = line.strip().lstrip("- ")
+            if line:
+                key = sha256_short(line, 8)
+                errors[key] = line
+    return errors
+
+
+def analyze_session(content: str, extractor: FactExtractor) -> tuple[dict, dict, dict]:
+    """Return (facts, patterns, errors) for a session's content; pure, so it can run in a worker."""
+    return extract_facts(content, extractor), extract_patterns(content), extract_errors(content)
+
+
+class ContextEvaluator:
+    def __init__(self, history: HistoryRepository, memory: MemoryRepository,
+                 extractor: FactExtractor | None = None) -> None:
+        self._history = history
+        self._memory = memory
+        self._extractor = extractor or FactExtractor()
+        self._extractors: dict[str, FactExtractor] = {}
+
+    def register_rule(self, rule: ExtractionRule, project: str | None = None) -> None:
+        """Add a fact-extraction rule for every project, or only for ``project``."""
+        if project is None:
+            self._extractor.register(rule)
+            for extractor in self._extractors.values():
+                extractor.register(rule)
+            return
+        extractor = self._extractors.get(project)
+        if extractor is None:
+            extractor = self._extractors[project] = FactExtractor(self._extractor.rules)
+        extractor.register(rule)
+
+    def _extractor_for(self, project: str | None) -> FactExtractor:
+        return self._extractors.get(project, self._extractor)
+
+    def _store_results(self, project: str, facts: dict[str, str], patterns: dict[str, str],
+                       errors: dict[str, str]) -> dict[str, int]:
+        with self._memory.batch():
+            for key, value in facts.items():
+                self._memory.store(project, MemoryType.FACT, key, value,
+                                 source="evaluator", tags=["auto-extracted"])
+
+            for key, value in patterns.items():
+                self._memory.store(project, MemoryType.EXPERIENTIAL, key, value,
+                                 source="evaluator", tags=["pattern"])
+
+            for key, value in errors.items():
+                self._memory.store(project, MemoryType.EPISODIC, key, value,
+                                 source="evaluator", tags=["error"])
 
         return {
             "facts": len(facts),
@@ -41,88 +122,21 @@ class ContextEvaluator:
             "errors": len(errors),
         }
 
-    def _extract_facts(self, content: str) -> dict[str, str]:
-        facts = {}
-        lines = content.split("\n")
-
-        prompts_section = False
-        for line in lines:
-            stripped = line.strip()
-            if stripped == "## Prompts":
-                prompts_section = True
-                continue
-            if stripped.startswith("## ") and prompts_section:
-                prompts_section = False
-                continue
-            if prompts_section and stripped.startswith("- "):
-                prompt_text = stripped[2:].strip()
-                if prompt_text:
-                    key = sha256_short("prompt_" + prompt_text, 8)
-                    facts[key] = f"Goal: {prompt_text}"
-                continue
-
-            if not stripped or stripped.startswith("#"):
-                continue
-
-            tool_patterns = [
-                r"uses?\s+(\w[\w\s]*\w)",
-                r"running\s+(\w[\w\s]*)",
-                r"(?:install|pip install|npm install|yarn add)\s+([\w@/.-]+)",
-                r"(?:import|from)\s+([\w.]+)",
-                r"(?:require)\s*\(\s*['\"]([^'\"]+)",
-                r"(?:docker|git|npm|pip|cargo|brew)\s+\w+",
-            ]
-            for pattern in tool_patterns:
-                m = re.search(pattern, stripped, re.IGNORECASE)
-                if m:
-                    value = m.group(1).strip() if m.lastindex else m.group(0).strip()
-                    key = sha256_short(value, 8)
-                    facts[key] = value
-                    break
-
-            file_path_match = re.search(r"(?:Read|Write|Edit|Bash|Glob|Grep):\s*(\S+)", stripped)
-            if file_path_match:
-                path = file_path_match.group(1)
-                parts = path.rsplit("/", 1)
-                if len(parts) > 1:
-                    directory = parts[0]
-                    key = sha256_short("dir_" + directory, 8)
-                    facts[key] = f"Project dir: {directory}"
-                ext_match = re.search(r"\.\w+$", path)
-                if ext_match:
-                    ext = ext_match.group(0)
-                    key = sha256_short("ext_" + ext, 8)
-                    facts[key] = f"File type: {ext}"
-
-            error_match = re.search(r"(TypeError|ImportError|ValueError|KeyError|AttributeError|RuntimeError|SyntaxError|NameError|FileNotFoundError|ModuleNotFoundError)", stripped)
-            if error_match:
-                err_type = error_match.group(1)
-                key = sha256_short("errtype_" + err_type, 8)
-                facts[key] = f"Error encountered: {err_type}"
-
-        return facts
+    def evaluate_session(self, project: str, session_id: str) -> dict[str, int]:
+        node = self._history.get_session(project, session_id)
+        if node is None:
+            return {"facts": 0, "patterns": 0, "errors": 0}
+        return self._store_results(project, *analyze_session(node.content or "",
+                                                             self._extractor_for(project)))
+
+    def _extract_facts(self, content: str, project: str | None = None) -> dict[str, str]:
+        return extract_facts(content, self._extractor_for(project))
 
     def _extract_patterns(self, content: str) -> dict[str, str]:
-        patterns = {}
-        if "## File Operations" in content:
-            section = content.split("## File Operations")[1].split("##")[0]
-            file_refs = re.findall(r"(?:Read|Write|Edit|Bash|Glob|Grep):\s*(.+)", section)
-            if file_refs:
-                unique_files = sorted(set(f.strip() for f in file_refs))
-                key = sha256_short("files_" + ",".join(unique_files), 8)
-                patterns[key] = "Modified files: " + ", ".join(unique_files)
-        return patterns
+        return extract_patterns(content)
 
     def _extract_errors(self, content: str) -> dict[str, str]:
-        errors = {}
-        if "## Errors" in content:
-            section = content.split("## Errors")[1].split("##")[0]
-            for line in section.strip().split("\n"):
-                line = line.strip().lstrip("- ")
-                if line:
-                    key = sha256_short(line, 8)
-                    errors[key] = line
-        return errors
+        return extract_errors(content)
 
     def detect_drift(self, project: str, recent_count: int = 5) -> list[str]:
         sessions = self._history.list_sessions(project)
@@ -133,7 +147,7 @@ class ContextEvaluator:
         for sid in recent:
             node = self._history.get_session(project, sid)
             if node and node.content:
-                files = re.findall(r"(?:Read|Write|Edit|Bash|Glob|Grep):\s*(.+)", node.content)
+                files = _FILE_OP_RE.findall(node.content)
                 recent_files.update(f.strip() for f in files)
 
         stored_patterns = self._memory.recall_all(project, MemoryType.EXPERIENTIAL)
@@ -146,18 +160,54 @@ class ContextEvaluator:
 
         return drift_signals
 
-    def continuous_learn(self, project: str, evaluated_ids: set[str] | None = None) -> dict[str, int]:
+    def continuous_learn(self, project: str, evaluated_ids: set[str] | None = None,
+                         workers: int = 1, batch_size: int = 100,
+                         checkpoint: Callable[[set[str]], None] | None = None,
+                         executor: Executor | None = None) -> dict[str, int]:
+        """Evaluate every session not in ``evaluated_ids``, adding each one as it is stored.
+
+        With workers > 1, extraction runs in a process pool (rules must then be
+        picklable, else it falls back to one process); ``executor`` supplies a
+        long-lived pool to use instead of starting one per call. Either way, fewer
+        than PARALLEL_MIN_SESSIONS pending sessions run in-process. Results are written
+        ``batch_size`` sessions per memory batch; after each batch commits, its
+        session ids are added to ``evaluated_ids`` and ``checkpoint`` is called with
+        them, so a crashed run resumes from the last committed batch.
+        """
         if evaluated_ids is None:
             evaluated_ids = set()
 
         totals = {"facts": 0, "patterns": 0, "errors": 0}
-        sessions = self._history.list_sessions(project)
-        for sid in sessions:
-            if sid in evaluated_ids:
-                continue
-            result = self.evaluate_session(project, sid)
-            for k in totals:
-                totals[k] += result[k]
-            evaluated_ids.add(sid)
+        pending = [sid for sid in self._history.list_sessions(project) if sid not in evaluated_ids]
+        extractor = self._extractor_for(project)
+        parallel = (workers > 1 or executor is not None) and len(pending) >= PARALLEL_MIN_SESSIONS
+        if parallel:
+            try:
+                pickle.dumps(extractor)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                parallel = False
+
+        with ExitStack() as stack:
+            mapper = map
+            if parallel:
+                if executor is None:
+                    executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                mapper = executor.map
+            for start in range(0, len(pending), batch_size):
+                chunk = pending[start:start + batch_size]
+                contents = []
+                for sid in chunk:
+                    node = self._history.get_session(project, sid)
+                    if node is not None:
+                        contents.append(node.content or "")
+                with self._memory.batch():
+                    for facts, patterns, errors in mapper(analyze_session, contents,
+                                                          repeat(extractor)):
+                        result = self._store_results(project, facts, patterns, errors)
+                        for k in totals:
+                            totals[k] += result[k]
+                evaluated_ids.update(chunk)
+                if checkpoint is not None:
+                    checkpoint(evaluated_ids)
 
         return totals
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from michigram.core.primitives import sha256_short
+
+_EXT_RE = re.compile(r"\.\w+$")
+
+
+@dataclass(frozen=True)
+class ExtractionRule:
+    """A regex whose first match in a line yields facts.
+
+    ``render`` maps the matched value (capture group 1, else the whole match, stripped)
+    to (key, fact) pairs; by default the value itself is stored under a hash of
+    ``name`` and the value. Within a ``group`` only the first matching rule, in
+    registration order, fires. ``hints`` are lowercase literals of which at least
+    one must appear in any line the pattern can match (case-insensitively); lines
+    without one skip the regex entirely.
+    """
+
+    name: str
+    pattern: str
+    render: Callable[[str], Iterable[tuple[str, str]]] | None = None
+    group: str | None = None
+    ignore_case: bool = False
+    hints: tuple[str, ...] = ()
+
+    def facts(self, value: str) -> Iterable[tuple[str, str]]:
+        if self.render is None:
+            return [(sha256_short(f"{self.name}_{value}", 8), value)]
+        return self.render(value)
+
+
+def _tool_fact(value: str) -> list[tuple[str, str]]:
+    return [(sha256_short(value, 8), value)]
+
+
+def _path_facts(path: str) -> list[tuple[str, str]]:
+    facts = []
+    parts = path.rsplit("/", 1)
+    if len(parts) > 1:
+        directory = parts[0]
+        facts.append((sha256_short("dir_" + directory, 8), f"Project dir: {directory}"))
+    ext_match = _EXT_RE.search(path)
+    if ext_match:
+        ext = ext_match.group(0)
+        facts.append((sha256_short("ext_" + ext, 8), f"File type: {ext}"))
+    return facts
+
+
+def _error_fact(err_type: str) -> list[tuple[str, str]]:
+    return [(sha256_short("errtype_" + err_type, 8), f"Error encountered: {err_type}")]
+
+
+DEFAULT_RULES: tuple[ExtractionRule, ...] = (
+    ExtractionRule("uses", r"uses?\s+(\w[\w\s]*\w)", _tool_fact, group="tool",
+                   ignore_case=True, hints=("use",)),
+    ExtractionRule("running", r"running\s+(\w[\w\s]*)", _tool_fact, group="tool",
+                   ignore_case=True, hints=("running",)),
+    ExtractionRule("install", r"(?:install|pip install|npm install|yarn add)\s+([\w@/.-]+)",
+                   _tool_fact, group="tool", ignore_case=True, hints=("install", "yarn add")),
+    ExtractionRule("import", r"(?:import|from)\s+([\w.]+)", _tool_fact, group="tool",
+                   ignore_case=True, hints=("import", "from")),
+    ExtractionRule("require", r"(?:require)\s*\(\s*['\"]([^'\"]+)", _tool_fact, group="tool",
+                   ignore_case=True, hints=("require",)),
+    ExtractionRule("cli", r"(?:docker|git|npm|pip|cargo|brew)\s+\w+", _tool_fact, group="tool",
+                   ignore_case=True, hints=("docker", "git", "npm", "pip", "cargo", "brew")),
+    ExtractionRule("file_path", r"(?:Read|Write|Edit|Bash|Glob|Grep):\s*(\S+)", _path_facts,
+                   hints=(":",)),
+    ExtractionRule("error_type", r"(TypeError|ImportError|ValueError|KeyError|AttributeError|"
+                   r"RuntimeError|SyntaxError|NameError|FileNotFoundError|ModuleNotFoundError)",
+                   _error_fact, hints=("error",)),
+)
+
+
+class FactExtractor:
+    """Applies a registry of extraction rules, each compiled once, to single lines.
+
+    A line is case-folded once and each rule's ``hints`` are checked with plain
+    substring tests, so most rules never run their regex on a given line.
+    """
+
+    def __init__(self, rules: Iterable[ExtractionRule] = DEFAULT_RULES) -> None:
+        self._rules: list[ExtractionRule] = []
+        self._compiled: list[tuple[ExtractionRule, re.Pattern]] = []
+        for rule in rules:
+            self.register(rule)
+
+    @property
+    def rules(self) -> list[ExtractionRule]:
+        return list(self._rules)
+
+    def register(self, rule: ExtractionRule) -> None:
+        if any(r.name == rule.name for r in self._rules):
+            raise ValueError(f"Duplicate extraction rule: {rule.name}")
+        compiled = re.compile(rule.pattern, re.IGNORECASE if rule.ignore_case else 0)
+        self._rules.append(rule)
+        self._compiled = self._compiled + [(rule, compiled)]
+
+    def extract(self, line: str) -> list[tuple[str, str]]:
+        """Return the (key, fact) pairs produced by every rule that matches line."""
+        folded = line.casefold()
+        facts: list[tuple[str, str]] = []
+        fired: set[str] = set()
+        for rule, pattern in self._compiled:
+            if rule.group is not None and rule.group in fired:
+                continue
+            if rule.hints and not any(h in folded for h in rule.hints):
+                continue
+            m = pattern.search(line)
+            if m is None:
+                continue
+            if rule.group is not None:
+                fired.add(rule.group)
+            value = m.group(1) if m.lastindex else m.group(0)
+            facts.extend(rule.facts(value.strip()))
+        return facts
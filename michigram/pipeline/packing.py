@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import math
+import time
+from typing import Sequence
+
+# Costs are rounded up to capacity / PACK_RESOLUTION, which bounds the number of
+# partial solutions kept per item without ever overfilling the budget.
+PACK_RESOLUTION = 512
+
+
+def greedy_pack(costs: Sequence[int], capacity: int) -> list[int]:
+    """Take items in index order whenever they still fit."""
+    chosen, left = [], capacity
+    for i, cost in enumerate(costs):
+        if cost <= left:
+            chosen.append(i)
+            left -= cost
+    return chosen
+
+
+def knapsack_pack(costs: Sequence[int], values: Sequence[float], capacity: int,
+                  time_limit: float | None = None) -> list[int]:
+    """Choose item indices of high total value with total cost <= capacity.
+
+    Solves the 0/1 knapsack by dynamic programming over budget slots. Up to
+    PACK_RESOLUTION the slots are single tokens and the result is optimal; above
+    it costs are rounded up to whole slots, so it is an approximation that can
+    miss packings that only fit at exact costs. If ``time_limit`` seconds pass
+    first, the best solution over the items seen so far is used; either way it is
+    then topped up greedily. The result is never worth less than ``greedy_pack``'s.
+    Returns indices in ascending order.
+    """
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    unit = max(1, math.ceil(capacity / PACK_RESOLUTION))
+    slots = capacity // unit
+    # best[c]: the most value reachable in c slots; took[i][c - w]: item i improved best[c].
+    best = [0.0] * (slots + 1)
+    took: list[tuple[int, list[bool]]] = []
+    for i, (cost, value) in enumerate(zip(costs, values)):
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        w = -(-cost // unit)
+        if w > slots or value <= 0:
+            continue
+        grown = [b + value for b in best[:slots + 1 - w]]
+        kept = best[w:]
+        improved = [g > k for g, k in zip(grown, kept)]
+        best[w:] = [g if better else k for g, k, better in zip(grown, kept, improved)]
+        took.append((i, improved))
+
+    chosen = set()
+    c = slots
+    for i, improved in reversed(took):
+        w = -(-costs[i] // unit)
+        if c >= w and improved[c - w]:
+            chosen.add(i)
+            c -= w
+    left = capacity - sum(costs[i] for i in chosen)
+    for i in range(len(costs)):  # unseen items, and slack left by rounding costs up
+        if i not in chosen and costs[i] <= left:
+            chosen.add(i)
+            left -= costs[i]
+
+    greedy = greedy_pack(costs, capacity)
+    if sum(values[i] for i in greedy) > sum(values[i] for i in chosen):
+        return greedy
+    return sorted(chosen)
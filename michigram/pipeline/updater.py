@@ -46,6 +46,7 @@ class ContextUpdater:
             total_tokens=total,
             strategy=strategy,
             excluded_count=fresh.excluded_count,
+            token_budget=token_budget,
         )
 
     def _adaptive_update(self, project: str, token_budget: int,
@@ -76,6 +77,7 @@ class ContextUpdater:
             total_tokens=total,
             strategy=strategy,
             excluded_count=fresh.excluded_count,
+            token_budget=token_budget,
         )
 
     def should_refresh(self, previous: ContextManifest, staleness_threshold: float = 0.5) -> bool:
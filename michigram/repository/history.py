@@ -1,11 +1,168 @@
 from __future__ import annotations
 
-import json
+import hashlib
+import re
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
+from typing import Callable, ContextManager, Iterator
 
 from michigram.afs.namespace import Namespace
 from michigram.afs.node import ContextNode, NodeType, NodeMetadata
-from michigram.core.primitives import now_iso, estimate_tokens, sha256_short
+from michigram.core.primitives import now_iso, estimate_tokens, json_loads
+
+HEAD_CHARS = 2000
+READ_BUFFER = 1 << 20
+
+# Escaped quotes inside string values (tool output) never match, so only real keys count.
+_TYPE_RE = re.compile(rb'"type"\s*:\s*"([^"\\]*)"')
+_ENTRY_TYPES = frozenset({b"summary", b"human", b"assistant", b"result"})
+
+
+def _may_matter(raw: bytes) -> bool:
+    """Cheap pre-filter on the "type" values in a raw line.
+
+    Returns False only for lines SessionDigest.feed would ignore: lines without a
+    used entry type, and user lines made only of tool results.
+    """
+    types = set(_TYPE_RE.findall(raw))
+    if types & _ENTRY_TYPES:
+        return True
+    if b"user" in types:
+        return b"text" in types or b"tool_result" not in types
+    return False
+
+
+def _decode_entry(raw: bytes) -> dict | None:
+    try:
+        entry = json_loads(raw)
+    except ValueError:
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+@dataclass
+class SessionDigest:
+    """Running summary of a session transcript, built one JSONL entry at a time.
+
+    Only the truncated pieces that end up in the history node are kept, so memory
+    stays bounded no matter how large the inlined tool outputs get.
+    """
+
+    session_id: str | None = None
+    summary: str = ""
+    prompts: list[str] = field(default_factory=list)
+    file_ops: list[str] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+    head: str = ""
+    offset: int = 0  # bytes of the transcript consumed so far
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> SessionDigest:
+        return cls(**data)
+
+    def feed_line(self, raw: bytes) -> None:
+        """Consume one raw transcript line.
+
+        At most ``4 * HEAD_CHARS`` bytes are decoded for the head, so the extra memory a
+        line costs is bounded however long it is; lines the type prefilter skips are
+        never decoded in full.
+        """
+        need = HEAD_CHARS - len(self.head)
+        if need > 0:
+            # A UTF-8 character is at most 4 bytes, so 4 * need bytes hold need characters.
+            self.head += raw[:4 * need].decode(errors="replace")[:need]
+        if raw.isspace() or not _may_matter(raw):
+            return
+        entry = _decode_entry(raw)
+        if entry is not None:
+            self.feed(entry)
+
+    def feed(self, entry: dict) -> None:
+        etype = entry.get("type")
+        if etype == "summary":
+            self.summary = entry.get("summary", "")
+            if self.session_id is None:
+                self.session_id = entry.get("session_id", "")
+
+        elif etype in ("human", "user"):
+            msg = entry.get("message", {})
+            content = msg.get("content", [])
+            if isinstance(content, str):
+                self.prompts.append(content[:200])
+            else:
+                for block in content:
+                    if isinstance(block, dict) and block.get("type") == "text":
+                        self.prompts.append(block["text"][:200])
+
+        elif etype == "assistant":
+            msg = entry.get("message", {})
+            for block in msg.get("content", []):
+                if not isinstance(block, dict):
+                    continue
+                if block.get("type") == "tool_use":
+                    name = block.get("name", "")
+                    inp = block.get("input", {})
+                    if name in ("Read", "Write", "Edit"):
+                        fp = inp.get("file_path", "")
+                        self.file_ops.append(f"{name}: {fp}")
+                    elif name in ("Bash", "Glob", "Grep"):
+                        detail = inp.get("command", "") or inp.get("pattern", "")
+                        self.file_ops.append(f"{name}: {detail}")
+                elif block.get("type") == "text":
+                    text = block.get("text", "").strip()
+                    if text and not self.summary:
+                        self.summary = text[:300]
+
+        elif etype == "result" and entry.get("is_error"):
+            self.errors.append(entry.get("content", "")[:200])
+
+    def render(self) -> str:
+        content_parts = []
+        if self.summary:
+            content_parts.append(f"## Summary\n{self.summary}")
+        if self.prompts:
+            content_parts.append("## Prompts\n" + "\n".join(f"- {p}" for p in self.prompts))
+        if self.file_ops:
+            content_parts.append("## File Operations\n" + "\n".join(f"- {op}" for op in self.file_ops))
+        if self.errors:
+            content_parts.append("## Errors\n" + "\n".join(f"- {e}" for e in self.errors))
+        return "\n\n".join(content_parts) if content_parts else self.head
+
+
+def parse_session(jsonl_path: Path, session_id: str | None = None,
+                  digest: SessionDigest | None = None) -> SessionDigest:
+    """Stream a JSONL transcript line by line into a SessionDigest.
+
+    Passing a previous digest resumes from its offset, so only appended lines are
+    parsed. An unterminated last line that is not yet valid JSON is left for the
+    next call. Without an explicit or embedded session id, the id is a hash of the
+    file bytes, computed incrementally alongside parsing.
+    """
+    if digest is None:
+        digest = SessionDigest(session_id=session_id)
+    hasher = hashlib.sha256()
+    with open(jsonl_path, "rb", buffering=READ_BUFFER) as f:
+        f.seek(digest.offset)
+        for raw in f:
+            if digest.session_id is None:
+                hasher.update(raw)  # only needed until an id is known
+            if not raw.endswith(b"\n") and _decode_entry(raw) is None:
+                break  # writer is mid-line
+            digest.feed_line(raw)
+            digest.offset += len(raw)
+    if digest.session_id is None:
+        digest.session_id = hasher.hexdigest()[:12]
+    return digest
+
+
+def resume_session(jsonl_path: Path, digest: SessionDigest | None = None) -> SessionDigest:
+    """Continue parsing from ``digest``; a transcript that shrank is re-parsed under the same id."""
+    if digest is not None and jsonl_path.stat().st_size < digest.offset:
+        digest = SessionDigest(session_id=digest.session_id)
+    return parse_session(jsonl_path, digest=digest)
 
 
 class HistoryRepository:
@@ -13,81 +170,32 @@ class HistoryRepository:
         self._ns = namespace
         self._prefix = prefix
 
+    def batch(self) -> ContextManager[None]:
+        return self._ns.batch()
+
+    def generation(self, project: str) -> int:
+        return self._ns.generation(f"{self._prefix}/{project}")
+
     def _session_path(self, project: str, session_id: str) -> str:
         return f"{self._prefix}/{project}/{session_id}"
 
     def ingest_session(self, jsonl_path: Path, project: str, session_id: str | None = None) -> str:
-        text = jsonl_path.read_text()
-        lines = [line for line in text.strip().split("\n") if line.strip()]
-
-        prompts: list[str] = []
-        file_ops: list[str] = []
-        errors: list[str] = []
-        summary = ""
-
-        for line in lines:
-            try:
-                entry = json.loads(line)
-            except json.JSONDecodeError:
-                continue
-
-            if entry.get("type") == "summary":
-                summary = entry.get("summary", "")
-                if session_id is None:
-                    session_id = entry.get("session_id", "")
-
-            if entry.get("type") in ("human", "user"):
-                msg = entry.get("message", {})
-                content = msg.get("content", [])
-                if isinstance(content, str):
-                    prompts.append(content)
-                else:
-                    for block in content:
-                        if isinstance(block, dict) and block.get("type") == "text":
-                            prompts.append(block["text"])
-
-            if entry.get("type") == "assistant":
-                msg = entry.get("message", {})
-                for block in msg.get("content", []):
-                    if not isinstance(block, dict):
-                        continue
-                    if block.get("type") == "tool_use":
-                        name = block.get("name", "")
-                        inp = block.get("input", {})
-                        if name in ("Read", "Write", "Edit"):
-                            fp = inp.get("file_path", "")
-                            file_ops.append(f"{name}: {fp}")
-                        elif name in ("Bash", "Glob", "Grep"):
-                            detail = inp.get("command", "") or inp.get("pattern", "")
-                            file_ops.append(f"{name}: {detail}")
-                    elif block.get("type") == "text":
-                        text = block.get("text", "").strip()
-                        if text:
-                            summary_lines = text[:300]
-                            if not summary:
-                                summary = summary_lines
-
-            if entry.get("type") == "result" and entry.get("is_error"):
-                errors.append(entry.get("content", "")[:200])
-
-        if session_id is None:
-            session_id = sha256_short(text)
+        digest = parse_session(jsonl_path, session_id)
+        self.write_digest(project, digest)
+        return digest.session_id
 
-        content_parts = []
-        if summary:
-            content_parts.append(f"## Summary\n{summary}")
-        if prompts:
-            content_parts.append("## Prompts\n" + "\n".join(f"- {p[:200]}" for p in prompts))
-        if file_ops:
-            content_parts.append("## File Operations\n" + "\n".join(f"- {op}" for op in file_ops))
-        if errors:
-            content_parts.append("## Errors\n" + "\n".join(f"- {e}" for e in errors))
-
-        content = "\n\n".join(content_parts) if content_parts else text[:2000]
+    def ingest_incremental(self, jsonl_path: Path, project: str,
+                           digest: SessionDigest | None = None) -> SessionDigest:
+        """Parse only what was appended since ``digest`` and rewrite the session node."""
+        digest = resume_session(jsonl_path, digest)
+        self.write_digest(project, digest)
+        return digest
 
+    def write_digest(self, project: str, digest: SessionDigest) -> None:
+        content = digest.render()
         ts = now_iso()
         node = ContextNode(
-            path=self._session_path(project, session_id),
+            path=self._session_path(project, digest.session_id),
             node_type=NodeType.FILE,
             metadata=NodeMetadata(
                 created_at=ts,
@@ -99,10 +207,11 @@ class HistoryRepository:
             content=content,
         )
         self._ns.write(node.path, node)
-        return session_id
 
-    def get_session(self, project: str, session_id: str) -> ContextNode | None:
-        return self._ns.read(self._session_path(project, session_id))
+    def get_session(self, project: str, session_id: str,
+                    include_content: bool = True) -> ContextNode | None:
+        path = self._session_path(project, session_id)
+        return self._ns.read(path) if include_content else self._ns.read_metadata(path)
 
     def list_sessions(self, project: str) -> list[str]:
         try:
@@ -110,11 +219,47 @@ class HistoryRepository:
         except KeyError:
             return []
 
+    def read_path(self, path: str) -> ContextNode | None:
+        """Read a session, with content, by the namespace path it was returned under."""
+        return self._ns.read(path)
+
+    def iter_sessions_by_updated(self, project: str, newest_first: bool = True,
+                                 max_tokens: Callable[[], int] | None = None
+                                 ) -> Iterator[ContextNode]:
+        """Yield a project's sessions without content, by updated_at."""
+        try:
+            yield from self._ns.iter_by_updated(f"{self._prefix}/{project}", newest_first,
+                                                max_tokens)
+        except KeyError:
+            return
+
+    def search_sessions_text(self, project: str, query: str,
+                             limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        """Yield (session without content, BM25 score) for a project's sessions matching query."""
+        try:
+            yield from self._ns.search_text(f"{self._prefix}/{project}", query, limit)
+        except KeyError:
+            return
+
+    def search_sessions_similar(self, project: str, query: str, limit: int | None = None
+                                ) -> Iterator[tuple[ContextNode, float]]:
+        """Yield (session without content, cosine similarity) for a project's sessions, best first."""
+        try:
+            yield from self._ns.search_similar(f"{self._prefix}/{project}", query, limit)
+        except KeyError:
+            return
+
+    def token_stats(self, project: str) -> tuple[int, int]:
+        try:
+            return self._ns.token_stats(f"{self._prefix}/{project}")
+        except KeyError:
+            return 0, 0
+
     def prune(self, project: str, before: str) -> int:
         sessions = self.list_sessions(project)
         pruned = 0
         for sid in sessions:
-            node = self.get_session(project, sid)
+            node = self.get_session(project, sid, include_content=False)
             if node and node.metadata.created_at < before:
                 self._ns.delete(self._session_path(project, sid))
                 pruned += 1
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import threading
+import weakref
 from enum import Enum
+from typing import Callable, ContextManager, Iterator
 
 from michigram.afs.namespace import Namespace
 from michigram.afs.node import ContextNode, NodeType, NodeMetadata
-from michigram.core.primitives import now_iso, estimate_tokens
+from michigram.core.primitives import now_iso, estimate_tokens, sha256_short
 
 
 class MemoryType(Enum):
@@ -19,15 +22,44 @@ class MemoryRepository:
     def __init__(self, namespace: Namespace, prefix: str = "/context/memory") -> None:
         self._ns = namespace
         self._prefix = prefix
+        self._locks: weakref.WeakValueDictionary[str, threading.Lock] = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+
+    def batch(self) -> ContextManager[None]:
+        return self._ns.batch()
+
+    def generation(self, project: str) -> int:
+        return self._ns.generation(f"{self._prefix}/{project}")
 
     def _path(self, project: str, memory_type: MemoryType, key: str) -> str:
         return f"{self._prefix}/{project}/{memory_type.value}/{key}"
 
+    def _path_lock(self, path: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(path)
+            if lock is None:
+                lock = self._locks[path] = threading.Lock()
+            return lock
+
     def store(self, project: str, memory_type: MemoryType, key: str, value: str,
               source: str = "user", tags: list[str] | None = None) -> None:
+        """Write value as the next version of key; concurrent stores of one key are serialized."""
         path = self._path(project, memory_type, key)
-        existing = self._ns.read(path)
+        with self._path_lock(path):
+            self._store(path, value, source, tags or [])
+
+    def _store(self, path: str, value: str, source: str, tags: list[str]) -> None:
+        existing = self._ns.read_metadata(path)
         ts = now_iso()
+        content_hash = sha256_short(value, 16)
+        if existing and self._unchanged(existing, content_hash, value, source, tags):
+            # Same value again: count the sighting instead of writing a new version.
+            extra = existing.metadata.extra
+            existing.metadata.extra = {**extra, "content_hash": content_hash,
+                                       "seen_count": extra.get("seen_count", 1) + 1,
+                                       "last_seen_at": ts}
+            self._ns.write_metadata(path, existing)
+            return
         version = 1
         if existing:
             version = existing.metadata.version + 1
@@ -40,31 +72,83 @@ class MemoryRepository:
                 updated_at=ts,
                 source=source,
                 token_estimate=estimate_tokens(value),
-                tags=tags or [],
+                tags=tags,
                 version=version,
+                extra={"content_hash": content_hash},
             ),
             content=value,
         )
         self._ns.write(path, node)
 
-    def recall(self, project: str, memory_type: MemoryType, key: str) -> ContextNode | None:
-        return self._ns.read(self._path(project, memory_type, key))
+    @staticmethod
+    def _unchanged(existing: ContextNode, content_hash: str, value: str,
+                   source: str, tags: list[str]) -> bool:
+        meta = existing.metadata
+        if meta.source != source or meta.tags != tags:
+            return False
+        if "content_hash" in meta.extra:
+            return meta.extra["content_hash"] == content_hash
+        return existing.load().content == value  # stored before hashes were recorded
+
+    def recall(self, project: str, memory_type: MemoryType, key: str,
+               include_content: bool = True) -> ContextNode | None:
+        path = self._path(project, memory_type, key)
+        return self._ns.read(path) if include_content else self._ns.read_metadata(path)
+
+    def read_path(self, path: str) -> ContextNode | None:
+        """Read a memory, with content, by the namespace path it was returned under."""
+        return self._ns.read(path)
 
-    def recall_all(self, project: str, memory_type: MemoryType) -> list[ContextNode]:
+    def recall_all(self, project: str, memory_type: MemoryType,
+                   include_content: bool = True) -> list[ContextNode]:
         try:
             keys = self._ns.list(f"{self._prefix}/{project}/{memory_type.value}")
         except KeyError:
             return []
         results = []
         for k in keys:
-            node = self.recall(project, memory_type, k)
+            node = self.recall(project, memory_type, k, include_content=include_content)
             if node:
                 results.append(node)
         return results
 
+    def iter_by_updated(self, project: str, memory_type: MemoryType | None = None,
+                        newest_first: bool = True,
+                        max_tokens: Callable[[], int] | None = None) -> Iterator[ContextNode]:
+        """Yield a project's memories (or one type of them) without content, by updated_at."""
+        path = f"{self._prefix}/{project}"
+        if memory_type is not None:
+            path = f"{path}/{memory_type.value}"
+        try:
+            yield from self._ns.iter_by_updated(path, newest_first, max_tokens)
+        except KeyError:
+            return
+
+    def search_text(self, project: str, query: str,
+                    limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        """Yield (memory without content, BM25 score) for a project's memories matching query."""
+        try:
+            yield from self._ns.search_text(f"{self._prefix}/{project}", query, limit)
+        except KeyError:
+            return
+
+    def search_similar(self, project: str, query: str,
+                       limit: int | None = None) -> Iterator[tuple[ContextNode, float]]:
+        """Yield (memory without content, cosine similarity) for a project's memories, best first."""
+        try:
+            yield from self._ns.search_similar(f"{self._prefix}/{project}", query, limit)
+        except KeyError:
+            return
+
+    def token_stats(self, project: str) -> tuple[int, int]:
+        try:
+            return self._ns.token_stats(f"{self._prefix}/{project}")
+        except KeyError:
+            return 0, 0
+
     def update(self, project: str, memory_type: MemoryType, key: str, value: str,
                source: str = "evaluator") -> bool:
-        existing = self.recall(project, memory_type, key)
+        existing = self.recall(project, memory_type, key, include_content=False)
         if existing is None:
             return False
         self.store(project, memory_type, key, value, source=source, tags=existing.metadata.tags)
@@ -98,8 +182,10 @@ class MemoryRepository:
         return {n.path.split("/")[-1]: (n.content or "") for n in nodes}
 
     def search(self, project: str, tags: list[str] | None = None,
-               source: str | None = None, since: str | None = None) -> list[ContextNode]:
+               source: str | None = None, since: str | None = None,
+               include_content: bool = True) -> list[ContextNode]:
         try:
-            return self._ns.search(f"{self._prefix}/{project}", tags=tags, source=source, since=since)
+            return self._ns.search(f"{self._prefix}/{project}", tags=tags, source=source,
+                                   since=since, include_content=include_content)
         except KeyError:
             return []
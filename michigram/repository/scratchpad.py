@@ -85,7 +85,7 @@ class ScratchpadRepository:
         for tid in task_ids:
             notes = self.list_notes(tid)
             for nid in notes:
-                node = self.read(tid, nid)
+                node = self._ns.read_metadata(self._path(tid, nid))
                 if node is None:
                     continue
                 ttl = node.metadata.ttl_seconds
@@ -1,35 +1,63 @@
 from __future__ import annotations
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 
-from michigram.afs.mount import FilesystemMount
+from michigram.afs.mount import CachedMount
 from michigram.afs.namespace import Namespace
 from michigram.core.config import Config, load_config
+from michigram.pipeline.cache import ManifestCache
 from michigram.pipeline.constructor import ContextConstructor
 from michigram.repository.history import HistoryRepository
 from michigram.repository.memory import MemoryRepository, MemoryType
-from michigram.storage.filesystem import FilesystemBackend
+from michigram.storage.factory import build_namespace
 
 
 def _build_stack(config: Config):
-    store_root = config.base_dir / "store"
-    backend = FilesystemBackend(store_root)
-    mount = FilesystemMount(backend)
-    ns = Namespace()
-    ns.mount("/context", mount)
+    ns = build_namespace(config)
     history = HistoryRepository(ns)
     memory = MemoryRepository(ns)
     return ns, history, memory
 
 
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that serves each connection on a bounded pool of worker threads."""
+
+    def __init__(self, server_address, handler_class, workers: int = 8) -> None:
+        super().__init__(server_address, handler_class)
+        self._executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="michigram-http")
+
+    def process_request(self, request, client_address) -> None:
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except ConnectionError:
+            pass  # client went away mid-response
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._executor.shutdown(wait=False)
+
+
 class ContextHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open so hooks can reuse them; every response sets Content-Length.
+    protocol_version = "HTTP/1.1"
     config: Config
     ns: Namespace
     history: HistoryRepository
     memory: MemoryRepository
+    constructor: ContextConstructor
+    manifest_cache: ManifestCache
 
     def _json_response(self, data: dict, status: int = 200) -> None:
         body = json.dumps(data, indent=2).encode()
@@ -45,20 +73,26 @@ class ContextHandler(BaseHTTPRequestHandler):
         params = parse_qs(parsed.query)
 
         if path == "/status":
-            self._json_response({"status": "ok", "base_dir": str(self.config.base_dir)})
+            mount_caches = {prefix: mp.stats() for prefix, mp in self.ns.mounts.items()
+                            if isinstance(mp, CachedMount)}
+            self._json_response({"status": "ok", "base_dir": str(self.config.base_dir),
+                                 "manifest_cache": self.manifest_cache.stats(),
+                                 "mount_caches": mount_caches})
 
         elif path == "/context/inject":
             project = params.get("project", ["default"])[0]
             strategy = params.get("strategy", ["recency"])[0]
             budget = int(params.get("budget", [str(self.config.token_budget)])[0])
-            constructor = ContextConstructor(self.history, self.memory)
-            manifest = constructor.construct(project, budget, strategy)
+            query = params.get("query", [None])[0]
+            manifest = self.constructor.construct(project, budget, strategy, query,
+                                                  tags=params.get("tag"))
             items = []
             for node in manifest.items:
                 items.append({"path": node.path, "content": node.content or "",
                               "tokens": node.metadata.token_estimate})
             self._json_response({"items": items, "total_tokens": manifest.total_tokens,
-                                 "strategy": manifest.strategy, "excluded": manifest.excluded_count})
+                                 "strategy": manifest.strategy, "excluded": manifest.excluded_count,
+                                 "utilization": round(manifest.utilization, 4)})
 
         elif path.startswith("/context/memory/"):
             rest = path[len("/context/memory/"):]
@@ -155,19 +189,27 @@ class ContextHandler(BaseHTTPRequestHandler):
 
 
 def create_server(host: str = "127.0.0.1", port: int = 8420,
-                  config: Config | None = None) -> HTTPServer:
+                  config: Config | None = None, workers: int | None = None) -> HTTPServer:
     if config is None:
         config = load_config()
     ns, history, memory = _build_stack(config)
+    cache = ManifestCache(max_entries=config.manifest_cache_size,
+                          ttl_seconds=config.manifest_cache_ttl_seconds)
+    constructor = ContextConstructor(history, memory, cache=cache,
+                                     pack_time_limit=config.pack_time_limit_ms / 1000,
+                                     pack_pool_size=config.pack_pool_size,
+                                     decay_half_life=config.decay_half_life_hours * 3600)
 
     handler = type("Handler", (ContextHandler,), {
         "config": config, "ns": ns, "history": history, "memory": memory,
+        "constructor": constructor, "manifest_cache": cache,
+        "timeout": config.server_keepalive_seconds,
     })
-    return HTTPServer((host, port), handler)
+    return PooledHTTPServer((host, port), handler, workers=workers or config.server_workers)
 
 
 def run_server(host: str = "127.0.0.1", port: int = 8420,
-               config: Config | None = None) -> None:
-    server = create_server(host, port, config)
+               config: Config | None = None, workers: int | None = None) -> None:
+    server = create_server(host, port, config, workers)
     print(f"Serving on {host}:{port}")
     server.serve_forever()
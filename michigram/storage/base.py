@@ -1,20 +1,117 @@
 from __future__ import annotations
+import contextlib
 from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, ContextManager, Iterable, Iterator
 from michigram.afs.node import ContextNode
 
+if TYPE_CHECKING:
+    from michigram.storage.retention import RetentionPolicy
+
 class StorageBackend(ABC):
     @abstractmethod
     def read(self, rel_path: str) -> ContextNode | None: ...
 
+    def read_metadata(self, rel_path: str) -> ContextNode | None:
+        """Read a node without its content; call ``node.load()`` to fetch it later."""
+        return self.read(rel_path)
+
     @abstractmethod
     def write(self, rel_path: str, node: ContextNode) -> None: ...
 
+    def write_metadata(self, rel_path: str, node: ContextNode) -> None:
+        """Replace an existing node's metadata, keeping its content and recording no version.
+
+        The default falls back to a full write.
+        """
+        node.load()
+        self.write(rel_path, node)
+
+    def batch(self) -> ContextManager[None]:
+        """Group writes and deletes into one transaction. Batches may be nested."""
+        return contextlib.nullcontext()
+
+    def close(self) -> None:
+        """Release any open files or connections. The backend is unusable afterwards."""
+
+    def write_many(self, items: Iterable[tuple[str, ContextNode]]) -> int:
+        count = 0
+        with self.batch():
+            for rel_path, node in items:
+                self.write(rel_path, node)
+                count += 1
+        return count
+
     @abstractmethod
     def list(self, rel_path: str) -> list[str]: ...
 
     @abstractmethod
     def delete(self, rel_path: str) -> bool: ...
 
+    def walk(self, rel_path: str = "") -> Iterator[str]:
+        """Yield the relative path of every node stored under rel_path."""
+        raise NotImplementedError(f"{type(self).__name__} does not support walk()")
+
+    def iter_by_updated(self, rel_path: str, newest_first: bool = True,
+                        max_tokens: Callable[[], int] | None = None) -> Iterator[ContextNode]:
+        """Yield nodes under rel_path without content, ordered by updated_at.
+
+        ``max_tokens``, if given, is an upper bound on token_estimate that may shrink
+        while iterating; nodes above it may be skipped. Backends with an index
+        override this to read lazily; the default sorts a full search and ignores it.
+        """
+        nodes = self.search(rel_path, include_content=False)
+        yield from sorted(nodes, key=lambda n: n.metadata.updated_at, reverse=newest_first)
+
+    def token_stats(self, rel_path: str) -> tuple[int, int]:
+        """Return (node count, smallest token_estimate) under rel_path; (0, 0) if empty."""
+        nodes = self.search(rel_path, include_content=False)
+        return len(nodes), min((n.metadata.token_estimate for n in nodes), default=0)
+
+    def search_text(self, rel_path: str, query: str,
+                    limit: int | None = None) -> list[tuple[str, float]]:
+        """Return (rel_path, BM25 score) for nodes under rel_path matching query, best first."""
+        raise NotImplementedError(f"{type(self).__name__} does not support text search")
+
+    def search_vectors(self, rel_path: str, query: str,
+                       limit: int | None = None) -> Iterator[tuple[str, float]]:
+        """Yield (rel_path, cosine similarity) for nodes under rel_path, most similar to query first."""
+        raise NotImplementedError(f"{type(self).__name__} does not support vector search")
+
+    def get_versions(self, rel_path: str) -> list[int]:
+        return []
+
+    def read_version(self, rel_path: str, version: int) -> ContextNode | None:
+        return None
+
+    def read_version_metadata(self, rel_path: str, version: int) -> ContextNode | None:
+        return self.read_version(rel_path, version)
+
+    def write_version(self, rel_path: str, node: ContextNode) -> None:
+        raise NotImplementedError(f"{type(self).__name__} does not keep version history")
+
+    def delete_version(self, rel_path: str, version: int) -> bool:
+        raise NotImplementedError(f"{type(self).__name__} does not keep version history")
+
+    def prune_versions(self, rel_path: str, policy: RetentionPolicy,
+                       now: datetime | None = None) -> int:
+        """Delete the historical versions of rel_path that policy does not keep. Returns count."""
+        with self.batch():
+            versions = self.get_versions(rel_path)
+            if policy.uses_age:
+                stamped = []
+                for v in versions:
+                    node = self.read_version_metadata(rel_path, v)
+                    if node is not None:
+                        stamped.append((v, node.metadata.updated_at))
+            else:
+                stamped = [(v, "") for v in versions]
+            drops = policy.select_drops(stamped, now=now)
+            for v in drops:
+                self.delete_version(rel_path, v)
+        return len(drops)
+
     @abstractmethod
     def search(self, rel_path: str, tags: list[str] | None = None,
-               source: str | None = None, since: str | None = None) -> list[ContextNode]: ...
+               source: str | None = None, since: str | None = None,
+               include_content: bool = True) -> list[ContextNode]: ...
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from difflib import SequenceMatcher
+
+
+def make_delta(base: str, target: str) -> list:
+    """Encode target against base, line by line.
+
+    Each op is either [start, end], copying base lines[start:end], or a string
+    inserted verbatim.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops: list = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, base_lines, target_lines).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:  # replace / insert; deletions need no op
+            ops.append("".join(target_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(base: str, delta: list) -> str:
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return "".join(parts)
+
+
+def delta_size(delta: list) -> int:
+    """Approximate stored size: inserted characters plus a few bytes per copy op."""
+    return sum(len(op) if isinstance(op, str) else 12 for op in delta)
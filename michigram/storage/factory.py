@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from michigram.afs.mount import CachedMount, FilesystemMount
+from michigram.afs.namespace import Namespace
+from michigram.core.config import Config
+from michigram.storage.base import StorageBackend
+from michigram.storage.retention import RetentionPolicy
+from michigram.storage.vectors import get_embedder
+
+BACKENDS = ("filesystem", "sqlite")
+
+
+def create_backend(config: Config, name: str | None = None) -> StorageBackend:
+    """Open the storage backend named by ``name`` (default: ``config.default_backend``)."""
+    name = name or config.default_backend
+    retention = RetentionPolicy.from_dict(config.version_retention)
+    embedder = get_embedder(config.embedding, config.embedding_dim) if config.embedding else None
+    if name == "filesystem":
+        from michigram.storage.filesystem import FilesystemBackend
+        return FilesystemBackend(config.base_dir / "store", retention=retention,
+                                 content_addressed=config.content_addressed, embedder=embedder)
+    if name == "sqlite":
+        from michigram.storage.sqlite import SqliteBackend
+        return SqliteBackend(
+            config.base_dir / "store.db",
+            journal_mode=config.sqlite_journal_mode,
+            synchronous=config.sqlite_synchronous,
+            pool_size=config.sqlite_pool_size,
+            retention=retention,
+            content_addressed=config.content_addressed,
+            embedder=embedder,
+        )
+    raise KeyError(f"Unknown backend: {name}. Available: {list(BACKENDS)}")
+
+
+def build_namespace(config: Config, backend: StorageBackend | None = None) -> Namespace:
+    """Mount the store at /context, plus a CachedMount for each prefix in ``config.mount_cache``."""
+    if backend is None:
+        backend = create_backend(config)
+    ns = Namespace()
+    ns.mount("/context", FilesystemMount(backend))
+    for prefix, options in config.mount_cache.items():
+        prefix = "/" + prefix.strip("/")
+        if prefix != "/context" and not prefix.startswith("/context/"):
+            raise ValueError(f"Cached mount prefix must be under /context: {prefix}")
+        root = prefix[len("/context"):].strip("/")
+        ns.mount(prefix, CachedMount(FilesystemMount(backend, root=root), **options))
+    return ns
@@ -1,14 +1,81 @@
 from __future__ import annotations
+import contextlib
+import functools
 import json
+import os
+import threading
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator
 from michigram.afs.node import ContextNode, NodeType, NodeMetadata, node_to_dict, node_from_dict
-from michigram.core.primitives import atomic_write
+from michigram.core.primitives import atomic_write, sha256_short
 from michigram.storage.base import StorageBackend
+from michigram.storage.delta import apply_delta, delta_size, make_delta
+from michigram.storage.index import MetadataIndex
+from michigram.storage.vectors import VectorIndex
+
+if TYPE_CHECKING:
+    from michigram.storage.retention import RetentionPolicy
+    from michigram.storage.vectors import Embedder
+
+INDEX_FILENAME = ".index.db"
+BLOBS_DIRNAME = ".blobs"
+VECTORS_DIRNAME = ".vectors"
+# Every Nth version is stored in full, so reading any version applies at most N-1 deltas.
+SNAPSHOT_INTERVAL = 16
+
+def _meta_dict(node: ContextNode, blob: str | None = None) -> dict:
+    meta = {
+        "path": node.path,
+        "node_type": node.node_type.value,
+        "created_at": node.metadata.created_at,
+        "updated_at": node.metadata.updated_at,
+        "source": node.metadata.source,
+        "content_type": node.metadata.content_type,
+        "token_estimate": node.metadata.token_estimate,
+        "tags": node.metadata.tags,
+        "ttl_seconds": node.metadata.ttl_seconds,
+        "version": node.metadata.version,
+        "extra": node.metadata.extra,
+    }
+    if blob is not None:
+        meta["blob"] = blob
+    return meta
+
+def _read_text(path: Path) -> str | None:
+    try:
+        return path.read_text()
+    except FileNotFoundError:
+        return None
+
+def _stored_blob(mp: Path) -> str | None:
+    """The content blob a .meta.json file refers to, if any."""
+    text = _read_text(mp)
+    return json.loads(text).get("blob") if text is not None else None
 
 class FilesystemBackend(StorageBackend):
-    def __init__(self, root: Path) -> None:
+    """Stores each node as a content file plus a ``.meta.json`` file.
+
+    With ``content_addressed`` set, new content goes to ``.blobs/`` keyed by its
+    SHA-256 instead, and the meta file records the hash. Identical content is then
+    stored once, however many nodes and versions share it; blob reference counts
+    live in the index and a blob is removed when its last reference goes.
+
+    Given an ``embedder``, node content is also embedded on write into a
+    VectorIndex under ``.vectors/`` for ``search_vectors``.
+    """
+
+    def __init__(self, root: Path, retention: RetentionPolicy | None = None,
+                 content_addressed: bool = False, embedder: Embedder | None = None) -> None:
         self._root = root
+        self._retention = retention if retention is not None and retention.enabled else None
+        self._content_addressed = content_addressed
+        # Held across each read-modify-write of a node, its version chain and its blobs.
+        self._write_lock = threading.RLock()
         self._root.mkdir(parents=True, exist_ok=True)
+        self._index = MetadataIndex(self._root / INDEX_FILENAME)
+        self._vectors = VectorIndex(self._root / VECTORS_DIRNAME, embedder) if embedder else None
+        if self._index.created or (self._vectors is not None and self._vectors.created):
+            self.rebuild_index()
 
     def _content_path(self, rel_path: str) -> Path:
         return self._root / rel_path
@@ -16,13 +83,10 @@ class FilesystemBackend(StorageBackend):
     def _meta_path(self, rel_path: str) -> Path:
         return self._root / f"{rel_path}.meta.json"
 
-    def read(self, rel_path: str) -> ContextNode | None:
-        cp = self._content_path(rel_path)
-        mp = self._meta_path(rel_path)
+    def _load(self, rel_path: str, mp: Path, cp: Path, include_content: bool) -> ContextNode | None:
         if not mp.exists():
             return None
         meta_data = json.loads(mp.read_text())
-        content = cp.read_text() if cp.exists() else None
         meta = NodeMetadata(
             created_at=meta_data["created_at"],
             updated_at=meta_data["updated_at"],
@@ -36,55 +100,161 @@ class FilesystemBackend(StorageBackend):
         )
         node_type = NodeType(meta_data.get("node_type", "file"))
         path_str = meta_data.get("path", rel_path)
-        return ContextNode(path=path_str, node_type=node_type, metadata=meta, content=content)
+        node = ContextNode(path=path_str, node_type=node_type, metadata=meta)
+        if "blob" in meta_data:
+            cp = self._blob_path(meta_data["blob"])
+        if include_content:
+            node.content = _read_text(cp)
+        else:
+            node.loader = functools.partial(_read_text, cp)
+        return node
+
+    def read(self, rel_path: str) -> ContextNode | None:
+        return self._load(rel_path, self._meta_path(rel_path), self._content_path(rel_path), True)
+
+    def read_metadata(self, rel_path: str) -> ContextNode | None:
+        return self._load(rel_path, self._meta_path(rel_path), self._content_path(rel_path), False)
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator[None]:
+        # Node files are written atomically one by one; only index updates are grouped.
+        with self._index.batch():
+            if self._vectors is None:
+                yield
+                return
+            with self._vectors.batch():
+                yield
 
     def _version_dir(self, rel_path: str) -> Path:
         return self._root / ".versions" / rel_path
 
+    def _blob_path(self, digest: str) -> Path:
+        return self._root / BLOBS_DIRNAME / digest[:2] / digest
+
+    def _store_content(self, cp: Path, content: str | None) -> str | None:
+        """Write content for the node file cp, returning the blob hash when it went to a blob."""
+        if content is None or not self._content_addressed:
+            if content is not None:
+                atomic_write(cp, content)
+            return None
+        digest = sha256_short(content, 64)
+        self._index.retain_blob(digest)
+        bp = self._blob_path(digest)
+        if not bp.exists():
+            atomic_write(bp, content)
+        cp.unlink(missing_ok=True)
+        return digest
+
+    def _release_blob(self, digest: str | None) -> None:
+        if digest is not None and self._index.release_blob(digest) <= 0:
+            self._blob_path(digest).unlink(missing_ok=True)
+
     def write(self, rel_path: str, node: ContextNode) -> None:
-        cp = self._content_path(rel_path)
-        mp = self._meta_path(rel_path)
+        with self._write_lock:
+            node.load()
+            cp = self._content_path(rel_path)
+            mp = self._meta_path(rel_path)
 
-        existing = self.read(rel_path)
-        if existing is not None:
+            old_blob = _stored_blob(mp)
+            existing = self.read(rel_path)
+            if existing is not None:
+                self._store_version(rel_path, existing, node)
+
+            cp.parent.mkdir(parents=True, exist_ok=True)
+            blob = self._store_content(cp, node.content)
+            atomic_write(mp, json.dumps(_meta_dict(node, blob), indent=2))
+            self._release_blob(old_blob)
+            # Only now: the version just stored may be a delta against the node written above.
+            if existing is not None and self._retention is not None:
+                self.prune_versions(rel_path, self._retention)
+            with self._index.batch():
+                self._index.upsert(rel_path, node)
+                self._index.index_text(rel_path, node.content)
+            if self._vectors is not None:
+                self._vectors.add(rel_path, node.content)
+
+    def write_metadata(self, rel_path: str, node: ContextNode) -> None:
+        with self._write_lock:
+            mp = self._meta_path(rel_path)
+            if not mp.exists():
+                raise KeyError(f"No node at {rel_path}")
+            atomic_write(mp, json.dumps(_meta_dict(node, _stored_blob(mp)), indent=2))
+            self._index.upsert(rel_path, node)
+
+    def write_version(self, rel_path: str, node: ContextNode) -> None:
+        """Store node as historical version ``node.metadata.version`` without touching the live node."""
+        with self._write_lock:
+            node.load()
             vdir = self._version_dir(rel_path)
             vdir.mkdir(parents=True, exist_ok=True)
-            old_ver = existing.metadata.version
-            if existing.content is not None:
-                atomic_write(vdir / f"v{old_ver}", existing.content)
-            atomic_write(vdir / f"v{old_ver}.meta.json", json.dumps({
-                "path": existing.path,
-                "node_type": existing.node_type.value,
-                "created_at": existing.metadata.created_at,
-                "updated_at": existing.metadata.updated_at,
-                "source": existing.metadata.source,
-                "content_type": existing.metadata.content_type,
-                "token_estimate": existing.metadata.token_estimate,
-                "tags": existing.metadata.tags,
-                "ttl_seconds": existing.metadata.ttl_seconds,
-                "version": existing.metadata.version,
-                "extra": existing.metadata.extra,
-            }, indent=2))
-
-        cp.parent.mkdir(parents=True, exist_ok=True)
-
-        if node.content is not None:
-            atomic_write(cp, node.content)
-
-        meta_dict = {
-            "path": node.path,
-            "node_type": node.node_type.value,
-            "created_at": node.metadata.created_at,
-            "updated_at": node.metadata.updated_at,
-            "source": node.metadata.source,
-            "content_type": node.metadata.content_type,
-            "token_estimate": node.metadata.token_estimate,
-            "tags": node.metadata.tags,
-            "ttl_seconds": node.metadata.ttl_seconds,
-            "version": node.metadata.version,
-            "extra": node.metadata.extra,
-        }
-        atomic_write(mp, json.dumps(meta_dict, indent=2))
+            ver = node.metadata.version
+            vmp = vdir / f"v{ver}.meta.json"
+            old_blob = _stored_blob(vmp)
+            (vdir / f"v{ver}.delta").unlink(missing_ok=True)
+            blob = self._store_content(vdir / f"v{ver}", node.content)
+            if node.content is None:
+                (vdir / f"v{ver}").unlink(missing_ok=True)
+            atomic_write(vmp, json.dumps(_meta_dict(node, blob), indent=2))
+            self._release_blob(old_blob)
+
+    def _store_version(self, rel_path: str, old: ContextNode, new: ContextNode) -> None:
+        """Keep the outgoing live node ``old`` as a reverse delta against its replacement ``new``.
+
+        Falls back to a full copy every SNAPSHOT_INTERVAL versions, when either side
+        has no content, when ``new`` does not advance the version, or when the delta
+        would not be much smaller than the content.
+        """
+        ver = old.metadata.version
+        if (old.content is None or new.content is None or new.metadata.version <= ver
+                or ver % SNAPSHOT_INTERVAL == 0):
+            self.write_version(rel_path, old)
+            return
+        ops = make_delta(new.content, old.content)
+        if delta_size(ops) * 2 > len(old.content):
+            self.write_version(rel_path, old)
+            return
+        vdir = self._version_dir(rel_path)
+        vdir.mkdir(parents=True, exist_ok=True)
+        vmp = vdir / f"v{ver}.meta.json"
+        old_blob = _stored_blob(vmp)
+        self._write_version_delta(vdir, ver, {"base": new.metadata.version,
+                                              "base_hash": sha256_short(new.content, 16),
+                                              "ops": ops})
+        atomic_write(vmp, json.dumps(_meta_dict(old), indent=2))
+        self._release_blob(old_blob)
+
+    @staticmethod
+    def _write_version_delta(vdir: Path, version: int, record: dict) -> None:
+        atomic_write(vdir / f"v{version}.delta", json.dumps(record, separators=(",", ":")))
+        (vdir / f"v{version}").unlink(missing_ok=True)
+
+    def _read_delta(self, rel_path: str, version: int) -> dict | None:
+        text = _read_text(self._version_dir(rel_path) / f"v{version}.delta")
+        return json.loads(text) if text is not None else None
+
+    def _version_content(self, rel_path: str, version: int,
+                         live: ContextNode | None = None) -> str | None:
+        record = self._read_delta(rel_path, version)
+        if record is None:
+            vdir = self._version_dir(rel_path)
+            blob = _stored_blob(vdir / f"v{version}.meta.json")
+            return _read_text(self._blob_path(blob) if blob else vdir / f"v{version}")
+        if live is None:
+            live = self.read(rel_path)
+        base = self._delta_base(rel_path, record, live)
+        return apply_delta(base, record["ops"])
+
+    def _delta_base(self, rel_path: str, record: dict, live: ContextNode | None) -> str:
+        """Content of the version a delta was taken against: the live node, or an older copy of it."""
+        if (live is not None and live.metadata.version == record["base"]
+                and live.content is not None
+                and sha256_short(live.content, 16) == record["base_hash"]):
+            return live.content
+        base = self._version_content(rel_path, record["base"], live)
+        if base is None or sha256_short(base, 16) != record["base_hash"]:
+            raise ValueError(f"Broken version chain for {rel_path}: "
+                             f"v{record['base']} is missing or changed")
+        return base
 
     def get_versions(self, rel_path: str) -> list[int]:
         vdir = self._version_dir(rel_path)
@@ -92,79 +262,193 @@ class FilesystemBackend(StorageBackend):
             return []
         versions = []
         for f in vdir.iterdir():
-            if f.suffix == ".json":
-                continue
-            if f.name.startswith("v") and not f.name.endswith(".tmp"):
+            if f.name.startswith("v") and f.name.endswith(".meta.json"):
                 try:
-                    versions.append(int(f.name[1:]))
+                    versions.append(int(f.name[1:-len(".meta.json")]))
                 except ValueError:
                     continue
         return sorted(versions)
 
     def read_version(self, rel_path: str, version: int) -> ContextNode | None:
+        node = self.read_version_metadata(rel_path, version)
+        return node.load() if node is not None else None
+
+    def read_version_metadata(self, rel_path: str, version: int) -> ContextNode | None:
         vdir = self._version_dir(rel_path)
-        content_file = vdir / f"v{version}"
-        meta_file = vdir / f"v{version}.meta.json"
-        if not meta_file.exists():
-            return None
-        meta_data = json.loads(meta_file.read_text())
-        content = content_file.read_text() if content_file.exists() else None
-        meta = NodeMetadata(
-            created_at=meta_data["created_at"],
-            updated_at=meta_data["updated_at"],
-            source=meta_data.get("source", ""),
-            content_type=meta_data.get("content_type", "text/plain"),
-            token_estimate=meta_data.get("token_estimate", 0),
-            tags=meta_data.get("tags", []),
-            ttl_seconds=meta_data.get("ttl_seconds"),
-            version=meta_data.get("version", 1),
-            extra=meta_data.get("extra", {}),
-        )
-        node_type = NodeType(meta_data.get("node_type", "file"))
-        path_str = meta_data.get("path", rel_path)
-        return ContextNode(path=path_str, node_type=node_type, metadata=meta, content=content)
+        node = self._load(rel_path, vdir / f"v{version}.meta.json", vdir / f"v{version}", False)
+        if node is not None:
+            node.loader = functools.partial(self._version_content, rel_path, version)
+        return node
+
+    def delete_version(self, rel_path: str, version: int) -> bool:
+        with self._write_lock:
+            vdir = self._version_dir(rel_path)
+            older = [v for v in self.get_versions(rel_path) if v < version]
+            if older:
+                self._rebase_dependent(rel_path, older[-1], version)
+            self._release_blob(_stored_blob(vdir / f"v{version}.meta.json"))
+            deleted = False
+            for p in (vdir / f"v{version}", vdir / f"v{version}.delta",
+                      vdir / f"v{version}.meta.json"):
+                try:
+                    p.unlink()
+                    deleted = True
+                except FileNotFoundError:
+                    pass
+            try:
+                vdir.rmdir()  # only succeeds once the last version is gone
+            except OSError:
+                pass
+            return deleted
+
+    def _rebase_dependent(self, rel_path: str, version: int, base: int) -> None:
+        """Re-encode ``version`` so it no longer depends on ``base``, which is about to go."""
+        record = self._read_delta(rel_path, version)
+        if record is None or record["base"] != base:
+            return
+        base_record = self._read_delta(rel_path, base)
+        if base_record is None:
+            self.write_version(rel_path, self.read_version(rel_path, version))
+            return
+        live = self.read(rel_path)
+        content = self._version_content(rel_path, version, live)
+        new_base = self._delta_base(rel_path, base_record, live)
+        self._write_version_delta(self._version_dir(rel_path), version, {"base": base_record["base"],
+                                                  "base_hash": base_record["base_hash"],
+                                                  "ops": make_delta(new_base, content)})
 
     def list(self, rel_path: str) -> list[str]:
         target = self._root / rel_path if rel_path else self._root
         if not target.exists() or not target.is_dir():
             return []
-        results = []
-        for item in sorted(target.iterdir()):
-            if item.name.endswith(".meta.json"):
+        names = set()
+        for item in target.iterdir():
+            if item.name.startswith("."):
                 continue
-            results.append(item.name)
-        return results
+            # Content-addressed nodes have only a meta file next to them.
+            name = item.name
+            names.add(name[:-len(".meta.json")] if name.endswith(".meta.json") else name)
+        return sorted(names)
 
     def delete(self, rel_path: str) -> bool:
-        cp = self._content_path(rel_path)
-        mp = self._meta_path(rel_path)
-        deleted = False
-        if cp.exists():
-            cp.unlink()
-            deleted = True
-        if mp.exists():
-            mp.unlink()
-            deleted = True
-        return deleted
+        with self._write_lock:
+            cp = self._content_path(rel_path)
+            mp = self._meta_path(rel_path)
+            versions = self.get_versions(rel_path)
+            if versions and self._read_delta(rel_path, versions[-1]) is not None:
+                # The newest version may be a delta against the live content being removed.
+                self.write_version(rel_path, self.read_version(rel_path, versions[-1]))
+            self._release_blob(_stored_blob(mp))
+            deleted = False
+            if cp.exists():
+                cp.unlink()
+                deleted = True
+            if mp.exists():
+                mp.unlink()
+                deleted = True
+            self._index.remove(rel_path)
+            if self._vectors is not None:
+                self._vectors.remove(rel_path)
+            return deleted
 
     def search(self, rel_path: str, tags: list[str] | None = None,
-               source: str | None = None, since: str | None = None) -> list[ContextNode]:
-        target = self._root / rel_path if rel_path else self._root
-        if not target.exists():
-            return []
+               source: str | None = None, since: str | None = None,
+               include_content: bool = True) -> list[ContextNode]:
         results = []
-        meta_files = sorted(target.rglob("*.meta.json"))
-        for mf in meta_files:
-            rel = str(mf.relative_to(self._root))
-            content_rel = rel[:-len(".meta.json")]
-            node = self.read(content_rel)
-            if node is None:
-                continue
-            if tags and not set(tags).issubset(set(node.metadata.tags)):
-                continue
-            if source and node.metadata.source != source:
+        for rel in self._index.query(rel_path, tags=tags, source=source, since=since):
+            node = self.read(rel) if include_content else self.read_metadata(rel)
+            if node is not None:
+                results.append(node)
+        return results
+
+    def iter_by_updated(self, rel_path: str, newest_first: bool = True,
+                        max_tokens: Callable[[], int] | None = None) -> Iterator[ContextNode]:
+        for rel in self._index.iter_by_updated(rel_path, newest_first, max_tokens):
+            node = self.read_metadata(rel)
+            if node is not None:
+                yield node
+
+    def token_stats(self, rel_path: str) -> tuple[int, int]:
+        return self._index.token_stats(rel_path)
+
+    def search_text(self, rel_path: str, query: str,
+                    limit: int | None = None) -> list[tuple[str, float]]:
+        return self._index.search_text(rel_path, query, limit)
+
+    def search_vectors(self, rel_path: str, query: str,
+                       limit: int | None = None) -> Iterator[tuple[str, float]]:
+        if self._vectors is None:
+            raise NotImplementedError(f"{type(self).__name__} was opened without an embedder")
+        return self._vectors.search(rel_path, query, limit)
+
+    def walk(self, rel_path: str = "") -> Iterator[str]:
+        """Yield the relative path of every live node under rel_path, skipping hidden dirs like .versions."""
+        top = self._root / rel_path if rel_path else self._root
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            for name in sorted(filenames):
+                if name.endswith(".meta.json") and not name.startswith("."):
+                    full = Path(dirpath) / name
+                    yield full.relative_to(self._root).as_posix()[:-len(".meta.json")]
+
+    def _scan(self) -> Iterator[tuple[str, ContextNode]]:
+        for rel in self.walk():
+            try:
+                node = self.read_metadata(rel)
+            except (OSError, ValueError, KeyError):
                 continue
-            if since and node.metadata.updated_at < since:
+            if node is not None:
+                yield rel, node
+
+    def rebuild_index(self) -> int:
+        """Rebuild the metadata index, blob reference counts and vectors from the files on disk.
+
+        Returns node count.
+        """
+        self._index.rebuild_blob_refs(self._count_blob_refs())
+        if self._vectors is not None:
+            self._vectors.rebuild((rel, node.load().content) for rel, node in self._scan())
+        return self._index.rebuild(self._scan())
+
+    def _count_blob_refs(self) -> dict[str, int]:
+        counts: dict[str, int] = {}
+        for dirpath, dirnames, filenames in os.walk(self._root):
+            dirnames[:] = [d for d in dirnames if d != BLOBS_DIRNAME]
+            for name in filenames:
+                if name.endswith(".meta.json"):
+                    try:
+                        blob = _stored_blob(Path(dirpath) / name)
+                    except ValueError:
+                        continue
+                    if blob is not None:
+                        counts[blob] = counts.get(blob, 0) + 1
+        return counts
+
+    def check_index(self) -> dict[str, list[str]]:
+        """Compare the index with the files on disk.
+
+        Returns paths that are on disk but not indexed ("missing"), indexed but gone
+        from disk ("stale"), or indexed with different metadata ("mismatched").
+        """
+        indexed = self._index.entries()
+        report: dict[str, list[str]] = {"missing": [], "stale": [], "mismatched": []}
+        seen = set()
+        for rel, node in self._scan():
+            seen.add(rel)
+            entry = indexed.get(rel)
+            if entry is None:
+                report["missing"].append(rel)
                 continue
-            results.append(node)
-        return results
+            meta = node.metadata
+            if (entry["source"] != meta.source or entry["created_at"] != meta.created_at
+                    or entry["updated_at"] != meta.updated_at
+                    or entry["token_estimate"] != meta.token_estimate
+                    or entry["tags"] != meta.tags):
+                report["mismatched"].append(rel)
+        report["stale"] = sorted(set(indexed) - seen)
+        return report
+
+    def close(self) -> None:
+        self._index.close()
+        if self._vectors is not None:
+            self._vectors.close()
@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import heapq
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from michigram.afs.node import ContextNode
+from michigram.storage import lexical
+
+
+def prefix_bounds(rel_path: str) -> tuple[str, str] | None:
+    """Return the [low, high) key range covering every path strictly under rel_path."""
+    if not rel_path:
+        return None
+    # "0" is the character right after "/", so the range excludes siblings like "foo-bar".
+    return f"{rel_path}/", f"{rel_path}0"
+
+
+def parent_of(rel_path: str) -> str:
+    """The directory part of rel_path; stored per row so a directory is one index range."""
+    return rel_path.rpartition("/")[0]
+
+
+# Nodes per directory, so a project's directories and node count take a row each.
+DIR_COUNTS_DDL = (
+    "CREATE TABLE IF NOT EXISTS dir_counts ("
+    "  parent TEXT PRIMARY KEY,"
+    "  nodes INTEGER NOT NULL"
+    ");"
+)
+
+# Runs one query and returns all its rows; lets backends with different connection
+# handling share the queries below.
+Query = Callable[[str, list], list]
+
+
+def count_node(conn: sqlite3.Connection, rel_path: str, delta: int) -> None:
+    """Record that a node at rel_path was added (delta 1) or removed (delta -1)."""
+    conn.execute(
+        "INSERT INTO dir_counts (parent, nodes) VALUES (?, ?)"
+        " ON CONFLICT(parent) DO UPDATE SET nodes = nodes + excluded.nodes",
+        (parent_of(rel_path), delta),
+    )
+
+
+def _dirs(run: Query, rel_path: str) -> list[tuple[str, int]]:
+    """(parent, node count) of the non-empty directories at or under rel_path."""
+    bounds = prefix_bounds(rel_path)
+    if bounds is None:
+        return run("SELECT parent, nodes FROM dir_counts WHERE nodes > 0", [])
+    return run("SELECT parent, nodes FROM dir_counts WHERE nodes > 0"
+               " AND (parent = ? OR (parent >= ? AND parent < ?))", [rel_path, *bounds])
+
+
+def dir_token_stats(run: Query, table: str, rel_path: str) -> tuple[int, int]:
+    """Return (node count, smallest token_estimate) under rel_path; (0, 0) if empty.
+
+    table needs an index on (parent, token_estimate): each directory costs one seek.
+    """
+    dirs = _dirs(run, rel_path)
+    smallest = [run(f"SELECT MIN(token_estimate) FROM {table} WHERE parent = ?", [parent])[0][0]
+                for parent, _ in dirs]
+    return sum(n for _, n in dirs), min((m for m in smallest if m is not None), default=0)
+
+
+def _pages(run: Query, table: str, parent: str, newest_first: bool,
+           max_tokens: Callable[[], int] | None, page_size: int) -> Iterator[tuple[str, str]]:
+    order, cmp = ("DESC", "<") if newest_first else ("ASC", ">")
+    after: tuple[str, str] | None = None
+    while True:
+        clauses, params = ["parent = ?"], [parent]
+        if after is not None:
+            clauses.append(f"(updated_at, path) {cmp} (?, ?)")
+            params.extend(after)
+        if max_tokens is not None:
+            clauses.append("token_estimate <= ?")
+            params.append(max_tokens())
+        rows = run(f"SELECT updated_at, path FROM {table} WHERE {' AND '.join(clauses)}"
+                   f" ORDER BY updated_at {order}, path {order} LIMIT ?", params + [page_size])
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1]
+        page_size = min(page_size * 2, 1024)
+
+
+def iter_updated_keys(run: Query, table: str, rel_path: str, newest_first: bool = True,
+                      max_tokens: Callable[[], int] | None = None,
+                      page_size: int = 64) -> Iterator[tuple[str, str]]:
+    """Yield (updated_at, path) for the rows of table under rel_path, ordered (ties by path).
+
+    table needs ``parent``, ``updated_at``, ``path`` and ``token_estimate`` columns
+    indexed in that order. Each directory is read page by page as a range of that
+    index, so the cost depends on how much is consumed, not on how many rows there
+    are, and the directories' streams are merged. ``max_tokens`` is called before
+    each page; rows with a larger token_estimate are left out of it.
+    """
+    streams = [_pages(run, table, parent, newest_first, max_tokens, page_size)
+               for parent, _ in _dirs(run, rel_path)]
+    return heapq.merge(*streams, reverse=newest_first)
+
+
+class MetadataIndex:
+    """Secondary index of node metadata, stored in SQLite next to a FilesystemBackend.
+
+    The index is derived data: it can always be rebuilt from the ``*.meta.json`` files.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self._db_path = db_path
+        self._lock = threading.RLock()
+        self._local = threading.local()  # batch depth is per thread
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        tables = {name for (name,) in self._conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )}
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        if columns and "parent" not in columns:
+            self._conn.execute("DROP TABLE entries")
+            columns = set()
+        # An index from before the text tables or parent column existed needs a rebuild.
+        self.created = not columns or not {"text_docs", "dir_counts"} <= tables
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "  path TEXT PRIMARY KEY,"
+            "  parent TEXT NOT NULL,"
+            "  source TEXT NOT NULL,"
+            "  created_at TEXT NOT NULL,"
+            "  updated_at TEXT NOT NULL,"
+            "  token_estimate INTEGER NOT NULL,"
+            "  tags TEXT NOT NULL"
+            ");"
+            "CREATE TABLE IF NOT EXISTS tags ("
+            "  path TEXT NOT NULL,"
+            "  tag TEXT NOT NULL,"
+            "  PRIMARY KEY (tag, path)"
+            ");"
+            "CREATE TABLE IF NOT EXISTS blob_refs ("
+            "  hash TEXT PRIMARY KEY,"
+            "  refs INTEGER NOT NULL"
+            ");"
+            "CREATE INDEX IF NOT EXISTS idx_entries_source ON entries (source);"
+            "CREATE INDEX IF NOT EXISTS idx_entries_updated ON entries (updated_at);"
+            "CREATE INDEX IF NOT EXISTS idx_entries_parent_updated"
+            "  ON entries (parent, updated_at, path, token_estimate);"
+            "CREATE INDEX IF NOT EXISTS idx_entries_parent_tokens ON entries (parent, token_estimate);"
+            "CREATE INDEX IF NOT EXISTS idx_tags_path ON tags (path);"
+            + DIR_COUNTS_DDL + lexical.LEXICAL_DDL
+        )
+        self._conn.commit()
+
+    def _upsert(self, rel_path: str, node: ContextNode) -> None:
+        meta = node.metadata
+        if self._conn.execute("SELECT 1 FROM entries WHERE path = ?", (rel_path,)).fetchone() is None:
+            count_node(self._conn, rel_path, 1)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries"
+            " (path, parent, source, created_at, updated_at, token_estimate, tags)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (rel_path, parent_of(rel_path), meta.source, meta.created_at, meta.updated_at,
+             meta.token_estimate, json.dumps(meta.tags)),
+        )
+        self._conn.execute("DELETE FROM tags WHERE path = ?", (rel_path,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO tags (path, tag) VALUES (?, ?)",
+            [(rel_path, t) for t in meta.tags],
+        )
+
+    @property
+    def _batch_depth(self) -> int:
+        return getattr(self._local, "batch_depth", 0)
+
+    def _commit(self) -> None:
+        if self._batch_depth == 0:
+            self._conn.commit()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Defer this thread's commits until its outermost batch exits.
+
+        Other threads keep committing their own changes meanwhile; the connection
+        is shared, so such a commit also makes a batch's earlier changes durable.
+        """
+        self._local.batch_depth = self._batch_depth + 1
+        try:
+            yield
+        finally:
+            self._local.batch_depth -= 1
+            with self._lock:
+                self._commit()
+
+    def upsert(self, rel_path: str, node: ContextNode) -> None:
+        with self._lock:
+            self._upsert(rel_path, node)
+            self._commit()
+
+    def remove(self, rel_path: str) -> None:
+        with self._lock:
+            if self._conn.execute("DELETE FROM entries WHERE path = ?", (rel_path,)).rowcount:
+                count_node(self._conn, rel_path, -1)
+            self._conn.execute("DELETE FROM tags WHERE path = ?", (rel_path,))
+            lexical.unindex_text(self._conn, rel_path)
+            self._commit()
+
+    def index_text(self, rel_path: str, text: str | None) -> None:
+        with self._lock:
+            lexical.index_text(self._conn, rel_path, text)
+            self._commit()
+
+    def search_text(self, rel_path: str, query: str,
+                    limit: int | None = None) -> list[tuple[str, float]]:
+        with self._lock:
+            return lexical.search_text(self._conn, rel_path, query, limit)
+
+    def retain_blob(self, digest: str) -> int:
+        """Add a reference to a content blob and return its new count."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO blob_refs (hash, refs) VALUES (?, 1)"
+                " ON CONFLICT(hash) DO UPDATE SET refs = refs + 1", (digest,)
+            )
+            refs = self._conn.execute(
+                "SELECT refs FROM blob_refs WHERE hash = ?", (digest,)
+            ).fetchone()[0]
+            self._commit()
+        return refs
+
+    def release_blob(self, digest: str) -> int:
+        """Drop a reference to a content blob and return the remaining count."""
+        with self._lock:
+            self._conn.execute("UPDATE blob_refs SET refs = refs - 1 WHERE hash = ?", (digest,))
+            row = self._conn.execute(
+                "SELECT refs FROM blob_refs WHERE hash = ?", (digest,)
+            ).fetchone()
+            refs = row[0] if row else 0
+            if refs <= 0:
+                self._conn.execute("DELETE FROM blob_refs WHERE hash = ?", (digest,))
+            self._commit()
+        return refs
+
+    def rebuild_blob_refs(self, counts: dict[str, int]) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM blob_refs")
+            self._conn.executemany(
+                "INSERT INTO blob_refs (hash, refs) VALUES (?, ?)", counts.items()
+            )
+            self._conn.commit()
+
+    def rebuild(self, entries: Iterable[tuple[str, ContextNode]]) -> int:
+        """Replace the whole index with the given (rel_path, node) pairs, loading their content."""
+        count = 0
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM tags")
+            self._conn.execute("DELETE FROM dir_counts")
+            lexical.clear_text(self._conn)
+            for rel_path, node in entries:
+                self._upsert(rel_path, node)
+                lexical.index_text(self._conn, rel_path, node.load().content)
+                count += 1
+            self._conn.commit()
+        return count
+
+    def query(self, rel_path: str, tags: list[str] | None = None,
+              source: str | None = None, since: str | None = None) -> list[str]:
+        """Return the sorted relative paths under rel_path that match every filter."""
+        clauses: list[str] = []
+        params: list = []
+        bounds = prefix_bounds(rel_path)
+        if bounds:
+            clauses.append("e.path >= ? AND e.path < ?")
+            params.extend(bounds)
+        if source:
+            clauses.append("e.source = ?")
+            params.append(source)
+        if since:
+            clauses.append("e.updated_at >= ?")
+            params.append(since)
+        if tags:
+            wanted = sorted(set(tags))
+            placeholders = ", ".join("?" for _ in wanted)
+            clauses.append(
+                f"e.path IN (SELECT path FROM tags WHERE tag IN ({placeholders})"
+                " GROUP BY path HAVING COUNT(*) = ?)"
+            )
+            params.extend(wanted)
+            params.append(len(wanted))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT e.path FROM entries e{where} ORDER BY e.path", params
+            ).fetchall()
+        return [path for (path,) in rows]
+
+    def iter_by_updated(self, rel_path: str, newest_first: bool = True,
+                        max_tokens: Callable[[], int] | None = None,
+                        page_size: int = 64) -> Iterator[str]:
+        """Yield the relative paths under rel_path ordered by updated_at (ties by path).
+
+        See ``iter_updated_keys``; the lock is only held while a page is read.
+        """
+        for _, path in iter_updated_keys(self._run, "entries", rel_path, newest_first,
+                                         max_tokens, page_size):
+            yield path
+
+    def _run(self, sql: str, params: list) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def token_stats(self, rel_path: str) -> tuple[int, int]:
+        """Return (node count, smallest token_estimate) under rel_path; (0, 0) if empty."""
+        return dir_token_stats(self._run, "entries", rel_path)
+
+    def entries(self) -> dict[str, dict]:
+        """Return every indexed path with its indexed fields."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, source, created_at, updated_at, token_estimate, tags FROM entries"
+            ).fetchall()
+        return {
+            path: {
+                "source": source,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "token_estimate": token_estimate,
+                "tags": json.loads(tags),
+            }
+            for path, source, created_at, updated_at, token_estimate, tags in rows
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import math
+import re
+import sqlite3
+from collections import Counter
+
+from michigram.storage import index  # index imports this module, so no from-import
+
+# BM25 parameters (the usual Okapi defaults).
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "an and are as at be but by for from has have if in into is it its of on or so that the "
+    "their then there these this to was were will with".split()
+)
+
+# Posting lists, document lengths, and document count / total length per directory
+# prefix, so BM25 statistics for any project are a single row lookup.
+LEXICAL_DDL = (
+    "CREATE TABLE IF NOT EXISTS text_docs ("
+    "  path TEXT PRIMARY KEY,"
+    "  length INTEGER NOT NULL"
+    ");"
+    "CREATE TABLE IF NOT EXISTS text_postings ("
+    "  term TEXT NOT NULL,"
+    "  path TEXT NOT NULL,"
+    "  tf INTEGER NOT NULL,"
+    "  PRIMARY KEY (term, path)"
+    ") WITHOUT ROWID;"
+    "CREATE INDEX IF NOT EXISTS idx_text_postings_path ON text_postings (path);"
+    "CREATE TABLE IF NOT EXISTS text_prefixes ("
+    "  prefix TEXT PRIMARY KEY,"
+    "  docs INTEGER NOT NULL,"
+    "  length INTEGER NOT NULL"
+    ");"
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased alphanumeric terms, without one-letter words and common stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def _ancestors(rel_path: str) -> list[str]:
+    parts = rel_path.split("/")
+    return [""] + ["/".join(parts[:i]) for i in range(1, len(parts))]
+
+
+def _adjust(conn: sqlite3.Connection, rel_path: str, docs: int, length: int) -> None:
+    conn.executemany(
+        "INSERT INTO text_prefixes (prefix, docs, length) VALUES (?, ?, ?)"
+        " ON CONFLICT(prefix) DO UPDATE SET docs = docs + excluded.docs,"
+        " length = length + excluded.length",
+        [(prefix, docs, length) for prefix in _ancestors(rel_path)],
+    )
+
+
+def unindex_text(conn: sqlite3.Connection, rel_path: str) -> None:
+    row = conn.execute("SELECT length FROM text_docs WHERE path = ?", (rel_path,)).fetchone()
+    if row is None:
+        return
+    conn.execute("DELETE FROM text_postings WHERE path = ?", (rel_path,))
+    conn.execute("DELETE FROM text_docs WHERE path = ?", (rel_path,))
+    _adjust(conn, rel_path, -1, -row[0])
+
+
+def index_text(conn: sqlite3.Connection, rel_path: str, text: str | None) -> None:
+    """Replace rel_path's postings with the terms of text (none if text is None)."""
+    unindex_text(conn, rel_path)
+    if text is None:
+        return
+    counts = Counter(tokenize(text))
+    length = sum(counts.values())
+    conn.execute("INSERT INTO text_docs (path, length) VALUES (?, ?)", (rel_path, length))
+    conn.executemany(
+        "INSERT INTO text_postings (term, path, tf) VALUES (?, ?, ?)",
+        [(term, rel_path, tf) for term, tf in counts.items()],
+    )
+    _adjust(conn, rel_path, 1, length)
+
+
+def clear_text(conn: sqlite3.Connection) -> None:
+    conn.execute("DELETE FROM text_postings")
+    conn.execute("DELETE FROM text_docs")
+    conn.execute("DELETE FROM text_prefixes")
+
+
+def search_text(conn: sqlite3.Connection, rel_path: str, query: str,
+                limit: int | None = None) -> list[tuple[str, float]]:
+    """Rank the nodes under rel_path by BM25 against query, best first.
+
+    Only the posting lists of the query's terms are read, and the collection
+    statistics come from the per-prefix counters, so the cost does not grow with
+    the number of nodes that share no term with the query.
+    """
+    terms = sorted(set(tokenize(query)))
+    row = conn.execute(
+        "SELECT docs, length FROM text_prefixes WHERE prefix = ?", (rel_path,)
+    ).fetchone()
+    if not terms or row is None or row[0] <= 0:
+        return []
+    docs, total = row
+    avg_length = total / docs or 1.0
+    bounds = index.prefix_bounds(rel_path)
+    where, params = (" AND p.path >= ? AND p.path < ?", bounds) if bounds else ("", ())
+    scores: dict[str, float] = {}
+    for term in terms:
+        rows = conn.execute(
+            "SELECT p.path, p.tf, d.length FROM text_postings p"
+            f" JOIN text_docs d ON d.path = p.path WHERE p.term = ?{where}",
+            (term, *params),
+        ).fetchall()
+        if not rows:
+            continue
+        idf = math.log(1 + (docs - len(rows) + 0.5) / (len(rows) + 0.5))
+        for path, tf, length in rows:
+            norm = 1 - BM25_B + BM25_B * length / avg_length
+            scores[path] = scores.get(path, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+    ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+    return ranked[:limit] if limit is not None else ranked
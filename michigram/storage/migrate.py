@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from itertools import islice
+from typing import Callable
+
+from michigram.storage.base import StorageBackend
+
+
+def _copy_node(source: StorageBackend, target: StorageBackend, rel_path: str) -> bool:
+    node = source.read(rel_path)
+    if node is None:
+        return False
+    existing = target.read_metadata(rel_path)
+    if (existing is not None and existing.metadata.version == node.metadata.version
+            and existing.metadata.updated_at == node.metadata.updated_at):
+        return False
+    have = set(target.get_versions(rel_path))
+    for version in source.get_versions(rel_path):
+        if version in have:
+            continue
+        old = source.read_version(rel_path, version)
+        if old is not None:
+            target.write_version(rel_path, old)
+    target.write(rel_path, node)
+    return True
+
+
+def migrate_store(source: StorageBackend, target: StorageBackend, batch_size: int = 500,
+                  progress: Callable[[int], None] | None = None) -> int:
+    """Copy every node and its version history from source to target. Returns nodes copied.
+
+    Each batch of ``batch_size`` nodes is committed as one transaction. Nodes already
+    present in target at the same version are skipped, so the migration can be re-run
+    while the source store is still in use to pick up anything written since. Paths are
+    walked lazily; ``progress`` is called after each batch with the nodes seen so far.
+    """
+    paths = source.walk()
+    done = copied = 0
+    while True:
+        chunk = list(islice(paths, batch_size))
+        if not chunk:
+            break
+        with target.batch():
+            for rel_path in chunk:
+                if _copy_node(source, target, rel_path):
+                    copied += 1
+        done += len(chunk)
+        if progress is not None:
+            progress(done)
+    return copied
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from michigram.storage.base import StorageBackend
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Which historical versions of a node to keep.
+
+    ``keep_last`` keeps the newest N versions. ``exponential`` keeps the oldest
+    version in each age bucket of [2^k, 2^(k+1)) days (plus one under a day old),
+    so history thins out the further back it goes while surviving versions stay
+    put as they age. When both are set a version survives if either keeps it;
+    with neither set every version survives. ``max_age_days`` then drops
+    anything written longer ago than that. A version's age is taken from its
+    ``updated_at``.
+    """
+
+    keep_last: int | None = None
+    max_age_days: float | None = None
+    exponential: bool = False
+
+    def __post_init__(self) -> None:
+        if self.keep_last is not None and self.keep_last < 0:
+            raise ValueError(f"keep_last must be non-negative, got {self.keep_last}")
+        if self.max_age_days is not None and self.max_age_days < 0:
+            raise ValueError(f"max_age_days must be non-negative, got {self.max_age_days}")
+
+    @classmethod
+    def from_dict(cls, data: dict) -> RetentionPolicy:
+        return cls(keep_last=data.get("keep_last"), max_age_days=data.get("max_age_days"),
+                   exponential=bool(data.get("exponential", False)))
+
+    @property
+    def enabled(self) -> bool:
+        return self.keep_last is not None or self.max_age_days is not None or self.exponential
+
+    @property
+    def uses_age(self) -> bool:
+        return self.max_age_days is not None or self.exponential
+
+    def select_drops(self, versions: list[tuple[int, str]],
+                     now: datetime | None = None) -> list[int]:
+        """Return the versions to delete, given (version, updated_at) pairs."""
+        now = now or datetime.now(timezone.utc)
+        newest_first = sorted(versions, reverse=True)
+        keep = {v for v, _ in newest_first}
+        if self.keep_last is not None or self.exponential:
+            keep = {v for v, _ in newest_first[:self.keep_last or 0]}
+            if self.exponential:
+                oldest_in_bucket: dict[int, int] = {}
+                for v, ts in newest_first:
+                    oldest_in_bucket[_bucket(_age_days(ts, now))] = v
+                keep.update(oldest_in_bucket.values())
+        if self.max_age_days is not None:
+            keep = {v for v, ts in newest_first
+                    if v in keep and _age_days(ts, now) <= self.max_age_days}
+        return sorted(v for v, _ in versions if v not in keep)
+
+
+def _age_days(ts: str, now: datetime) -> float:
+    try:
+        then = datetime.fromisoformat(ts)
+    except ValueError:
+        return 0.0  # unparseable timestamps count as new rather than being dropped
+    if then.tzinfo is None:
+        then = then.replace(tzinfo=timezone.utc)
+    return max((now - then).total_seconds() / 86400, 0.0)
+
+
+def _bucket(age_days: float) -> int:
+    return 0 if age_days < 1 else int(math.log2(age_days)) + 1
+
+
+def compact(backend: StorageBackend, policy: RetentionPolicy, rel_path: str = "",
+            now: datetime | None = None) -> tuple[int, int]:
+    """Apply policy to every node under rel_path. Returns (nodes visited, versions dropped)."""
+    nodes = dropped = 0
+    for rel in backend.walk(rel_path):
+        nodes += 1
+        dropped += backend.prune_versions(rel, policy, now=now)
+    return nodes, dropped
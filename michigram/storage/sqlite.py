@@ -1,36 +1,287 @@
 from __future__ import annotations
+import contextlib
+import functools
+import itertools
 import json
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, ContextManager, Iterator
 from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+from michigram.core.primitives import sha256_short
+from michigram.storage import index, lexical
 from michigram.storage.base import StorageBackend
+from michigram.storage.index import prefix_bounds
+from michigram.storage.vectors import VectorIndex
+
+if TYPE_CHECKING:
+    from michigram.storage.retention import RetentionPolicy
+    from michigram.storage.vectors import Embedder
+
+SCHEMA_VERSION = 6
+
+JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+SYNCHRONOUS_LEVELS = ("off", "normal", "full", "extra")
+
+_INDEXED_COLUMNS = (
+    ("source", "TEXT NOT NULL DEFAULT ''"),
+    ("created_at", "TEXT NOT NULL DEFAULT ''"),
+    ("updated_at", "TEXT NOT NULL DEFAULT ''"),
+    ("token_estimate", "INTEGER NOT NULL DEFAULT 0"),
+    ("ttl_seconds", "INTEGER"),
+    ("parent", "TEXT NOT NULL DEFAULT ''"),
+)
+
+_SECONDARY_DDL = (
+    "CREATE TABLE IF NOT EXISTS node_versions ("
+    "  path TEXT NOT NULL,"
+    "  version INTEGER NOT NULL,"
+    "  node_type TEXT NOT NULL,"
+    "  content TEXT,"
+    "  metadata TEXT NOT NULL,"
+    "  blob TEXT,"
+    "  PRIMARY KEY (path, version)"
+    ");"
+    "CREATE TABLE IF NOT EXISTS blobs ("
+    "  hash TEXT PRIMARY KEY,"
+    "  content TEXT NOT NULL,"
+    "  refs INTEGER NOT NULL"
+    ");"
+    "CREATE TABLE IF NOT EXISTS node_tags ("
+    "  path TEXT NOT NULL,"
+    "  tag TEXT NOT NULL,"
+    "  PRIMARY KEY (tag, path)"
+    ");"
+    "CREATE INDEX IF NOT EXISTS idx_node_tags_path ON node_tags (path);"
+    "CREATE INDEX IF NOT EXISTS idx_nodes_source ON nodes (source);"
+    "CREATE INDEX IF NOT EXISTS idx_nodes_created ON nodes (created_at);"
+    "CREATE INDEX IF NOT EXISTS idx_nodes_updated ON nodes (updated_at);"
+    "CREATE INDEX IF NOT EXISTS idx_nodes_tokens ON nodes (token_estimate);"
+    "CREATE INDEX IF NOT EXISTS idx_nodes_ttl ON nodes (ttl_seconds);"
+    # Per directory: rows in updated_at order for iter_by_updated, and the smallest
+    # token_estimate for token_stats, each without touching content pages.
+    "CREATE INDEX IF NOT EXISTS idx_nodes_parent_updated"
+    "  ON nodes (parent, updated_at, path, token_estimate);"
+    "CREATE INDEX IF NOT EXISTS idx_nodes_parent_tokens ON nodes (parent, token_estimate);"
+)
+
+# Node content, whether stored inline or in the blobs table; valid for nodes and node_versions.
+_CONTENT = "COALESCE(content, (SELECT b.content FROM blobs b WHERE b.hash = blob))"
+
+def _meta_json(node: ContextNode) -> str:
+    meta = node.metadata
+    return json.dumps({
+        "path": node.path,
+        "created_at": meta.created_at,
+        "updated_at": meta.updated_at,
+        "source": meta.source,
+        "content_type": meta.content_type,
+        "token_estimate": meta.token_estimate,
+        "tags": meta.tags,
+        "ttl_seconds": meta.ttl_seconds,
+        "version": meta.version,
+        "extra": meta.extra,
+    })
 
 class SqliteBackend(StorageBackend):
-    def __init__(self, db_path: Path) -> None:
+    """Stores nodes in a single SQLite database.
+
+    With ``content_addressed`` set, new content goes to the ``blobs`` table keyed
+    by its SHA-256 and rows keep only the hash, so identical content across nodes
+    and versions is stored once. Each blob counts the rows that reference it and
+    is deleted with the last one.
+
+    Given an ``embedder``, node content is also embedded on write into a
+    VectorIndex in the ``<name>.vectors/`` directory beside the database.
+    """
+
+    def __init__(self, db_path: Path, journal_mode: str = "wal",
+                 synchronous: str = "normal", pool_size: int = 4,
+                 retention: RetentionPolicy | None = None,
+                 content_addressed: bool = False, embedder: Embedder | None = None) -> None:
+        if journal_mode.lower() not in JOURNAL_MODES:
+            raise ValueError(f"Unknown journal mode: {journal_mode}. Available: {list(JOURNAL_MODES)}")
+        if synchronous.lower() not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Unknown synchronous level: {synchronous}. Available: {list(SYNCHRONOUS_LEVELS)}")
+        if pool_size < 1:
+            raise ValueError(f"pool_size must be at least 1, got {pool_size}")
         self._db_path = db_path
+        self._synchronous = synchronous
+        self._pool_size = pool_size
+        self._retention = retention if retention is not None and retention.enabled else None
+        self._content_addressed = content_addressed
+        self._pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._readers: list[sqlite3.Connection] = []
+        self._pool_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
         db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(str(db_path))
-        self._conn.execute(
-            "CREATE TABLE IF NOT EXISTS nodes ("
-            "  path TEXT PRIMARY KEY,"
-            "  node_type TEXT NOT NULL,"
-            "  content TEXT,"
-            "  metadata TEXT NOT NULL"
-            ")"
-        )
-        self._conn.commit()
+        self._writer = self._connect()
+        self._writer.execute(f"PRAGMA journal_mode = {journal_mode}")
+        self._migrate()
+        self._vectors = None
+        if embedder is not None:
+            self._vectors = VectorIndex(db_path.with_name(f"{db_path.stem}.vectors"), embedder)
+            if self._vectors.created:
+                rows = self._writer.execute(f"SELECT path, {_CONTENT} FROM nodes").fetchall()
+                self._vectors.rebuild(rows)
 
-    def read(self, rel_path: str) -> ContextNode | None:
-        row = self._conn.execute(
-            "SELECT path, node_type, content, metadata FROM nodes WHERE path = ?",
-            (rel_path,)
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self._db_path), timeout=30, check_same_thread=False)
+        conn.execute(f"PRAGMA synchronous = {self._synchronous}")
+        return conn
+
+    @property
+    def _batch_depth(self) -> int:
+        return getattr(self._local, "batch_depth", 0)
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Check out a pooled read connection.
+
+        A thread inside a batch reads through the writer so it sees its own
+        uncommitted changes. Other readers run concurrently under WAL.
+        """
+        if self._batch_depth:
+            yield self._writer
+            return
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                if len(self._readers) < self._pool_size:
+                    conn = self._connect()
+                    self._readers.append(conn)
+                else:
+                    conn = None
+            if conn is None:
+                conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _commit(self) -> None:
+        if self._batch_depth == 0:
+            self._writer.commit()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Defer commits until the outermost batch exits; roll back if it raises.
+
+        A batch holds the writer lock, so writes from other threads wait until it ends.
+        """
+        with self._write_lock, self._vectors_batch():
+            self._local.batch_depth = self._batch_depth + 1
+            try:
+                yield
+            except BaseException:
+                self._local.batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._writer.rollback()
+                raise
+            self._local.batch_depth -= 1
+            if self._batch_depth == 0:
+                self._writer.commit()
+
+    def _vectors_batch(self) -> ContextManager[None]:
+        if self._vectors is None:
+            return contextlib.nullcontext()
+        return self._vectors.batch(rollback_on_error=True)
+
+    @property
+    def schema_version(self) -> int:
+        with self._reader() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def _migrate(self) -> None:
+        """Create the schema, or upgrade an existing database in place."""
+        exists = self._writer.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'nodes'"
         ).fetchone()
-        if row is None:
-            return None
-        path, node_type, content, meta_json = row
+        version = self._writer.execute("PRAGMA user_version").fetchone()[0]
+        if not exists:
+            columns = "".join(f"  {name} {decl}," for name, decl in _INDEXED_COLUMNS)
+            self._writer.execute(
+                "CREATE TABLE nodes ("
+                "  path TEXT PRIMARY KEY,"
+                "  node_type TEXT NOT NULL,"
+                "  content TEXT,"
+                f"{columns}"
+                "  metadata TEXT NOT NULL,"
+                "  blob TEXT"
+                ")"
+            )
+        elif version < 2:
+            self._migrate_v2()
+        if exists and version < 6:
+            self._migrate_v6()  # before the DDL, which indexes the new column
+        self._writer.executescript(_SECONDARY_DDL + lexical.LEXICAL_DDL + index.DIR_COUNTS_DDL)
+        if exists and version < 4:
+            self._migrate_v4()
+        if exists and version < 5:
+            self._migrate_v5()
+        self._writer.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._writer.commit()
+
+    def _migrate_v2(self) -> None:
+        """Promote filterable metadata out of the JSON blob into indexed columns."""
+        existing = {row[1] for row in self._writer.execute("PRAGMA table_info(nodes)")}
+        for name, decl in _INDEXED_COLUMNS:
+            if name not in existing:
+                self._writer.execute(f"ALTER TABLE nodes ADD COLUMN {name} {decl}")
+        self._writer.execute(
+            "CREATE TABLE IF NOT EXISTS node_tags (path TEXT NOT NULL, tag TEXT NOT NULL,"
+            " PRIMARY KEY (tag, path))"
+        )
+        rows = self._writer.execute("SELECT path, metadata FROM nodes").fetchall()
+        for path, meta_json in rows:
+            meta = json.loads(meta_json)
+            self._writer.execute(
+                "UPDATE nodes SET source = ?, created_at = ?, updated_at = ?,"
+                " token_estimate = ?, ttl_seconds = ? WHERE path = ?",
+                (meta.get("source", ""), meta.get("created_at", ""), meta.get("updated_at", ""),
+                 meta.get("token_estimate", 0), meta.get("ttl_seconds"), path),
+            )
+            self._writer.executemany(
+                "INSERT OR IGNORE INTO node_tags (path, tag) VALUES (?, ?)",
+                [(path, t) for t in meta.get("tags", [])],
+            )
+
+    def _migrate_v4(self) -> None:
+        """Add the blob reference columns used by content-addressed storage."""
+        for table in ("nodes", "node_versions"):
+            existing = {row[1] for row in self._writer.execute(f"PRAGMA table_info({table})")}
+            if "blob" not in existing:
+                self._writer.execute(f"ALTER TABLE {table} ADD COLUMN blob TEXT")
+
+    def _migrate_v5(self) -> None:
+        """Build the text index over existing node content."""
+        rows = self._writer.execute(f"SELECT path, {_CONTENT} FROM nodes").fetchall()
+        for path, content in rows:
+            lexical.index_text(self._writer, path, content)
+
+    def _migrate_v6(self) -> None:
+        """Add and fill the parent column and per-directory counts, replacing the path index."""
+        existing = {row[1] for row in self._writer.execute("PRAGMA table_info(nodes)")}
+        if "parent" not in existing:
+            self._writer.execute("ALTER TABLE nodes ADD COLUMN parent TEXT NOT NULL DEFAULT ''")
+        paths = [path for (path,) in self._writer.execute("SELECT path FROM nodes")]
+        self._writer.executemany("UPDATE nodes SET parent = ? WHERE path = ?",
+                                 [(index.parent_of(path), path) for path in paths])
+        self._writer.executescript(index.DIR_COUNTS_DDL)
+        self._writer.execute("DELETE FROM dir_counts")
+        self._writer.execute("INSERT INTO dir_counts (parent, nodes)"
+                             " SELECT parent, COUNT(*) FROM nodes GROUP BY parent")
+        self._writer.execute("DROP INDEX IF EXISTS idx_nodes_path_updated")
+
+    def _row_to_node(self, path: str, node_type: str, content: str | None,
+                     meta_json: str) -> ContextNode:
         meta = json.loads(meta_json)
         return ContextNode(
-            path=path,
+            path=meta.get("path", path),
             node_type=NodeType(node_type),
             metadata=NodeMetadata(
                 created_at=meta["created_at"],
@@ -46,30 +297,249 @@ class SqliteBackend(StorageBackend):
             content=content,
         )
 
+    def _read_content(self, rel_path: str) -> str | None:
+        with self._reader() as conn:
+            row = conn.execute(
+                f"SELECT {_CONTENT} FROM nodes WHERE path = ?", (rel_path,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def read(self, rel_path: str) -> ContextNode | None:
+        with self._reader() as conn:
+            row = conn.execute(
+                f"SELECT path, node_type, {_CONTENT}, metadata FROM nodes WHERE path = ?",
+                (rel_path,)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._row_to_node(*row)
+
+    def read_metadata(self, rel_path: str) -> ContextNode | None:
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT path, node_type, metadata FROM nodes WHERE path = ?",
+                (rel_path,)
+            ).fetchone()
+        if row is None:
+            return None
+        path, node_type, meta_json = row
+        node = self._row_to_node(path, node_type, None, meta_json)
+        node.loader = functools.partial(self._read_content, rel_path)
+        return node
+
     def write(self, rel_path: str, node: ContextNode) -> None:
-        meta_dict = {
-            "created_at": node.metadata.created_at,
-            "updated_at": node.metadata.updated_at,
-            "source": node.metadata.source,
-            "content_type": node.metadata.content_type,
-            "token_estimate": node.metadata.token_estimate,
-            "tags": node.metadata.tags,
-            "ttl_seconds": node.metadata.ttl_seconds,
-            "version": node.metadata.version,
-            "extra": node.metadata.extra,
-        }
-        self._conn.execute(
-            "INSERT OR REPLACE INTO nodes (path, node_type, content, metadata) VALUES (?, ?, ?, ?)",
-            (rel_path, node.node_type.value, node.content, json.dumps(meta_dict))
+        node.load()
+        meta = node.metadata
+        with self._write_lock:
+            existing = self._writer.execute(
+                "SELECT node_type, content, blob, metadata FROM nodes WHERE path = ?", (rel_path,)
+            ).fetchone()
+            if existing is not None:
+                old_type, old_content, old_blob, old_meta = existing
+                if old_blob is not None:
+                    self._retain_blob(old_blob)  # the version row shares the live node's blob
+                self._put_version(rel_path, json.loads(old_meta).get("version", 1), old_type,
+                                  old_content, old_blob, old_meta)
+            content, blob = self._store_content(node.content)
+            self._writer.execute(
+                "INSERT OR REPLACE INTO nodes (path, node_type, content, blob, source, created_at,"
+                " updated_at, token_estimate, ttl_seconds, parent, metadata)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (rel_path, node.node_type.value, content, blob, meta.source, meta.created_at,
+                 meta.updated_at, meta.token_estimate, meta.ttl_seconds,
+                 index.parent_of(rel_path), _meta_json(node))
+            )
+            if existing is not None:
+                self._release_blob(old_blob)
+            else:
+                index.count_node(self._writer, rel_path, 1)
+            self._writer.execute("DELETE FROM node_tags WHERE path = ?", (rel_path,))
+            self._writer.executemany(
+                "INSERT OR IGNORE INTO node_tags (path, tag) VALUES (?, ?)",
+                [(rel_path, t) for t in meta.tags],
+            )
+            lexical.index_text(self._writer, rel_path, node.content)
+            if self._vectors is not None:
+                self._vectors.add(rel_path, node.content)
+            if existing is not None and self._retention is not None:
+                self.prune_versions(rel_path, self._retention)
+            self._commit()
+
+    def write_metadata(self, rel_path: str, node: ContextNode) -> None:
+        meta = node.metadata
+        with self._write_lock:
+            cur = self._writer.execute(
+                "UPDATE nodes SET source = ?, created_at = ?, updated_at = ?, token_estimate = ?,"
+                " ttl_seconds = ?, metadata = ? WHERE path = ?",
+                (meta.source, meta.created_at, meta.updated_at, meta.token_estimate,
+                 meta.ttl_seconds, _meta_json(node), rel_path)
+            )
+            if cur.rowcount == 0:
+                raise KeyError(f"No node at {rel_path}")
+            self._writer.execute("DELETE FROM node_tags WHERE path = ?", (rel_path,))
+            self._writer.executemany(
+                "INSERT OR IGNORE INTO node_tags (path, tag) VALUES (?, ?)",
+                [(rel_path, t) for t in meta.tags],
+            )
+            self._commit()
+
+    def write_version(self, rel_path: str, node: ContextNode) -> None:
+        """Store node as historical version ``node.metadata.version`` without touching the live node."""
+        node.load()
+        with self._write_lock:
+            content, blob = self._store_content(node.content)
+            self._put_version(rel_path, node.metadata.version, node.node_type.value,
+                              content, blob, _meta_json(node))
+            self._commit()
+
+    def _put_version(self, rel_path: str, version: int, node_type: str, content: str | None,
+                     blob: str | None, meta_json: str) -> None:
+        """Insert a version row whose blob, if any, is already retained; release the row it replaces."""
+        replaced = self._writer.execute(
+            "SELECT blob FROM node_versions WHERE path = ? AND version = ?", (rel_path, version)
+        ).fetchone()
+        self._writer.execute(
+            "INSERT OR REPLACE INTO node_versions (path, version, node_type, content, blob, metadata)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (rel_path, version, node_type, content, blob, meta_json)
+        )
+        if replaced is not None:
+            self._release_blob(replaced[0])
+
+    def _store_content(self, content: str | None) -> tuple[str | None, str | None]:
+        """Return the (content, blob) column values for new content, retaining its blob."""
+        if content is None or not self._content_addressed:
+            return content, None
+        digest = sha256_short(content, 64)
+        self._writer.execute(
+            "INSERT INTO blobs (hash, content, refs) VALUES (?, ?, 1)"
+            " ON CONFLICT(hash) DO UPDATE SET refs = refs + 1", (digest, content)
         )
-        self._conn.commit()
+        return None, digest
+
+    def _retain_blob(self, digest: str) -> None:
+        self._writer.execute("UPDATE blobs SET refs = refs + 1 WHERE hash = ?", (digest,))
+
+    def _release_blob(self, digest: str | None) -> None:
+        if digest is None:
+            return
+        self._writer.execute("UPDATE blobs SET refs = refs - 1 WHERE hash = ?", (digest,))
+        self._writer.execute("DELETE FROM blobs WHERE hash = ? AND refs <= 0", (digest,))
+
+    def get_versions(self, rel_path: str) -> list[int]:
+        with self._reader() as conn:
+            rows = conn.execute(
+                "SELECT version FROM node_versions WHERE path = ? ORDER BY version", (rel_path,)
+            ).fetchall()
+        return [v for (v,) in rows]
+
+    def read_version(self, rel_path: str, version: int) -> ContextNode | None:
+        with self._reader() as conn:
+            row = conn.execute(
+                f"SELECT path, node_type, {_CONTENT}, metadata FROM node_versions"
+                " WHERE path = ? AND version = ?",
+                (rel_path, version)
+            ).fetchone()
+        if row is None:
+            return None
+        return self._row_to_node(*row)
+
+    def _read_version_content(self, rel_path: str, version: int) -> str | None:
+        with self._reader() as conn:
+            row = conn.execute(
+                f"SELECT {_CONTENT} FROM node_versions WHERE path = ? AND version = ?",
+                (rel_path, version)
+            ).fetchone()
+        return row[0] if row else None
+
+    def read_version_metadata(self, rel_path: str, version: int) -> ContextNode | None:
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT path, node_type, metadata FROM node_versions WHERE path = ? AND version = ?",
+                (rel_path, version)
+            ).fetchone()
+        if row is None:
+            return None
+        path, node_type, meta_json = row
+        node = self._row_to_node(path, node_type, None, meta_json)
+        node.loader = functools.partial(self._read_version_content, rel_path, version)
+        return node
+
+    def delete_version(self, rel_path: str, version: int) -> bool:
+        with self._write_lock:
+            row = self._writer.execute(
+                "SELECT blob FROM node_versions WHERE path = ? AND version = ?", (rel_path, version)
+            ).fetchone()
+            if row is not None:
+                self._writer.execute(
+                    "DELETE FROM node_versions WHERE path = ? AND version = ?", (rel_path, version)
+                )
+                self._release_blob(row[0])
+            self._commit()
+        return row is not None
+
+    def iter_by_updated(self, rel_path: str, newest_first: bool = True,
+                        max_tokens: Callable[[], int] | None = None,
+                        page_size: int = 64) -> Iterator[ContextNode]:
+        """Yield nodes under rel_path without content, ordered by updated_at (ties by path).
+
+        The order comes from ``index.iter_updated_keys``, so stopping early skips the
+        rest; metadata is then fetched for up to ``page_size`` nodes at a time.
+        """
+        keys = index.iter_updated_keys(self._run, "nodes", rel_path, newest_first,
+                                       max_tokens, page_size)
+        while True:
+            paths = [path for _, path in itertools.islice(keys, page_size)]
+            if not paths:
+                return
+            placeholders = ", ".join("?" for _ in paths)
+            rows = {path: (node_type, meta_json) for path, node_type, meta_json in self._run(
+                f"SELECT path, node_type, metadata FROM nodes WHERE path IN ({placeholders})",
+                paths)}
+            for path in paths:
+                if path not in rows:
+                    continue  # deleted since its key was read
+                node = self._row_to_node(path, rows[path][0], None, rows[path][1])
+                node.loader = functools.partial(self._read_content, path)
+                yield node
+            page_size = min(page_size * 2, 512)
+
+    def _run(self, sql: str, params: list) -> list:
+        with self._reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def token_stats(self, rel_path: str) -> tuple[int, int]:
+        return index.dir_token_stats(self._run, "nodes", rel_path)
+
+    def walk(self, rel_path: str = "", page_size: int = 1000) -> Iterator[str]:
+        """Yield every live path under rel_path in order, ``page_size`` rows per query."""
+        low, high = prefix_bounds(rel_path) or ("", None)
+        while True:
+            with self._reader() as conn:
+                if high is None:
+                    rows = conn.execute(
+                        "SELECT path FROM nodes WHERE path > ? ORDER BY path LIMIT ?",
+                        (low, page_size)).fetchall()
+                else:
+                    rows = conn.execute(
+                        "SELECT path FROM nodes WHERE path > ? AND path < ? ORDER BY path LIMIT ?",
+                        (low, high, page_size)).fetchall()
+            for (path,) in rows:
+                yield path
+            if len(rows) < page_size:
+                return
+            low = rows[-1][0]
 
     def list(self, rel_path: str) -> list[str]:
         prefix = f"{rel_path}/" if rel_path else ""
-        rows = self._conn.execute(
-            "SELECT path FROM nodes WHERE path LIKE ? ORDER BY path",
-            (f"{prefix}%",)
-        ).fetchall()
+        bounds = prefix_bounds(rel_path)
+        with self._reader() as conn:
+            if bounds:
+                rows = conn.execute(
+                    "SELECT path FROM nodes WHERE path >= ? AND path < ? ORDER BY path", bounds
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT path FROM nodes ORDER BY path").fetchall()
         names = set()
         for (path,) in rows:
             rest = path[len(prefix):]
@@ -78,44 +548,77 @@ class SqliteBackend(StorageBackend):
         return sorted(names)
 
     def delete(self, rel_path: str) -> bool:
-        cursor = self._conn.execute("DELETE FROM nodes WHERE path = ?", (rel_path,))
-        self._conn.commit()
-        return cursor.rowcount > 0
+        with self._write_lock:
+            row = self._writer.execute(
+                "SELECT blob FROM nodes WHERE path = ?", (rel_path,)
+            ).fetchone()
+            self._writer.execute("DELETE FROM nodes WHERE path = ?", (rel_path,))
+            self._writer.execute("DELETE FROM node_tags WHERE path = ?", (rel_path,))
+            lexical.unindex_text(self._writer, rel_path)
+            if self._vectors is not None:
+                self._vectors.remove(rel_path)
+            if row is not None:
+                self._release_blob(row[0])
+                index.count_node(self._writer, rel_path, -1)
+            self._commit()
+        return row is not None
 
     def search(self, rel_path: str, tags: list[str] | None = None,
-               source: str | None = None, since: str | None = None) -> list[ContextNode]:
-        prefix = f"{rel_path}/" if rel_path else ""
-        rows = self._conn.execute(
-            "SELECT path, node_type, content, metadata FROM nodes WHERE path LIKE ? ORDER BY path",
-            (f"{prefix}%",)
-        ).fetchall()
-        results = []
-        for path, node_type, content, meta_json in rows:
-            meta = json.loads(meta_json)
-            node = ContextNode(
-                path=path,
-                node_type=NodeType(node_type),
-                metadata=NodeMetadata(
-                    created_at=meta["created_at"],
-                    updated_at=meta["updated_at"],
-                    source=meta.get("source", ""),
-                    content_type=meta.get("content_type", "text/plain"),
-                    token_estimate=meta.get("token_estimate", 0),
-                    tags=meta.get("tags", []),
-                    ttl_seconds=meta.get("ttl_seconds"),
-                    version=meta.get("version", 1),
-                    extra=meta.get("extra", {}),
-                ),
-                content=content,
+               source: str | None = None, since: str | None = None,
+               include_content: bool = True) -> list[ContextNode]:
+        clauses: list[str] = []
+        params: list = []
+        bounds = prefix_bounds(rel_path)
+        if bounds:
+            clauses.append("path >= ? AND path < ?")
+            params.extend(bounds)
+        if source:
+            clauses.append("source = ?")
+            params.append(source)
+        if since:
+            clauses.append("updated_at >= ?")
+            params.append(since)
+        if tags:
+            wanted = sorted(set(tags))
+            placeholders = ", ".join("?" for _ in wanted)
+            clauses.append(
+                f"path IN (SELECT path FROM node_tags WHERE tag IN ({placeholders})"
+                " GROUP BY path HAVING COUNT(*) = ?)"
             )
-            if tags and not set(tags).issubset(set(node.metadata.tags)):
-                continue
-            if source and node.metadata.source != source:
-                continue
-            if since and node.metadata.updated_at < since:
-                continue
+            params.extend(wanted)
+            params.append(len(wanted))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        content_col = _CONTENT if include_content else "NULL"
+        with self._reader() as conn:
+            rows = conn.execute(
+                f"SELECT path, node_type, {content_col}, metadata FROM nodes{where} ORDER BY path",
+                params,
+            ).fetchall()
+        results = []
+        for row in rows:
+            node = self._row_to_node(*row)
+            if not include_content:
+                node.loader = functools.partial(self._read_content, row[0])
             results.append(node)
         return results
 
+    def search_text(self, rel_path: str, query: str,
+                    limit: int | None = None) -> list[tuple[str, float]]:
+        with self._reader() as conn:
+            return lexical.search_text(conn, rel_path, query, limit)
+
+    def search_vectors(self, rel_path: str, query: str,
+                       limit: int | None = None) -> Iterator[tuple[str, float]]:
+        if self._vectors is None:
+            raise NotImplementedError(f"{type(self).__name__} was opened without an embedder")
+        return self._vectors.search(rel_path, query, limit)
+
     def close(self) -> None:
-        self._conn.close()
+        with self._pool_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        with self._write_lock:
+            self._writer.close()
+        if self._vectors is not None:
+            self._vectors.close()
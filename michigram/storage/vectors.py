@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import importlib
+import math
+import sqlite3
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from michigram.storage import index
+from michigram.storage.lexical import tokenize
+
+try:
+    import numpy as np
+except ImportError:  # optional: vectorized scoring when installed
+    np = None
+
+ROWS_FILENAME = "rows.db"
+# Rows of a search resolved to paths per query; later pages are only read if consumed.
+RESOLVE_PAGE = 64
+# Rows ranked by a partial sort before falling back to sorting the whole project.
+RANK_HEAD = 1024
+
+
+class Embedder(ABC):
+    """Maps text to a fixed-length vector. Vectors need not be normalized."""
+
+    dim: int
+
+    @abstractmethod
+    def embed(self, text: str) -> list[float]: ...
+
+    @property
+    def signature(self) -> str:
+        """Identifies the vector space; stored vectors are rebuilt when it changes."""
+        return f"{type(self).__name__}:{self.dim}"
+
+
+class HashingEmbedder(Embedder):
+    """Feature hashing of terms and adjacent term pairs. Deterministic and needs no model."""
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+
+    def embed(self, text: str) -> list[float]:
+        vec = [0.0] * self.dim
+        terms = tokenize(text)
+        for feature in terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]:
+            h = zlib.crc32(feature.encode())
+            vec[h % self.dim] += 1.0 if h >> 31 else -1.0
+        return vec
+
+
+_EMBEDDER_REGISTRY: dict[str, str] = {
+    "hashing": "michigram.storage.vectors:HashingEmbedder",
+}
+
+
+def register_embedder(name: str, import_path: str) -> None:
+    _EMBEDDER_REGISTRY[name] = import_path
+
+
+def get_embedder(name: str, dim: int) -> Embedder:
+    if name not in _EMBEDDER_REGISTRY:
+        raise KeyError(f"Unknown embedder: {name}. Available: {list(_EMBEDDER_REGISTRY.keys())}")
+    module_path, class_name = _EMBEDDER_REGISTRY[name].rsplit(":", 1)
+    return getattr(importlib.import_module(module_path), class_name)(dim)
+
+
+def _normalized(vec: list[float]) -> list[float]:
+    norm = math.sqrt(sum(v * v for v in vec))
+    return [v / norm for v in vec] if norm else vec
+
+
+def _descending(scores) -> Iterator[int]:
+    """Indices of scores, highest first. Only the top RANK_HEAD are sorted unless more are consumed."""
+    if len(scores) <= RANK_HEAD:
+        yield from np.argsort(-scores, kind="stable")
+        return
+    head = np.argpartition(-scores, RANK_HEAD - 1)[:RANK_HEAD]
+    head = head[np.argsort(-scores[head], kind="stable")]
+    yield from head
+    seen = np.zeros(len(scores), dtype=bool)
+    seen[head] = True
+    for i in np.argsort(-scores, kind="stable"):
+        if not seen[i]:
+            yield i
+
+
+class VectorIndex:
+    """Embeddings of node content, one float32 matrix file per project.
+
+    A node's vector is computed when it is written and stored, L2-normalized, as
+    a row of its project's matrix; the path/row mapping lives in SQLite beside the
+    matrices. Rows of deleted nodes are reused; until then search skips them as
+    they have no path. With NumPy installed a
+    search memory-maps each matrix and scores it in one matrix-vector product;
+    without it, rows are scored one by one.
+
+    A project is the first ``depth`` segments of a relative path, which for the
+    repositories' layout is ``memory/<project>`` or ``history/<project>``.
+    """
+
+    def __init__(self, root: Path, embedder: Embedder, depth: int = 2) -> None:
+        self._root = root
+        self._embedder = embedder
+        self._depth = depth
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        # Rows freed by uncommitted removals; reusing one before commit would let a
+        # rollback restore a mapping to a row that holds another vector.
+        self._pending_free: list[tuple[str, int]] = []
+        root.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(root / ROWS_FILENAME), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS vector_rows ("
+            "  path TEXT PRIMARY KEY,"
+            "  grp TEXT NOT NULL,"
+            "  row INTEGER NOT NULL"
+            ");"
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_vector_rows_grp ON vector_rows (grp, row);"
+            "CREATE TABLE IF NOT EXISTS vector_free ("
+            "  grp TEXT NOT NULL,"
+            "  row INTEGER NOT NULL,"
+            "  PRIMARY KEY (grp, row)"
+            ");"
+            "CREATE TABLE IF NOT EXISTS vector_groups ("
+            "  grp TEXT PRIMARY KEY,"
+            "  rows INTEGER NOT NULL"
+            ");"
+            "CREATE TABLE IF NOT EXISTS vector_meta ("
+            "  key TEXT PRIMARY KEY,"
+            "  value TEXT NOT NULL"
+            ");"
+        )
+        row = self._conn.execute(
+            "SELECT value FROM vector_meta WHERE key = 'embedder'"
+        ).fetchone()
+        # New, or built with another embedder: the caller must rebuild it from the store.
+        self.created = row is None or row[0] != embedder.signature
+        self._conn.commit()
+
+    def _group(self, rel_path: str) -> str:
+        parts = rel_path.split("/")
+        return "/".join(parts[:min(self._depth, len(parts) - 1)])
+
+    def _matrix_path(self, grp: str) -> Path:
+        return self._root / "groups" / f"{grp or '_root'}.f32"
+
+    def _commit(self) -> None:
+        if self._batch_depth == 0:
+            self._conn.executemany("INSERT OR IGNORE INTO vector_free (grp, row) VALUES (?, ?)",
+                                   self._pending_free)
+            self._pending_free.clear()
+            self._conn.commit()
+
+    @contextmanager
+    def batch(self, rollback_on_error: bool = False) -> Iterator[None]:
+        """Defer commits until the outermost batch exits.
+
+        With ``rollback_on_error``, an exception leaving the outermost batch rolls
+        the path/row mapping back instead, for callers whose own writes roll back.
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield
+        except BaseException:
+            with self._lock:
+                self._batch_depth -= 1
+                if not rollback_on_error:
+                    self._commit()
+                elif self._batch_depth == 0:
+                    self._pending_free.clear()
+                    self._conn.rollback()
+            raise
+        with self._lock:
+            self._batch_depth -= 1
+            self._commit()
+
+    def _write_row(self, grp: str, row: int, vec: list[float]) -> None:
+        path = self._matrix_path(grp)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "r+b" if path.exists() else "w+b") as f:
+            f.seek(row * self._embedder.dim * 4)
+            f.write(array("f", vec).tobytes())
+
+    def _remove(self, rel_path: str) -> None:
+        found = self._conn.execute(
+            "SELECT grp, row FROM vector_rows WHERE path = ?", (rel_path,)
+        ).fetchone()
+        if found is None:
+            return
+        self._conn.execute("DELETE FROM vector_rows WHERE path = ?", (rel_path,))
+        self._pending_free.append(found)
+
+    def _add(self, rel_path: str, text: str | None) -> None:
+        self._remove(rel_path)
+        if text is None:
+            return
+        grp = self._group(rel_path)
+        free = self._conn.execute(
+            "SELECT row FROM vector_free WHERE grp = ? LIMIT 1", (grp,)
+        ).fetchone()
+        if free is not None:
+            row = free[0]
+            self._conn.execute("DELETE FROM vector_free WHERE grp = ? AND row = ?", (grp, row))
+        else:
+            self._conn.execute(
+                "INSERT INTO vector_groups (grp, rows) VALUES (?, 1)"
+                " ON CONFLICT(grp) DO UPDATE SET rows = rows + 1", (grp,)
+            )
+            row = self._conn.execute(
+                "SELECT rows FROM vector_groups WHERE grp = ?", (grp,)
+            ).fetchone()[0] - 1
+        self._write_row(grp, row, _normalized(self._embedder.embed(text)))
+        self._conn.execute(
+            "INSERT INTO vector_rows (path, grp, row) VALUES (?, ?, ?)", (rel_path, grp, row)
+        )
+
+    def add(self, rel_path: str, text: str | None) -> None:
+        """Store the vector of text for rel_path, replacing any earlier one (none if text is None)."""
+        with self._lock:
+            self._add(rel_path, text)
+            self._commit()
+
+    def remove(self, rel_path: str) -> None:
+        with self._lock:
+            self._remove(rel_path)
+            self._commit()
+
+    def rebuild(self, entries: Iterable[tuple[str, str | None]]) -> int:
+        """Replace every vector with those of the given (rel_path, text) pairs."""
+        count = 0
+        with self._lock:
+            self._pending_free.clear()
+            for table in ("vector_rows", "vector_free", "vector_groups"):
+                self._conn.execute(f"DELETE FROM {table}")
+            for matrix in (self._root / "groups").rglob("*.f32"):
+                matrix.unlink()
+            for rel_path, text in entries:
+                self._add(rel_path, text)
+                count += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO vector_meta (key, value) VALUES ('embedder', ?)",
+                (self._embedder.signature,),
+            )
+            self._conn.commit()
+            self.created = False
+        return count
+
+    def _scores(self, grp: str, query: list[float]):
+        """Cosine similarity of query with every row of grp's matrix."""
+        path = self._matrix_path(grp)
+        dim = self._embedder.dim
+        rows = path.stat().st_size // (dim * 4) if path.exists() else 0
+        if rows == 0:  # a project, e.g. one without sessions, that has no matrix yet
+            return np.zeros(0, dtype=np.float32) if np is not None else []
+        if np is not None:
+            matrix = np.memmap(path, dtype=np.float32, mode="r", shape=(rows, dim))
+            return matrix @ np.asarray(query, dtype=np.float32)
+        values = array("f")
+        with open(path, "rb") as f:
+            values.frombytes(f.read(rows * dim * 4))
+        nonzero = [(j, v) for j, v in enumerate(query) if v]
+        return [sum(values[base + j] * v for j, v in nonzero) for base in range(0, rows * dim, dim)]
+
+    def search(self, rel_path: str, query: str,
+               limit: int | None = None) -> Iterator[tuple[str, float]]:
+        """Yield (rel_path, cosine similarity) for every vector under rel_path, most similar first."""
+        q = _normalized(self._embedder.embed(query))
+        if not any(q):
+            return
+        bounds = index.prefix_bounds(rel_path)
+        with self._lock:
+            if len(rel_path.split("/")) >= self._depth:
+                groups = [self._group(f"{rel_path}/_")]
+            elif bounds:
+                groups = [g for (g,) in self._conn.execute(
+                    "SELECT grp FROM vector_groups WHERE grp = ? OR (grp >= ? AND grp < ?)",
+                    (rel_path, *bounds))]
+            else:
+                groups = [g for (g,) in self._conn.execute("SELECT grp FROM vector_groups")]
+        scored = [(grp, self._scores(grp, q)) for grp in groups]
+        if np is not None:
+            owners = np.concatenate([np.full(len(s), i) for i, (_, s) in enumerate(scored)]
+                                    or [np.zeros(0, dtype=int)])
+            offsets = np.concatenate([np.arange(len(s)) for _, s in scored]
+                                     or [np.zeros(0, dtype=int)])
+            flat = np.concatenate([s for _, s in scored] or [np.zeros(0, dtype=np.float32)])
+            ranked = ((scored[owners[i]][0], int(offsets[i]), float(flat[i]))
+                      for i in _descending(flat))
+        else:
+            ranked = iter(sorted(((grp, row, score) for grp, s in scored
+                                  for row, score in enumerate(s)), key=lambda t: -t[2]))
+        yielded = 0
+        while limit is None or yielded < limit:
+            page = [t for _, t in zip(range(RESOLVE_PAGE), ranked)]
+            if not page:
+                return
+            paths: dict[tuple[str, int], str] = {}
+            with self._lock:
+                for grp in {grp for grp, _, _ in page}:
+                    rows = [row for g, row, _ in page if g == grp]
+                    placeholders = ", ".join("?" for _ in rows)
+                    for row, path in self._conn.execute(
+                        f"SELECT row, path FROM vector_rows WHERE grp = ? AND row IN ({placeholders})",
+                        (grp, *rows),
+                    ):
+                        paths[grp, row] = path
+            for grp, row, score in page:
+                path = paths.get((grp, row))
+                if path is None or (bounds and not bounds[0] <= path < bounds[1]):
+                    continue  # a freed row, or outside rel_path within its project
+                yield path, score
+                yielded += 1
+                if limit is not None and yielded >= limit:
+                    return
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
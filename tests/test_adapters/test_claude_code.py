@@ -68,3 +68,36 @@ def test_detect_sessions_dotted_path(tmp_path):
 
     assert len(sessions) == 1
     assert sessions[0].name == "session1.jsonl"
+
+
+def _write_sessions(directory, count):
+    directory.mkdir()
+    for i in range(count):
+        lines = [{"type": "user", "message": {"content": f"prompt {i}"}},
+                 {"type": "assistant", "message": {"content": [
+                     {"type": "tool_use", "name": "Edit", "input": {"file_path": f"/src/m{i}.py"}}]}}]
+        (directory / f"s{i:02d}.jsonl").write_text("\n".join(json.dumps(l) for l in lines) + "\n")
+
+
+def test_parallel_ingest_matches_serial(tmp_path):
+    _write_sessions(tmp_path / "sessions", 6)
+    serial, serial_history, _, _ = _setup(tmp_path / "a")
+    parallel_history = _setup(tmp_path / "b")[1]
+    parallel = ClaudeCodeAdapter(parallel_history, workers=3)
+
+    serial_ids = serial.ingest(tmp_path / "sessions", "p")
+    parallel_ids = parallel.ingest(tmp_path / "sessions", "p")
+    assert parallel_ids == serial_ids
+    for sid in serial_ids:
+        assert (parallel_history.get_session("p", sid).content
+                == serial_history.get_session("p", sid).content)
+
+
+def test_parallel_incremental_many_returns_cursors_in_order(tmp_path):
+    _write_sessions(tmp_path / "sessions", 4)
+    _, history, _, _ = _setup(tmp_path)
+    adapter = ClaudeCodeAdapter(history, workers=2)
+    files = sorted((tmp_path / "sessions").glob("*.jsonl"))
+    results = adapter.ingest_incremental_many([(f, None) for f in files], "p")
+    assert [c["offset"] for _, c in results] == [f.stat().st_size for f in files]
+    assert [c["prompts"] for _, c in results] == [[f"prompt {i}"] for i in range(4)]
@@ -68,3 +68,18 @@ def test_detect_sessions(tmp_path):
     assert "notes.md" in names
     assert "log.txt" in names
     assert "code.py" not in names
+
+
+def test_parallel_ingest_matches_serial(tmp_path):
+    notes = tmp_path / "notes"
+    notes.mkdir()
+    for i in range(4):
+        (notes / f"n{i}.md").write_text(f"# Note {i}\nbody {i}")
+    serial, serial_ns = _setup(tmp_path / "a")
+    _, parallel_ns = _setup(tmp_path / "b")
+    parallel = GenericAdapter(parallel_ns, workers=2)
+    sids = serial.ingest(notes, "proj")
+    assert parallel.ingest(notes, "proj") == sids
+    for sid in sids:
+        path = f"/context/history/proj/{sid}"
+        assert parallel_ns.read(path).content == serial_ns.read(path).content
@@ -34,3 +34,105 @@ def test_mount_search(tmp_path):
     results = mount.search("search", tags=["error"])
     assert len(results) == 1
     assert results[0].metadata.source == "claude-code"
+
+
+def _node(path: str, content: str, tokens: int = 0) -> ContextNode:
+    ts = now_iso()
+    return ContextNode(path=path, node_type=NodeType.FILE,
+                       metadata=NodeMetadata(created_at=ts, updated_at=ts, token_estimate=tokens),
+                       content=content)
+
+
+def test_mount_root_prefixes_paths(tmp_path):
+    backend = FilesystemBackend(tmp_path / "store")
+    mount = FilesystemMount(backend, root="memory")
+    mount.write("proj/k", _node("/context/memory/proj/k", "v"))
+    assert backend.read("memory/proj/k").content == "v"
+    assert mount.list("") == ["proj"]
+    assert len(mount.search("proj")) == 1
+
+
+def test_cached_mount_serves_repeat_reads(tmp_path, monkeypatch):
+    from michigram.afs.mount import CachedMount
+    backend = FilesystemBackend(tmp_path / "store")
+    mount = CachedMount(FilesystemMount(backend))
+    mount.write("a", _node("a", "alpha"))
+    assert mount.read("a").content == "alpha"
+    monkeypatch.setattr(backend, "read", lambda rel: None)
+    first = mount.read("a")
+    first.metadata.tags.append("mutated")
+    assert mount.read("a").metadata.tags == []
+    assert mount.read_metadata("a").content == "alpha"
+    stats = mount.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    assert stats["size"] == len("alpha") + 1
+
+
+def test_cached_mount_invalidates_on_write_and_delete(tmp_path):
+    from michigram.afs.mount import CachedMount
+    mount = CachedMount(FilesystemMount(FilesystemBackend(tmp_path / "store")))
+    mount.write("a", _node("a", "one"))
+    mount.read("a")
+    mount.write("a", _node("a", "two"))
+    assert mount.read("a").content == "two"
+    mount.delete("a")
+    assert mount.read("a") is None
+    assert mount.stats()["entries"] == 0
+
+
+def test_cached_mount_evicts_to_size_bound(tmp_path):
+    from michigram.afs.mount import CachedMount
+    mount = CachedMount(FilesystemMount(FilesystemBackend(tmp_path / "store")),
+                        max_size=25, unit="tokens")
+    for name in ("a", "b", "c"):
+        mount.write(name, _node(name, name, tokens=10))
+        mount.read(name)
+    stats = mount.stats()
+    assert stats["entries"] == 2
+    assert stats["size"] == 20
+    mount.read("a")
+    assert mount.stats()["misses"] == 4
+
+
+def test_cached_mount_skips_fill_inside_batch(tmp_path):
+    from michigram.afs.mount import CachedMount
+    from michigram.storage.sqlite import SqliteBackend
+    backend = SqliteBackend(tmp_path / "test.db")
+    mount = CachedMount(FilesystemMount(backend))
+    try:
+        with mount.batch():
+            mount.write("a", _node("a", "pending"))
+            assert mount.read("a").content == "pending"
+            raise RuntimeError("rollback")
+    except RuntimeError:
+        pass
+    assert mount.read("a") is None
+    backend.close()
+
+
+def test_cached_mount_drops_fill_raced_by_write(tmp_path, monkeypatch):
+    import threading
+    from michigram.afs.mount import CachedMount
+    backend = FilesystemBackend(tmp_path / "store")
+    mount = CachedMount(FilesystemMount(backend))
+    mount.write("a", _node("a", "one"))
+    loaded, written = threading.Event(), threading.Event()
+    original = backend.read
+
+    def slow_read(rel):
+        node = original(rel)
+        if threading.current_thread() is reader:
+            loaded.set()
+            written.wait(5)
+        return node
+
+    reader = threading.Thread(target=mount.read, args=("a",))
+    monkeypatch.setattr(backend, "read", slow_read)
+    reader.start()
+    loaded.wait(5)
+    mount.write("a", _node("a", "two"))
+    written.set()
+    reader.join(5)
+    monkeypatch.setattr(backend, "read", original)
+    assert mount.read("a").content == "two"
@@ -83,3 +83,63 @@ def test_longest_prefix_match(tmp_path):
     ns.write("/context/special/item", node)
     assert backend2.read("item") is not None
     assert backend1.read("special/item") is None
+
+
+def test_write_many_across_mounts(tmp_path):
+    from michigram.storage.sqlite import SqliteBackend
+    fs = FilesystemBackend(tmp_path / "store")
+    db = SqliteBackend(tmp_path / "special.db")
+    ns = Namespace()
+    ns.mount("/context", FilesystemMount(fs))
+    ns.mount("/context/special", FilesystemMount(db))
+    ts = now_iso()
+    nodes = [
+        ContextNode(path=p, node_type=NodeType.FILE,
+                    metadata=NodeMetadata(created_at=ts, updated_at=ts), content=p)
+        for p in ("/context/a", "/context/special/b")
+    ]
+    assert ns.write_many((n.path, n) for n in nodes) == 2
+    assert ns.read("/context/a").content == "/context/a"
+    assert db.read("b").content == "/context/special/b"
+    db.close()
+
+
+def test_generation_tracks_prefix_writes(tmp_path):
+    ns = _make_ns(tmp_path)
+    ts = now_iso()
+    node = ContextNode(path="/context/memory/a/facts/k", node_type=NodeType.FILE,
+                       metadata=NodeMetadata(created_at=ts, updated_at=ts), content="v")
+    before_a = ns.generation("/context/memory/a")
+    before_b = ns.generation("/context/memory/b")
+    ns.write(node.path, node)
+    after_a = ns.generation("/context/memory/a")
+    assert after_a > before_a
+    assert ns.generation("/context/memory/b") == before_b
+    ns.delete(node.path)
+    assert ns.generation("/context/memory/a") > after_a
+
+
+def test_resolve_longest_prefix_by_segment(tmp_path):
+    root = FilesystemMount(FilesystemBackend(tmp_path / "a"))
+    deep = FilesystemMount(FilesystemBackend(tmp_path / "b"))
+    ns = Namespace()
+    ns.mount("/", root)
+    ns.mount("/context/memory", deep)
+    assert ns._resolve("/context/memory/p/k") == (deep, "p/k")
+    assert ns._resolve("/context/memory") == (deep, "")
+    assert ns._resolve("/context/memory-x/k") == (root, "context/memory-x/k")
+    assert ns._resolve("context/memory/") == (deep, "")
+
+
+def test_resolve_cache_invalidated_on_mount_changes(tmp_path):
+    ns = _make_ns(tmp_path)
+    outer = ns.mounts["/context"]
+    assert ns._resolve("/context/memory/k") == (outer, "memory/k")
+    inner = FilesystemMount(FilesystemBackend(tmp_path / "inner"))
+    ns.mount("/context/memory", inner)
+    assert ns._resolve("/context/memory/k") == (inner, "k")
+    ns.unmount("/context/memory")
+    assert ns._resolve("/context/memory/k") == (outer, "memory/k")
+    ns.unmount("/context")
+    with pytest.raises(KeyError):
+        ns._resolve("/context/memory/k")
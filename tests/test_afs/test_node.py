@@ -43,3 +43,16 @@ def test_node_from_dict_defaults():
 def test_node_type_values():
     assert NodeType.FILE.value == "file"
     assert NodeType.DIRECTORY.value == "directory"
+
+
+def test_load_deferred_content():
+    node = ContextNode(
+        path="/context/lazy",
+        node_type=NodeType.FILE,
+        metadata=NodeMetadata(created_at="2026-01-01T00:00:00Z", updated_at="2026-01-01T00:00:00Z"),
+        loader=lambda: "deferred",
+    )
+    assert node.content is None
+    assert not node.is_loaded
+    assert node.load().content == "deferred"
+    assert node.is_loaded
@@ -63,3 +63,79 @@ def test_cli_inject(tmp_path, monkeypatch, capsys):
     captured = capsys.readouterr()
     parsed = json.loads(captured.out)
     assert "hookSpecificOutput" in parsed
+
+
+def test_cli_uses_configured_backend(tmp_path, monkeypatch, capsys):
+    config_dir = tmp_path / ".michigram"
+    config_dir.mkdir(parents=True)
+
+    import argparse
+    import michigram.cli as cli_mod
+    from michigram.core.config import Config
+    from michigram.cli import cmd_memory
+
+    monkeypatch.setattr(cli_mod, "load_config",
+                        lambda p=None: Config(base_dir=config_dir, default_backend="sqlite"))
+
+    cmd_memory(argparse.Namespace(action="store", project=str(tmp_path), type="facts",
+                                  key="db", value="postgres"))
+    cmd_memory(argparse.Namespace(action="recall", project=str(tmp_path), type="facts",
+                                  key="db", value=""))
+    assert "postgres" in capsys.readouterr().out
+    assert (config_dir / "store.db").exists()
+    assert not (config_dir / "store").exists()
+
+
+def test_cli_capture_appends_to_growing_session(tmp_path, monkeypatch, capsys):
+    import argparse
+    import os
+    from michigram.adapters.claude_code import ClaudeCodeAdapter
+    from michigram.core.config import Config
+    from michigram.core.state import get_state
+    import michigram.cli as cli
+
+    config_dir = tmp_path / ".michigram"
+    config_dir.mkdir(parents=True)
+    monkeypatch.setattr(cli, "load_config", lambda p=None: Config(base_dir=config_dir))
+    transcript = tmp_path / "sess.jsonl"
+    transcript.write_text(json.dumps({"type": "summary", "summary": "S", "session_id": "s1"}) + "\n")
+    monkeypatch.setattr(ClaudeCodeAdapter, "detect_sessions", lambda self, p: [transcript])
+
+    args = argparse.Namespace(project=str(tmp_path), adapter="claude-code", workers=0)
+    cli.cmd_capture(args)
+    with open(transcript, "a") as f:
+        f.write(json.dumps({"type": "user", "message": {"content": "added later"}}) + "\n")
+    os.utime(transcript, (1, 1))
+    cli.cmd_capture(args)
+    assert "Captured 1 new sessions" in capsys.readouterr().out
+
+    entry = get_state(config_dir)["captured_sessions"][f"{tmp_path.name}:sess.jsonl"]
+    assert entry["offset"] == transcript.stat().st_size
+    _, history, _ = cli._build_stack(Config(base_dir=config_dir))
+    assert "added later" in history.get_session(tmp_path.name, "s1").content
+
+
+def test_cli_compact(tmp_path, monkeypatch, capsys):
+    import argparse
+    import michigram.cli as cli
+    from michigram.core.config import Config
+    from michigram.repository.memory import MemoryType
+
+    config_dir = tmp_path / ".michigram"
+    config_dir.mkdir(parents=True)
+    config = Config(base_dir=config_dir)
+    monkeypatch.setattr(cli, "load_config", lambda p=None: config)
+    _, _, memory = cli._build_stack(config)
+    for i in range(5):
+        memory.store("proj", MemoryType.FACT, "k", f"value {i}")
+
+    args = argparse.Namespace(keep_last=None, max_age_days=None, exponential=False,
+                              path="", backend="")
+    cli.cmd_compact(args)
+    assert "No retention policy" in capsys.readouterr().out
+
+    args.keep_last = 1
+    cli.cmd_compact(args)
+    assert "removed 3 old versions" in capsys.readouterr().out
+    _, _, memory = cli._build_stack(config)
+    assert memory.recall("proj", MemoryType.FACT, "k").content == "value 4"
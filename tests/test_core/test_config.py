@@ -32,3 +32,12 @@ def test_load_config_with_base_dir(tmp_path):
     config_file.write_text(json.dumps({"base_dir": "/custom/path"}))
     cfg = load_config(config_file)
     assert cfg.base_dir == Path("/custom/path")
+
+
+def test_load_config_sqlite_tuning(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({"sqlite_journal_mode": "delete", "sqlite_synchronous": "full"}))
+    cfg = load_config(config_file)
+    assert cfg.sqlite_journal_mode == "delete"
+    assert cfg.sqlite_synchronous == "full"
+    assert Config().sqlite_journal_mode == "wal"
@@ -1,3 +1,4 @@
+import pytest
 from pathlib import Path
 from michigram.core.primitives import atomic_write, now_iso, estimate_tokens, sha256_short
 
@@ -53,3 +54,12 @@ def test_sha256_short():
 
 def test_sha256_short_custom_length():
     assert len(sha256_short("test", length=8)) == 8
+
+
+def test_json_loads_falls_back_to_stdlib():
+    from michigram.core.primitives import json_loads
+    assert json_loads(b'{"a": [1, "x"]}') == {"a": [1, "x"]}
+    assert json_loads('{"n": NaN}')["n"] != 0
+    assert json_loads("[18446744073709551616]") == [2 ** 64]
+    with pytest.raises(ValueError):
+        json_loads(b'{"a": ')
@@ -25,3 +25,12 @@ def test_state_roundtrip(tmp_path):
     save_state(tmp_path, state)
     loaded = get_state(tmp_path)
     assert loaded == state
+
+
+def test_capture_cursor_roundtrip(tmp_path):
+    from michigram.core.state import get_capture_cursor, save_capture_cursor
+    assert get_capture_cursor(tmp_path, "proj:a.jsonl") is None
+    save_capture_cursor(tmp_path, "proj:a.jsonl", {"offset": 42})
+    assert get_capture_cursor(tmp_path, "proj:a.jsonl") == {"offset": 42}
+    save_capture_cursor(tmp_path, "proj:a.jsonl", None)
+    assert get_capture_cursor(tmp_path, "proj:a.jsonl") is None
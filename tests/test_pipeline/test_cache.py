@@ -0,0 +1,68 @@
+from michigram.afs.namespace import Namespace
+from michigram.afs.mount import FilesystemMount
+from michigram.storage.filesystem import FilesystemBackend
+from michigram.repository.history import HistoryRepository
+from michigram.repository.memory import MemoryRepository, MemoryType
+from michigram.pipeline.cache import ManifestCache
+from michigram.pipeline.constructor import ContextConstructor, ContextManifest
+
+
+def _setup(tmp_path, ttl_seconds=30.0):
+    backend = FilesystemBackend(tmp_path / "store")
+    ns = Namespace()
+    ns.mount("/context", FilesystemMount(backend))
+    history = HistoryRepository(ns)
+    memory = MemoryRepository(ns)
+    cache = ManifestCache(ttl_seconds=ttl_seconds)
+    return ContextConstructor(history, memory, cache=cache), memory, cache
+
+
+def test_repeat_construct_is_cached(tmp_path):
+    constructor, memory, cache = _setup(tmp_path)
+    memory.store("proj", MemoryType.FACT, "db", "PostgreSQL")
+    first = constructor.construct("proj")
+    second = constructor.construct("proj")
+    assert second is first
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_write_invalidates_only_that_project(tmp_path):
+    constructor, memory, cache = _setup(tmp_path)
+    memory.store("proj", MemoryType.FACT, "db", "PostgreSQL")
+    memory.store("other", MemoryType.FACT, "db", "MySQL")
+    first = constructor.construct("proj")
+    other = constructor.construct("other")
+
+    memory.store("proj", MemoryType.FACT, "lang", "Python")
+    refreshed = constructor.construct("proj")
+    assert refreshed is not first
+    assert len(refreshed.items) == 2
+    assert constructor.construct("other") is other
+
+    memory.forget("proj", MemoryType.FACT, "lang")
+    assert len(constructor.construct("proj").items) == 1
+
+
+def test_key_includes_budget_and_strategy(tmp_path):
+    constructor, memory, _ = _setup(tmp_path)
+    memory.store("proj", MemoryType.FACT, "db", "PostgreSQL")
+    a = constructor.construct("proj", 8000, "recency")
+    assert constructor.construct("proj", 8000, "relevance") is not a
+    assert constructor.construct("proj", 100, "recency") is not a
+
+
+def test_ttl_expires_entries(tmp_path):
+    constructor, memory, _ = _setup(tmp_path, ttl_seconds=0.0)
+    memory.store("proj", MemoryType.FACT, "db", "PostgreSQL")
+    first = constructor.construct("proj")
+    assert constructor.construct("proj") is not first
+
+
+def test_lru_eviction():
+    cache = ManifestCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, 1, ContextManifest())
+    assert cache.get("a", 1) is None
+    assert cache.get("c", 1) is not None
+    assert cache.stats()["entries"] == 2
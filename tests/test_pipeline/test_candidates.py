@@ -0,0 +1,64 @@
+import math
+import random
+
+import pytest
+
+from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+from michigram.pipeline import candidates
+from michigram.pipeline.candidates import CandidateTable, descending, epoch_seconds
+
+
+@pytest.fixture(params=["numpy", "pure-python"])
+def scoring(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(candidates, "np", None)
+    return request.param
+
+
+def _node(path, updated_at, tokens=10, tags=()):
+    return ContextNode(path=path, node_type=NodeType.FILE,
+                       metadata=NodeMetadata(created_at=updated_at, updated_at=updated_at,
+                                             token_estimate=tokens, tags=list(tags)))
+
+
+def _array(values):
+    return candidates.np.asarray(values, dtype=float) if candidates.np is not None else values
+
+
+def test_epoch_seconds():
+    assert epoch_seconds("1970-01-02T00:00:00+00:00") == 86400
+    assert epoch_seconds("1970-01-02T00:00:00Z") == 86400
+    assert epoch_seconds("1970-01-02T00:00:00") == 86400
+    assert epoch_seconds("") == 0.0
+
+
+def test_descending_matches_stable_sort(scoring, monkeypatch):
+    monkeypatch.setattr(candidates, "RANK_HEAD", 3)
+    rng = random.Random(1)
+    values = [float(rng.randrange(8)) for _ in range(50)]
+    expected = sorted(range(len(values)), key=lambda i: (-values[i], i))
+    assert list(descending(_array(values))) == expected
+
+
+def test_decay_keys(scoring):
+    day = 86400.0
+    table = CandidateTable.from_nodes([
+        (0, _node("/a", "1970-01-11T00:00:00+00:00")),
+        (1, _node("/b", "1970-01-10T00:00:00+00:00")),
+        (0, _node("/c", "1970-01-12T00:00:00+00:00")),
+    ])
+    keys = table.decay_keys([1.0, 0.5], now=11 * day, half_life=day)
+    assert [2 ** (k - 11) for k in keys] == pytest.approx([0.5, 0.125, 1.0])
+    assert list(descending(keys)) == [2, 0, 1]
+    assert list(table.decay_keys([0.0, 0.5], now=11 * day, half_life=day))[0] == -math.inf
+
+
+def test_tag_bitsets(scoring):
+    rows = [(0, _node(f"/n{i}", "1970-01-01T00:00:00", tags=[f"t{i}", "all"])) for i in range(70)]
+    table = CandidateTable.from_nodes(rows)
+    scores = table.with_tags(table.decay_keys([1.0], 0.0, 1.0), ["t65", "all"])
+    assert [i for i, s in enumerate(scores) if s != -math.inf] == [65]
+    assert all(s == -math.inf for s in table.with_tags(scores, ["missing"]))
+    assert table.min_tokens == 10
@@ -1,9 +1,11 @@
+import pytest
+
 from michigram.afs.namespace import Namespace
 from michigram.afs.mount import FilesystemMount
 from michigram.storage.filesystem import FilesystemBackend
 from michigram.repository.history import HistoryRepository
 from michigram.repository.memory import MemoryRepository, MemoryType
-from michigram.pipeline.constructor import ContextConstructor
+from michigram.pipeline.constructor import MEMORY_TYPE_PRIORITY, ContextConstructor
 
 
 def _setup(tmp_path):
@@ -16,6 +18,14 @@ def _setup(tmp_path):
     return ContextConstructor(history, memory), history, memory
 
 
+def _setup_with_backend(tmp_path):
+    backend = FilesystemBackend(tmp_path / "store")
+    ns = Namespace()
+    ns.mount("/context", FilesystemMount(backend))
+    memory = MemoryRepository(ns)
+    return ContextConstructor(HistoryRepository(ns), memory), memory, backend
+
+
 def test_empty_construct(tmp_path):
     constructor, _, _ = _setup(tmp_path)
     manifest = constructor.construct("proj")
@@ -56,3 +66,240 @@ def test_construct_relevance_strategy(tmp_path):
     assert manifest.strategy == "relevance"
     assert len(manifest.items) == 2
     assert "/facts/" in manifest.items[0].path
+
+
+def test_construct_loads_only_selected_content(tmp_path, monkeypatch):
+    constructor, memory, backend = _setup_with_backend(tmp_path)
+    memory.store("proj", MemoryType.FACT, "big", "x" * 1000)
+    memory.store("proj", MemoryType.FACT, "small", "y")
+
+    def fail_read(rel_path):
+        raise AssertionError(f"full read of {rel_path}")
+
+    monkeypatch.setattr(backend, "read", fail_read)
+    manifest = constructor.construct("proj", token_budget=100)
+    assert [n.content for n in manifest.items] == ["y"]
+
+
+def _populate(ns, rng, count):
+    from datetime import datetime, timedelta, timezone
+    from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    types = [mt.value for mt in MemoryType]
+    for i in range(count):
+        ts = (start + timedelta(seconds=rng.randrange(10**6))).isoformat()
+        if i % 3 == 0:
+            path = f"/context/history/proj/s{i}"
+        else:
+            path = f"/context/memory/proj/{rng.choice(types)}/k{i}"
+        meta = NodeMetadata(created_at=ts, updated_at=ts, token_estimate=rng.randrange(1, 400))
+        ns.write(path, ContextNode(path=path, node_type=NodeType.FILE, metadata=meta,
+                                   content=f"content {i}"))
+
+
+def _full_sort_greedy(history, memory, strategy, budget):
+    """The constructor's selection before streaming: score everything, then walk."""
+    candidates = []
+    for mt in MemoryType:
+        candidates.extend(memory.recall_all("proj", mt, include_content=False))
+    for sid in history.list_sessions("proj"):
+        candidates.append(history.get_session("proj", sid, include_content=False))
+    if strategy == "relevance":
+        def key(n):
+            for mt in MemoryType:
+                if f"/{mt.value}/" in n.path:
+                    return (MEMORY_TYPE_PRIORITY[mt], n.metadata.updated_at)
+            return (100, n.metadata.updated_at)
+        candidates.sort(key=key)
+    else:
+        candidates.sort(key=lambda n: n.metadata.updated_at, reverse=True)
+    picked, total = [], 0
+    for n in candidates:
+        if total + n.metadata.token_estimate <= budget:
+            picked.append(n.path)
+            total += n.metadata.token_estimate
+    return picked, len(candidates) - len(picked)
+
+
+@pytest.mark.parametrize("kind", ["filesystem", "sqlite"])
+@pytest.mark.parametrize("strategy", ["recency", "relevance"])
+def test_streaming_selection_matches_full_sort(tmp_path, kind, strategy):
+    import random
+    from michigram.storage.sqlite import SqliteBackend
+    if kind == "filesystem":
+        backend = FilesystemBackend(tmp_path / "store")
+    else:
+        backend = SqliteBackend(tmp_path / "store.db")
+    ns = Namespace()
+    ns.mount("/context", FilesystemMount(backend))
+    history, memory = HistoryRepository(ns), MemoryRepository(ns)
+    _populate(ns, random.Random(7), 300)
+    constructor = ContextConstructor(history, memory)
+    for budget in (0, 150, 2000, 100000):
+        manifest = constructor.construct("proj", token_budget=budget, strategy=strategy)
+        expected, excluded = _full_sort_greedy(history, memory, strategy, budget)
+        assert [n.path for n in manifest.items] == expected
+        assert manifest.excluded_count == excluded
+
+
+def test_streaming_selection_stops_early(tmp_path, monkeypatch):
+    import random
+    constructor, memory, backend = _setup_with_backend(tmp_path)
+    ns = memory._ns
+    _populate(ns, random.Random(3), 500)
+    reads = []
+    original = backend.read_metadata
+    monkeypatch.setattr(backend, "read_metadata", lambda rel: reads.append(rel) or original(rel))
+    manifest = constructor.construct("proj", token_budget=50)
+    assert manifest.total_tokens <= 50
+    assert manifest.excluded_count == 500 - len(manifest.items)
+    assert len(reads) < 200
+
+
+def test_optimal_packs_at_least_as_much_as_greedy(tmp_path):
+    import random
+    constructor, memory, _ = _setup_with_backend(tmp_path)
+    _populate(memory._ns, random.Random(11), 60)
+    for budget in (300, 1000, 4000):
+        greedy = constructor.construct("proj", token_budget=budget)
+        optimal = constructor.construct("proj", token_budget=budget, strategy="optimal")
+        assert optimal.strategy == "optimal"
+        assert optimal.total_tokens <= budget
+        assert optimal.token_budget == budget
+        assert optimal.utilization == optimal.total_tokens / budget
+        assert optimal.excluded_count == 60 - len(optimal.items)
+    assert constructor.construct("proj", token_budget=0).utilization == 0.0
+
+
+def test_optimal_fills_gap_greedy_leaves(tmp_path):
+    from datetime import datetime, timedelta, timezone
+    from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+    constructor, memory, _ = _setup_with_backend(tmp_path)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    # Newest first: greedy takes 60 and then has no room for either 50.
+    for age, tokens in enumerate((60, 50, 50)):
+        ts = (start - timedelta(hours=age)).isoformat()
+        path = f"/context/memory/proj/facts/k{age}"
+        meta = NodeMetadata(created_at=ts, updated_at=ts, token_estimate=tokens)
+        memory._ns.write(path, ContextNode(path=path, node_type=NodeType.FILE, metadata=meta,
+                                           content="x"))
+    assert constructor.construct("proj", token_budget=100).total_tokens == 60
+    optimal = constructor.construct("proj", token_budget=100, strategy="optimal")
+    assert optimal.total_tokens == 100
+    assert optimal.utilization == 1.0
+
+
+@pytest.mark.parametrize("kind", ["filesystem", "sqlite"])
+def test_lexical_strategy_ranks_matches_first(tmp_path, kind):
+    from michigram.storage.sqlite import SqliteBackend
+    if kind == "filesystem":
+        backend = FilesystemBackend(tmp_path / "store")
+    else:
+        backend = SqliteBackend(tmp_path / "store.db")
+    ns = Namespace()
+    ns.mount("/context", FilesystemMount(backend))
+    memory = MemoryRepository(ns)
+    constructor = ContextConstructor(HistoryRepository(ns), memory)
+    memory.store("proj", MemoryType.FACT, "db", "The database is PostgreSQL with pgbouncer")
+    memory.store("proj", MemoryType.FACT, "cache", "Redis caches sessions")
+    memory.store("proj", MemoryType.EPISODIC, "deploy", "Deploys run through GitHub Actions")
+    manifest = constructor.construct("proj", strategy="lexical", query="postgresql pool")
+    assert manifest.strategy == "lexical"
+    assert manifest.items[0].path.endswith("/facts/db")
+    assert len(manifest.items) == 3
+    memory.forget("proj", MemoryType.FACT, "db")
+    manifest = constructor.construct("proj", strategy="lexical", query="postgresql pool")
+    assert [n.path.rsplit("/", 1)[-1] for n in manifest.items] == ["deploy", "cache"]
+
+
+def test_semantic_strategy_ranks_by_similarity(tmp_path):
+    from michigram.storage.vectors import HashingEmbedder
+    backend = FilesystemBackend(tmp_path / "store", embedder=HashingEmbedder(128))
+    ns = Namespace()
+    ns.mount("/context", FilesystemMount(backend))
+    memory = MemoryRepository(ns)
+    constructor = ContextConstructor(HistoryRepository(ns), memory)
+    memory.store("proj", MemoryType.FACT, "db", "The database is PostgreSQL with pgbouncer pooling")
+    memory.store("proj", MemoryType.FACT, "cache", "Redis caches sessions")
+    manifest = constructor.construct("proj", strategy="semantic",
+                                     query="how is the postgresql pooling set up")
+    assert manifest.strategy == "semantic"
+    assert [n.path.rsplit("/", 1)[-1] for n in manifest.items] == ["db", "cache"]
+    manifest = constructor.construct("proj", strategy="semantic")
+    assert [n.path.rsplit("/", 1)[-1] for n in manifest.items] == ["cache", "db"]
+
+
+def _write_at(ns, path, age_days, tokens=10, tags=()):
+    from datetime import datetime, timedelta, timezone
+    from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+    ts = (datetime.now(timezone.utc) - timedelta(days=age_days)).isoformat()
+    meta = NodeMetadata(created_at=ts, updated_at=ts, token_estimate=tokens, tags=list(tags))
+    ns.write(path, ContextNode(path=path, node_type=NodeType.FILE, metadata=meta, content=path))
+
+
+def test_decay_strategy_weighs_tier_against_age(tmp_path):
+    constructor, memory, _ = _setup_with_backend(tmp_path)
+    ns = memory._ns
+    _write_at(ns, "/context/memory/proj/facts/old", age_days=14)
+    _write_at(ns, "/context/memory/proj/facts/new", age_days=1)
+    _write_at(ns, "/context/history/proj/s1", age_days=0)
+    _write_at(ns, "/context/memory/proj/user/pref", age_days=3)
+    manifest = constructor.construct("proj", token_budget=1000, strategy="decay")
+    assert manifest.strategy == "decay"
+    # fact 1d: 0.905, session 0d: 0.5, user 3d: 0.44, fact 14d: 0.25
+    assert [n.path.rsplit("/", 1)[-1] for n in manifest.items] == ["new", "s1", "pref", "old"]
+    assert manifest.items[0].content == "/context/memory/proj/facts/new"
+    manifest = constructor.construct("proj", token_budget=20, strategy="decay")
+    assert [n.path.rsplit("/", 1)[-1] for n in manifest.items] == ["new", "s1"]
+    assert manifest.excluded_count == 2
+
+
+def test_decay_table_rebuilt_after_write(tmp_path):
+    constructor, memory, _ = _setup_with_backend(tmp_path)
+    ns = memory._ns
+    _write_at(ns, "/context/memory/proj/facts/a", age_days=1)
+    assert len(constructor.construct("proj", strategy="decay").items) == 1
+    _write_at(ns, "/context/memory/proj/facts/b", age_days=0)
+    memory.forget("proj", MemoryType.FACT, "a")
+    manifest = constructor.construct("proj", strategy="decay")
+    assert [n.path.rsplit("/", 1)[-1] for n in manifest.items] == ["b"]
+
+
+@pytest.mark.parametrize("strategy", ["recency", "relevance", "optimal", "decay"])
+def test_tags_filter_candidates(tmp_path, strategy):
+    constructor, memory, _ = _setup_with_backend(tmp_path)
+    ns = memory._ns
+    _write_at(ns, "/context/memory/proj/facts/db", age_days=1, tags=["infra", "db"])
+    _write_at(ns, "/context/memory/proj/facts/ui", age_days=1, tags=["frontend"])
+    _write_at(ns, "/context/history/proj/s1", age_days=0, tags=["infra"])
+    manifest = constructor.construct("proj", strategy=strategy, tags=["infra"])
+    assert sorted(n.path.rsplit("/", 1)[-1] for n in manifest.items) == ["db", "s1"]
+    manifest = constructor.construct("proj", strategy=strategy, tags=["infra", "db"])
+    assert [n.path.rsplit("/", 1)[-1] for n in manifest.items] == ["db"]
+
+
+@pytest.mark.parametrize("kind", ["filesystem", "sqlite"])
+def test_semantic_strategy_without_numpy_or_sessions(tmp_path, monkeypatch, kind):
+    from michigram.storage import vectors
+    from michigram.storage.sqlite import SqliteBackend
+    monkeypatch.setattr(vectors, "np", None)
+    embedder = vectors.HashingEmbedder(64)
+    if kind == "sqlite":
+        backend = SqliteBackend(tmp_path / "store.db", embedder=embedder)
+    else:
+        backend = FilesystemBackend(tmp_path / "store", embedder=embedder)
+    ns = Namespace()
+    ns.mount("/context", FilesystemMount(backend))
+    memory = MemoryRepository(ns)
+    memory.store("proj", MemoryType.FACT, "db", "The database is PostgreSQL")
+    manifest = ContextConstructor(HistoryRepository(ns), memory).construct(
+        "proj", strategy="semantic", query="postgresql database")
+    assert [n.path.rsplit("/", 1)[-1] for n in manifest.items] == ["db"]
+
+
+@pytest.mark.parametrize("half_life", [0, -3600.0])
+def test_decay_half_life_must_be_positive(tmp_path, half_life):
+    ns = Namespace()
+    ns.mount("/context", FilesystemMount(FilesystemBackend(tmp_path / "store")))
+    with pytest.raises(ValueError):
+        ContextConstructor(HistoryRepository(ns), MemoryRepository(ns), decay_half_life=half_life)
@@ -1,3 +1,5 @@
+import pytest
+
 from michigram.afs.namespace import Namespace
 from michigram.afs.mount import FilesystemMount
 from michigram.storage.filesystem import FilesystemBackend
@@ -101,3 +103,98 @@ def test_dedup_file_patterns(tmp_path):
     patterns_b = evaluator._extract_patterns(content_b)
 
     assert patterns_a.keys() == patterns_b.keys()
+
+
+def test_register_rule_per_project(tmp_path):
+    from michigram.pipeline.extraction import ExtractionRule
+    evaluator, _, _ = _setup(tmp_path)
+    evaluator.register_rule(ExtractionRule("ticket", r"\b([A-Z]+-\d+)\b",
+                                           lambda v: [("t_" + v, f"Ticket: {v}")]), project="a")
+    content = "## Summary\nworking on PROJ-42"
+    assert evaluator._extract_facts(content, "a") == {"t_PROJ-42": "Ticket: PROJ-42"}
+    assert evaluator._extract_facts(content, "b") == {}
+
+
+def _ingest_many(history, tmp_path, count):
+    import json
+    for i in range(count):
+        path = tmp_path / f"s{i}.jsonl"
+        path.write_text("\n".join(json.dumps(e) for e in [
+            {"type": "summary", "summary": f"We use tool{i} here", "session_id": f"s{i:02d}"},
+            {"type": "user", "message": {"content": f"prompt {i}"}},
+            {"type": "assistant", "message": {"content": [
+                {"type": "tool_use", "name": "Edit", "input": {"file_path": f"/src/m{i}.py"}}]}},
+        ]) + "\n")
+        history.ingest_session(path, "proj")
+
+
+def test_continuous_learn_parallel_matches_serial(tmp_path):
+    serial, serial_history, serial_memory = _setup(tmp_path / "a")
+    parallel, parallel_history, parallel_memory = _setup(tmp_path / "b")
+    _ingest_many(serial_history, tmp_path, 10)
+    _ingest_many(parallel_history, tmp_path, 10)
+    expected = serial.continuous_learn("proj")
+    evaluated = set()
+    assert parallel.continuous_learn("proj", evaluated, workers=2, batch_size=4) == expected
+    assert len(evaluated) == 10
+    for mt in (MemoryType.FACT, MemoryType.EXPERIENTIAL):
+        assert ({n.path.split("/")[-1]: n.content for n in parallel_memory.recall_all("proj", mt)}
+                == {n.path.split("/")[-1]: n.content for n in serial_memory.recall_all("proj", mt)})
+
+
+def test_continuous_learn_resumes_after_crash(tmp_path, monkeypatch):
+    evaluator, history, _ = _setup(tmp_path)
+    _ingest_many(history, tmp_path, 5)
+    checkpoints = []
+    calls = {"n": 0}
+    original = evaluator._store_results
+
+    def flaky(*args):
+        calls["n"] += 1
+        if calls["n"] == 4:
+            raise RuntimeError("crash")
+        return original(*args)
+
+    monkeypatch.setattr(evaluator, "_store_results", flaky)
+    with pytest.raises(RuntimeError):
+        evaluator.continuous_learn("proj", set(), batch_size=2,
+                                   checkpoint=lambda ids: checkpoints.append(sorted(ids)))
+    assert checkpoints == [["s00", "s01"]]
+
+    monkeypatch.setattr(evaluator, "_store_results", original)
+    resumed = set(checkpoints[-1])
+    evaluator.continuous_learn("proj", resumed, batch_size=2)
+    assert resumed == {"s00", "s01", "s02", "s03", "s04"}
+
+
+def test_continuous_learn_unpicklable_rules_fall_back_to_serial(tmp_path):
+    from michigram.pipeline.extraction import ExtractionRule
+    evaluator, history, memory = _setup(tmp_path)
+    _ingest_many(history, tmp_path, 2)
+    evaluator.register_rule(ExtractionRule("tool_n", r"(tool\d+)", lambda v: [(v, v.upper())]))
+    evaluator.continuous_learn("proj", workers=2)
+    assert memory.recall("proj", MemoryType.FACT, "tool1").content == "TOOL1"
+
+
+def test_continuous_learn_reuses_executor_above_threshold(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    from michigram.pipeline.evaluator import PARALLEL_MIN_SESSIONS
+
+    class CountingExecutor(ThreadPoolExecutor):
+        calls = 0
+
+        def map(self, *args, **kwargs):
+            CountingExecutor.calls += 1
+            return super().map(*args, **kwargs)
+
+    evaluator, history, _ = _setup(tmp_path)
+    _ingest_many(history, tmp_path, PARALLEL_MIN_SESSIONS - 1)
+    with CountingExecutor(max_workers=2) as pool:
+        evaluated = set()
+        evaluator.continuous_learn("proj", evaluated, executor=pool)
+        assert CountingExecutor.calls == 0
+        _ingest_many(history, tmp_path, PARALLEL_MIN_SESSIONS + 2)
+        evaluated.clear()
+        evaluator.continuous_learn("proj", evaluated, executor=pool, batch_size=5)
+        assert CountingExecutor.calls == 2
+        assert len(evaluated) == PARALLEL_MIN_SESSIONS + 2
@@ -0,0 +1,33 @@
+import pytest
+
+from michigram.core.primitives import sha256_short
+from michigram.pipeline.extraction import ExtractionRule, FactExtractor
+
+
+def test_first_rule_in_group_wins_over_leftmost_match():
+    facts = FactExtractor().extract("git push after we use pytest")
+    assert facts == [(sha256_short("pytest", 8), "pytest")]
+
+
+def test_independent_rules_fire_on_one_line():
+    facts = dict(FactExtractor().extract("Edit: /src/app/main.py raised KeyError"))
+    assert facts[sha256_short("dir_/src/app", 8)] == "Project dir: /src/app"
+    assert facts[sha256_short("ext_.py", 8)] == "File type: .py"
+    assert facts[sha256_short("errtype_KeyError", 8)] == "Error encountered: KeyError"
+
+
+def test_whole_match_used_when_rule_has_no_group():
+    assert FactExtractor().extract("then Cargo build") == [(sha256_short("Cargo build", 8), "Cargo build")]
+
+
+def test_no_match_yields_nothing():
+    assert FactExtractor().extract("nothing to see here") == []
+
+
+def test_register_rule_recompiles():
+    extractor = FactExtractor()
+    extractor.extract("ticket JIRA-123")
+    extractor.register(ExtractionRule("ticket", r"\b([A-Z]+-\d+)\b"))
+    assert extractor.extract("ticket JIRA-123") == [(sha256_short("ticket_JIRA-123", 8), "JIRA-123")]
+    with pytest.raises(ValueError):
+        extractor.register(ExtractionRule("ticket", r"x"))
@@ -0,0 +1,57 @@
+import itertools
+import random
+
+from michigram.pipeline.packing import greedy_pack, knapsack_pack
+
+
+def _brute_force(costs, values, capacity):
+    best = 0.0
+    for r in range(len(costs) + 1):
+        for combo in itertools.combinations(range(len(costs)), r):
+            if sum(costs[i] for i in combo) <= capacity:
+                best = max(best, sum(values[i] for i in combo))
+    return best
+
+
+def test_greedy_pack_takes_what_fits_in_order():
+    assert greedy_pack([60, 50, 50, 40], 100) == [0, 3]
+
+
+def test_knapsack_matches_brute_force():
+    rng = random.Random(5)
+    for _ in range(50):
+        n = rng.randrange(1, 10)
+        costs = [rng.randrange(1, 200) for _ in range(n)]
+        values = [float(rng.randrange(1, 100)) for _ in range(n)]
+        capacity = rng.randrange(1, 500)
+        chosen = knapsack_pack(costs, values, capacity)
+        assert sum(costs[i] for i in chosen) <= capacity
+        assert sum(values[i] for i in chosen) == _brute_force(costs, values, capacity)
+
+
+def test_knapsack_never_worse_than_greedy():
+    rng = random.Random(9)
+    for _ in range(20):
+        costs = [rng.randrange(1, 3000) for _ in range(100)]
+        values = [float(c) for c in costs]
+        capacity = rng.randrange(1000, 50000)
+        chosen = knapsack_pack(costs, values, capacity)
+        assert chosen == sorted(set(chosen))
+        assert sum(costs[i] for i in chosen) <= capacity
+        assert sum(costs[i] for i in chosen) >= sum(costs[i] for i in greedy_pack(costs, capacity))
+
+
+def test_knapsack_time_limit_falls_back_to_greedy():
+    costs = [60, 50, 50]
+    assert knapsack_pack(costs, [1.0, 1.0, 1.0], 100, time_limit=0) == [0]
+    assert knapsack_pack(costs, [1.0, 1.0, 1.0], 100) == [1, 2]
+
+
+def test_knapsack_above_resolution_is_approximate_but_valid():
+    # Rounded up to 4-token slots, 878 + 902 no longer fits in 1782.
+    costs = [878, 486, 902, 53, 909, 611, 1429]
+    values = [float(c) for c in costs]
+    chosen = knapsack_pack(costs, values, 1782)
+    value = sum(values[i] for i in chosen)
+    assert sum(costs[i] for i in chosen) <= 1782
+    assert sum(values[i] for i in greedy_pack(costs, 1782)) <= value < _brute_force(costs, values, 1782)
@@ -76,3 +76,106 @@ def test_ingest_extracts_errors(tmp_path, real_schema_jsonl):
     sid = repo.ingest_session(real_schema_jsonl, "testproj")
     node = repo.get_session("testproj", sid)
     assert "ImportError" in node.content
+
+
+def test_ingest_without_session_id_hashes_file(tmp_path):
+    from michigram.core.primitives import sha256_short
+    path = tmp_path / "anon.jsonl"
+    path.write_text('{"type": "user", "message": {"content": "hello"}}\nnot json\n\n')
+    repo = _make_repo(tmp_path)
+    sid = repo.ingest_session(path, "testproj")
+    assert sid == sha256_short(path.read_text())
+    assert "- hello" in repo.get_session("testproj", sid).content
+
+
+def test_ingest_falls_back_to_head_of_transcript(tmp_path):
+    path = tmp_path / "raw.jsonl"
+    path.write_text("plain text line\n" * 500)
+    repo = _make_repo(tmp_path)
+    sid = repo.ingest_session(path, "testproj", session_id="raw")
+    content = repo.get_session("testproj", sid).content
+    assert content.startswith("plain text line\n")
+    assert len(content) == 2000
+
+
+def test_parse_session_truncates_kept_pieces(tmp_path):
+    import json
+    from michigram.repository.history import parse_session
+    path = tmp_path / "big.jsonl"
+    with open(path, "w") as f:
+        f.write(json.dumps({"type": "user", "message": {"content": "x" * 10000}}) + "\n")
+        f.write(json.dumps({"type": "result", "is_error": True, "content": "e" * 10000}) + "\n")
+    digest = parse_session(path, "big")
+    assert digest.prompts == ["x" * 200]
+    assert digest.errors == ["e" * 200]
+
+
+def test_ingest_incremental_parses_only_appended_tail(tmp_path, monkeypatch):
+    import json
+    from michigram.repository import history as history_mod
+    path = tmp_path / "live.jsonl"
+    first = json.dumps({"type": "summary", "summary": "Live", "session_id": "live1"}) + "\n"
+    path.write_text(first + json.dumps({"type": "user", "message": {"content": "one"}}) + "\n")
+    repo = _make_repo(tmp_path)
+    digest = repo.ingest_incremental(path, "testproj")
+    assert digest.offset == path.stat().st_size
+
+    fed = []
+    original = history_mod.SessionDigest.feed
+    monkeypatch.setattr(history_mod.SessionDigest, "feed",
+                        lambda self, entry: (fed.append(entry), original(self, entry)))
+    with open(path, "a") as f:
+        f.write(json.dumps({"type": "user", "message": {"content": "two"}}) + "\n")
+        f.write('{"type": "user", "mess')
+    digest = repo.ingest_incremental(path, "testproj", history_mod.SessionDigest.from_dict(digest.to_dict()))
+    assert [e["message"]["content"] for e in fed] == ["two"]
+    assert digest.offset < path.stat().st_size
+    with open(path, "a") as f:
+        f.write('age": {"content": "three"}}\n')
+    digest = repo.ingest_incremental(path, "testproj", digest)
+    assert digest.offset == path.stat().st_size
+    content = repo.get_session("testproj", "live1").content
+    assert "- one\n- two\n- three" in content
+
+
+def test_ingest_incremental_restarts_when_transcript_shrinks(tmp_path):
+    path = tmp_path / "s.jsonl"
+    path.write_text('{"type": "user", "message": {"content": "long prompt"}}\n' * 3)
+    repo = _make_repo(tmp_path)
+    digest = repo.ingest_incremental(path, "testproj")
+    sid = digest.session_id
+    path.write_text('{"type": "user", "message": {"content": "new"}}\n')
+    digest = repo.ingest_incremental(path, "testproj", digest)
+    assert digest.session_id == sid
+    assert digest.prompts == ["new"]
+
+
+def test_type_prefilter_matches_full_decode(tmp_path, monkeypatch):
+    import json
+    from michigram.repository import history as history_mod
+    entries = [
+        {"type": "summary", "summary": "S", "session_id": "pf"},
+        {"type": "system", "content": "boot"},
+        {"type": "user", "message": {"content": "plain prompt"}},
+        {"type": "user", "message": {"content": [
+            {"type": "tool_result", "content": 'out {"type": "text", "text": "not a block"}'}]}},
+        {"type": "user", "message": {"content": [
+            {"type": "tool_result", "content": "x"}, {"type": "text", "text": "mixed"}]}},
+        {"message": {"content": [{"type": "text", "text": "no top-level type"}]}, "type" : "human"},
+        {"type": "assistant", "message": {"content": [{"type": "text", "text": "reply"}]}},
+        {"type": "result", "is_error": True, "content": "boom"},
+    ]
+    path = tmp_path / "mixed.jsonl"
+    path.write_text("\n".join(json.dumps(e) for e in entries) + "\n")
+    filtered = history_mod.parse_session(path)
+    monkeypatch.setattr(history_mod, "_may_matter", lambda raw: True)
+    assert history_mod.parse_session(path) == filtered
+    assert filtered.prompts == ["plain prompt", "mixed", "no top-level type"]
+
+
+def test_digest_head_decodes_bounded_prefix():
+    from michigram.repository.history import HEAD_CHARS, SessionDigest
+    line = ("é" * HEAD_CHARS * 3).encode() + b"\n"
+    digest = SessionDigest()
+    digest.feed_line(line)
+    assert digest.head == line.decode()[:HEAD_CHARS]
@@ -75,3 +75,42 @@ def test_version_increments(tmp_path):
     repo.store("proj", MemoryType.FACT, "x", "v3")
     node = repo.recall("proj", MemoryType.FACT, "x")
     assert node.metadata.version == 3
+
+
+def test_store_same_value_only_counts_sighting(tmp_path):
+    repo = _make_repo(tmp_path)
+    repo.store("proj", MemoryType.FACT, "ext", "File type: .py", source="evaluator")
+    repo.store("proj", MemoryType.FACT, "ext", "File type: .py", source="evaluator")
+    repo.store("proj", MemoryType.FACT, "ext", "File type: .py", source="evaluator")
+    node = repo.recall("proj", MemoryType.FACT, "ext")
+    assert node.metadata.version == 1
+    assert node.metadata.extra["seen_count"] == 3
+    assert "last_seen_at" in node.metadata.extra
+    assert node.content == "File type: .py"
+    assert not (tmp_path / "store" / ".versions").exists()
+
+
+def test_store_changed_source_or_tags_writes_version(tmp_path):
+    repo = _make_repo(tmp_path)
+    repo.store("proj", MemoryType.FACT, "k", "v", tags=["a"])
+    repo.store("proj", MemoryType.FACT, "k", "v", tags=["b"])
+    node = repo.recall("proj", MemoryType.FACT, "k")
+    assert node.metadata.version == 2
+    assert node.metadata.tags == ["b"]
+    assert "seen_count" not in node.metadata.extra
+
+
+def test_store_compares_content_of_nodes_without_hash(tmp_path):
+    from michigram.afs.node import ContextNode, NodeMetadata, NodeType
+    repo = _make_repo(tmp_path)
+    path = "/context/memory/proj/facts/old"
+    repo._ns.write(path, ContextNode(path=path, node_type=NodeType.FILE,
+                                     metadata=NodeMetadata(created_at="2024-01-01T00:00:00Z",
+                                                           updated_at="2024-01-01T00:00:00Z",
+                                                           source="user"),
+                                     content="legacy"))
+    repo.store("proj", MemoryType.FACT, "old", "legacy")
+    node = repo.recall("proj", MemoryType.FACT, "old")
+    assert node.metadata.version == 1
+    assert node.metadata.extra["seen_count"] == 2
+    assert node.metadata.extra["content_hash"]
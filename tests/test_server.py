@@ -43,6 +43,7 @@ def test_status(tmp_path):
     status, data = _get(port, "/status")
     assert status == 200
     assert data["status"] == "ok"
+    assert data["manifest_cache"]["hits"] == 0
     server.shutdown()
 
 
@@ -69,6 +70,25 @@ def test_memory_crud(tmp_path):
     server.shutdown()
 
 
+def test_concurrent_posts_to_one_key_each_add_a_version(tmp_path):
+    server, port = _start_server(tmp_path)
+    start = threading.Barrier(8)
+
+    def post(i):
+        start.wait()
+        for j in range(4):
+            _post(port, "/context/memory/proj/facts/db", {"value": f"v{i}-{j}"})
+
+    threads = [threading.Thread(target=post, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    status, data = _get(port, "/context/memory/proj/facts/db")
+    assert data["version"] == 32
+    server.shutdown()
+
+
 def test_inject(tmp_path):
     server, port = _start_server(tmp_path)
     status, data = _get(port, "/context/inject?project=testproj")
@@ -78,8 +98,47 @@ def test_inject(tmp_path):
     server.shutdown()
 
 
+def test_inject_served_from_cache(tmp_path):
+    server, port = _start_server(tmp_path)
+    _post(port, "/context/memory/proj/facts/db", {"value": "PostgreSQL"})
+    _, first = _get(port, "/context/inject?project=proj")
+    _, second = _get(port, "/context/inject?project=proj")
+    assert first == second
+    _post(port, "/context/memory/proj/facts/lang", {"value": "Python"})
+    _, third = _get(port, "/context/inject?project=proj")
+    assert len(third["items"]) == 2
+    _, status = _get(port, "/status")
+    assert status["manifest_cache"]["hits"] == 1
+    assert status["manifest_cache"]["misses"] == 2
+    server.shutdown()
+
+
 def test_not_found(tmp_path):
     server, port = _start_server(tmp_path)
     status, data = _get(port, "/nonexistent")
     assert status == 404
     server.shutdown()
+
+
+def test_keep_alive_reuses_connection(tmp_path):
+    server, port = _start_server(tmp_path)
+    conn = HTTPConnection("127.0.0.1", port)
+    for _ in range(3):
+        conn.request("GET", "/status")
+        resp = conn.getresponse()
+        assert resp.status == 200
+        assert json.loads(resp.read())["status"] == "ok"
+    conn.close()
+    server.shutdown()
+
+
+def test_stalled_client_does_not_block_others(tmp_path):
+    import socket
+    server, port = _start_server(tmp_path)
+    stalled = socket.create_connection(("127.0.0.1", port))
+    stalled.sendall(b"GET /status HTTP/1.1\r\n")
+    conn = HTTPConnection("127.0.0.1", port, timeout=2)
+    conn.request("GET", "/status")
+    assert conn.getresponse().status == 200
+    stalled.close()
+    server.shutdown()
@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+
+from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+from michigram.core.primitives import now_iso
+from michigram.storage.filesystem import FilesystemBackend
+from michigram.storage.sqlite import SqliteBackend
+
+
+def _node(path: str, content: str, version: int = 1) -> ContextNode:
+    ts = now_iso()
+    return ContextNode(path=path, node_type=NodeType.FILE,
+                       metadata=NodeMetadata(created_at=ts, updated_at=ts, version=version),
+                       content=content)
+
+
+def _open(tmp_path, kind, content_addressed=True):
+    if kind == "filesystem":
+        return FilesystemBackend(tmp_path / "store", content_addressed=content_addressed)
+    return SqliteBackend(tmp_path / "store.db", content_addressed=content_addressed)
+
+
+def _blobs(tmp_path, kind) -> dict[str, int]:
+    if kind == "filesystem":
+        conn = sqlite3.connect(str(tmp_path / "store" / ".index.db"))
+        refs = dict(conn.execute("SELECT hash, refs FROM blob_refs").fetchall())
+        files = {p.name for p in (tmp_path / "store" / ".blobs").rglob("*") if p.is_file()}
+        assert files == set(refs)
+    else:
+        conn = sqlite3.connect(str(tmp_path / "store.db"))
+        refs = dict(conn.execute("SELECT hash, refs FROM blobs").fetchall())
+    conn.close()
+    return refs
+
+
+@pytest.fixture(params=["filesystem", "sqlite"])
+def kind(request):
+    return request.param
+
+
+def test_identical_content_stored_once(tmp_path, kind):
+    be = _open(tmp_path, kind)
+    be.write("a/fact", _node("a/fact", "uses postgres"))
+    be.write("b/fact", _node("b/fact", "uses postgres"))
+    assert list(_blobs(tmp_path, kind).values()) == [2]
+    assert be.read("b/fact").content == "uses postgres"
+    assert be.read_metadata("a/fact").load().content == "uses postgres"
+    assert [n.content for n in be.search("b")] == ["uses postgres"]
+    assert be.list("a") == ["fact"]
+
+
+def test_last_reference_deletes_blob(tmp_path, kind):
+    be = _open(tmp_path, kind)
+    be.write("a/fact", _node("a/fact", "uses postgres"))
+    be.write("b/fact", _node("b/fact", "uses postgres"))
+    be.delete("a/fact")
+    assert list(_blobs(tmp_path, kind).values()) == [1]
+    be.delete("b/fact")
+    assert _blobs(tmp_path, kind) == {}
+
+
+def test_versions_reference_blobs(tmp_path, kind):
+    be = _open(tmp_path, kind)
+    be.write("a/fact", _node("a/fact", "first", version=1))
+    be.write("a/fact", _node("a/fact", "second", version=2))
+    assert sorted(_blobs(tmp_path, kind).values()) == [1, 1]
+    assert be.read_version("a/fact", 1).content == "first"
+    be.delete("a/fact")
+    assert be.read_version("a/fact", 1).content == "first"
+    assert be.delete_version("a/fact", 1)
+    assert _blobs(tmp_path, kind) == {}
+
+
+def test_blobs_readable_with_dedup_off(tmp_path, kind):
+    be = _open(tmp_path, kind)
+    be.write("a/fact", _node("a/fact", "shared"))
+    be.close()
+    be = _open(tmp_path, kind, content_addressed=False)
+    assert be.read("a/fact").content == "shared"
+    be.write("a/fact", _node("a/fact", "inline", version=2))
+    assert be.read("a/fact").content == "inline"
+    assert be.read_version("a/fact", 1).content == "shared"
+    assert len(_blobs(tmp_path, kind)) <= 1
+
+
+def test_write_metadata_keeps_blob(tmp_path, kind):
+    be = _open(tmp_path, kind)
+    be.write("a/fact", _node("a/fact", "shared"))
+    node = be.read_metadata("a/fact")
+    node.metadata.tags = ["db"]
+    be.write_metadata("a/fact", node)
+    assert be.read("a/fact").content == "shared"
+
+
+def test_filesystem_rebuild_index_recounts_refs(tmp_path):
+    be = _open(tmp_path, "filesystem")
+    be.write("a/fact", _node("a/fact", "shared"))
+    be.write("b/fact", _node("b/fact", "shared"))
+    be.write("b/fact", _node("b/fact", "other", version=2))
+    before = _blobs(tmp_path, "filesystem")
+    conn = sqlite3.connect(str(tmp_path / "store" / ".index.db"))
+    conn.execute("UPDATE blob_refs SET refs = 99")
+    conn.commit()
+    conn.close()
+    be.rebuild_index()
+    assert _blobs(tmp_path, "filesystem") == before
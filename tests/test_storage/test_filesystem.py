@@ -109,3 +109,21 @@ def test_search_by_since(tmp_path):
     results = be.search("s", since="2026-01-01T00:00:00Z")
     assert len(results) == 1
     assert results[0].path == "s/new"
+
+
+def test_read_metadata_defers_content(tmp_path):
+    be = _backend(tmp_path)
+    ts = now_iso()
+    node = ContextNode(
+        path="lazy/item", node_type=NodeType.FILE,
+        metadata=NodeMetadata(created_at=ts, updated_at=ts, tags=["t"]),
+        content="body",
+    )
+    be.write("lazy/item", node)
+    meta_only = be.read_metadata("lazy/item")
+    assert meta_only.content is None
+    assert meta_only.metadata.tags == ["t"]
+    assert meta_only.load().content == "body"
+    results = be.search("lazy", include_content=False)
+    assert results[0].content is None
+    assert results[0].load().content == "body"
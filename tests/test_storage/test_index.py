@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from michigram.storage.filesystem import FilesystemBackend
+from michigram.storage.sqlite import SqliteBackend
+from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+from michigram.core.primitives import now_iso
+
+
+def _node(path: str, content: str = "x", **meta) -> ContextNode:
+    ts = now_iso()
+    meta.setdefault("created_at", ts)
+    meta.setdefault("updated_at", ts)
+    return ContextNode(path=path, node_type=NodeType.FILE,
+                       metadata=NodeMetadata(**meta), content=content)
+
+
+def _backend(tmp_path, kind):
+    if kind == "sqlite":
+        return SqliteBackend(tmp_path / "store.db")
+    return FilesystemBackend(tmp_path / "store")
+
+
+def test_search_uses_index_not_content(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    be.write("s/a", _node("s/a", tags=["error"]))
+    be.write("s/b", _node("s/b", tags=["info"]))
+    (tmp_path / "store" / "s" / "b.meta.json").unlink()
+    results = be.search("s", tags=["error"])
+    assert [n.path for n in results] == ["s/a"]
+
+
+def test_search_prefix_excludes_siblings(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    be.write("proj/a", _node("proj/a"))
+    be.write("proj-other/b", _node("proj-other/b"))
+    assert [n.path for n in be.search("proj")] == ["proj/a"]
+
+
+def test_search_multiple_tags_requires_all(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    be.write("s/a", _node("s/a", tags=["error", "python"]))
+    be.write("s/b", _node("s/b", tags=["error"]))
+    assert [n.path for n in be.search("s", tags=["error", "python"])] == ["s/a"]
+
+
+def test_delete_removes_from_index(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    be.write("s/a", _node("s/a", source="user"))
+    be.delete("s/a")
+    assert be.search("s", source="user") == []
+
+
+def test_search_ignores_versions(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    be.write("s/a", _node("s/a", content="v1"))
+    be.write("s/a", _node("s/a", content="v2", version=2))
+    results = be.search("")
+    assert [n.content for n in results] == ["v2"]
+    assert ".versions" not in be.list("")
+
+
+def test_existing_store_is_indexed_on_open(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    be.write("s/a", _node("s/a", tags=["t"]))
+    be.close()
+    (tmp_path / "store" / ".index.db").unlink()
+    be2 = FilesystemBackend(tmp_path / "store")
+    assert len(be2.search("s", tags=["t"])) == 1
+
+
+def test_check_and_rebuild_index(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    be.write("s/a", _node("s/a", tags=["t"]))
+    be.write("s/b", _node("s/b"))
+    assert be.check_index() == {"missing": [], "stale": [], "mismatched": []}
+
+    mp = tmp_path / "store" / "s" / "a.meta.json"
+    meta = json.loads(mp.read_text())
+    meta["tags"] = ["changed"]
+    mp.write_text(json.dumps(meta))
+    (tmp_path / "store" / "s" / "b.meta.json").unlink()
+    report = be.check_index()
+    assert report["mismatched"] == ["s/a"]
+    assert report["stale"] == ["s/b"]
+
+    assert be.rebuild_index() == 1
+    assert be.check_index() == {"missing": [], "stale": [], "mismatched": []}
+    assert len(be.search("s", tags=["changed"])) == 1
+
+
+def _ordered_store(be):
+    specs = [("p/a/x", "2026-01-03", 5), ("p/a/y", "2026-01-01", 9), ("p/b/z", "2026-01-02", 3),
+             ("p/top", "2026-01-02", 7), ("p-q/w", "2026-01-05", 1)]
+    for path, day, tokens in specs:
+        be.write(path, _node(path, updated_at=f"{day}T00:00:00+00:00", token_estimate=tokens))
+
+
+@pytest.mark.parametrize("kind", ["filesystem", "sqlite"])
+def test_iter_by_updated_merges_directories(tmp_path, kind):
+    be = _backend(tmp_path, kind)
+    _ordered_store(be)
+    assert [n.path for n in be.iter_by_updated("p")] == ["p/a/x", "p/top", "p/b/z", "p/a/y"]
+    assert [n.path for n in be.iter_by_updated("p", newest_first=False,
+                                               max_tokens=lambda: 6)] == ["p/b/z", "p/a/x"]
+    assert [n.path for n in be.iter_by_updated("p/a")] == ["p/a/x", "p/a/y"]
+    assert [n.path for n in be.iter_by_updated("")][0] == "p-q/w"
+    paged = be._index if kind == "filesystem" else be
+    assert [getattr(n, "path", n) for n in paged.iter_by_updated("p", page_size=1)] == [
+        "p/a/x", "p/top", "p/b/z", "p/a/y"]
+
+
+@pytest.mark.parametrize("kind", ["filesystem", "sqlite"])
+def test_token_stats_tracks_writes_and_deletes(tmp_path, kind):
+    be = _backend(tmp_path, kind)
+    _ordered_store(be)
+    assert be.token_stats("p") == (4, 3)
+    be.write("p/b/z", _node("p/b/z", token_estimate=8))
+    assert be.token_stats("p") == (4, 5)
+    be.delete("p/a/x")
+    assert be.token_stats("p") == (3, 7)
+    assert be.token_stats("p/a") == (1, 9)
+    assert be.token_stats("nothing") == (0, 0)
+
+
+def test_index_batch_does_not_defer_other_threads(tmp_path):
+    import sqlite3
+    import threading
+    from michigram.storage.index import MetadataIndex
+    index = MetadataIndex(tmp_path / "index.db")
+    with index.batch():
+        worker = threading.Thread(target=index.upsert, args=("p/b", _node("p/b")))
+        worker.start()
+        worker.join()
+        other = sqlite3.connect(str(tmp_path / "index.db"))
+        assert other.execute("SELECT path FROM entries").fetchall() == [("p/b",)]
+        other.close()
+    index.close()
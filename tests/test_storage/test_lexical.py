@@ -0,0 +1,91 @@
+import sqlite3
+
+import pytest
+
+from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+from michigram.core.primitives import now_iso
+from michigram.storage.filesystem import FilesystemBackend
+from michigram.storage.lexical import tokenize
+from michigram.storage.sqlite import SqliteBackend
+
+
+def _node(path: str, content: str) -> ContextNode:
+    ts = now_iso()
+    return ContextNode(path=path, node_type=NodeType.FILE,
+                       metadata=NodeMetadata(created_at=ts, updated_at=ts), content=content)
+
+
+@pytest.fixture(params=["filesystem", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "filesystem":
+        be = FilesystemBackend(tmp_path / "store")
+    else:
+        be = SqliteBackend(tmp_path / "store.db")
+    yield be
+    be.close()
+
+
+def _paths(hits):
+    return [path for path, _ in hits]
+
+
+def test_tokenize():
+    assert tokenize("The DB is PostgreSQL 16, a relational-db!") == [
+        "db", "postgresql", "16", "relational", "db"]
+
+
+def test_ranks_by_bm25(backend):
+    backend.write("p/a", _node("p/a", "postgres connection pool tuning for postgres"))
+    backend.write("p/b", _node("p/b", "postgres is the database"))
+    backend.write("p/c", _node("p/c", "redis cache eviction"))
+    hits = backend.search_text("p", "postgres pool")
+    assert _paths(hits) == ["p/a", "p/b"]
+    assert hits[0][1] > hits[1][1] > 0
+    assert _paths(backend.search_text("p", "postgres pool", limit=1)) == ["p/a"]
+    assert backend.search_text("p", "the of") == []
+
+
+def test_index_follows_writes_and_deletes(backend):
+    backend.write("p/a", _node("p/a", "uses postgres"))
+    backend.write("p/a", _node("p/a", "uses mysql"))
+    assert backend.search_text("p", "postgres") == []
+    assert _paths(backend.search_text("p", "mysql")) == ["p/a"]
+    node = backend.read_metadata("p/a")
+    node.metadata.tags = ["db"]
+    backend.write_metadata("p/a", node)
+    assert _paths(backend.search_text("p", "mysql")) == ["p/a"]
+    backend.delete("p/a")
+    assert backend.search_text("p", "mysql") == []
+
+
+def test_search_scoped_to_prefix(backend):
+    backend.write("p1/a", _node("p1/a", "kafka topic"))
+    backend.write("p2/a", _node("p2/a", "kafka consumer"))
+    backend.write("p10/a", _node("p10/a", "kafka broker"))
+    assert _paths(backend.search_text("p1", "kafka")) == ["p1/a"]
+    assert len(backend.search_text("", "kafka")) == 3
+    assert backend.search_text("p3", "kafka") == []
+
+
+def test_filesystem_index_built_for_existing_store(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    be.write("p/a", _node("p/a", "uses postgres"))
+    be.close()
+    conn = sqlite3.connect(str(tmp_path / "store" / ".index.db"))
+    conn.executescript("DROP TABLE text_docs; DROP TABLE text_postings; DROP TABLE text_prefixes;")
+    conn.close()
+    be = FilesystemBackend(tmp_path / "store")
+    assert _paths(be.search_text("p", "postgres")) == ["p/a"]
+
+
+def test_sqlite_migration_indexes_existing_content(tmp_path):
+    be = SqliteBackend(tmp_path / "store.db")
+    be.write("p/a", _node("p/a", "uses postgres"))
+    be.close()
+    conn = sqlite3.connect(str(tmp_path / "store.db"))
+    conn.executescript("DROP TABLE text_docs; DROP TABLE text_postings; DROP TABLE text_prefixes;"
+                       " PRAGMA user_version = 4;")
+    conn.close()
+    be = SqliteBackend(tmp_path / "store.db")
+    assert _paths(be.search_text("p", "postgres")) == ["p/a"]
+    be.close()
@@ -0,0 +1,82 @@
+from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+from michigram.core.config import Config
+from michigram.core.primitives import now_iso
+from michigram.storage.factory import create_backend
+from michigram.storage.filesystem import FilesystemBackend
+from michigram.storage.migrate import migrate_store
+from michigram.storage.sqlite import SqliteBackend
+
+
+def _node(path: str, content: str, version: int = 1) -> ContextNode:
+    ts = now_iso()
+    return ContextNode(
+        path=path, node_type=NodeType.FILE,
+        metadata=NodeMetadata(created_at=ts, updated_at=ts, tags=["t"], version=version),
+        content=content,
+    )
+
+
+def _populate(be):
+    be.write("memory/proj/facts/db", _node("/context/memory/proj/facts/db", "sqlite", 1))
+    be.write("memory/proj/facts/db", _node("/context/memory/proj/facts/db", "postgres", 2))
+    for i in range(5):
+        be.write(f"history/proj/s{i}", _node(f"/context/history/proj/s{i}", f"session {i}"))
+
+
+def test_migrate_filesystem_to_sqlite_and_back(tmp_path):
+    fs = FilesystemBackend(tmp_path / "store")
+    _populate(fs)
+    db = SqliteBackend(tmp_path / "store.db")
+    calls = []
+    copied = migrate_store(fs, db, batch_size=2, progress=calls.append)
+    assert copied == 6
+    assert calls == [2, 4, 6]
+
+    node = db.read("memory/proj/facts/db")
+    assert node.content == "postgres"
+    assert node.path == "/context/memory/proj/facts/db"
+    assert db.get_versions("memory/proj/facts/db") == [1]
+    assert db.read_version("memory/proj/facts/db", 1).content == "sqlite"
+    assert db.search("history/proj", tags=["t"])[0].path == "/context/history/proj/s0"
+
+    back = FilesystemBackend(tmp_path / "restored")
+    assert migrate_store(db, back) == 6
+    assert back.read("memory/proj/facts/db").content == "postgres"
+    assert back.read_version("memory/proj/facts/db", 1).content == "sqlite"
+    db.close()
+
+
+def test_migrate_is_incremental(tmp_path):
+    fs = FilesystemBackend(tmp_path / "store")
+    _populate(fs)
+    db = SqliteBackend(tmp_path / "store.db")
+    migrate_store(fs, db)
+    assert migrate_store(fs, db) == 0
+
+    fs.write("memory/proj/facts/db", _node("/context/memory/proj/facts/db", "mysql", 3))
+    assert migrate_store(fs, db) == 1
+    assert db.read("memory/proj/facts/db").content == "mysql"
+    assert db.get_versions("memory/proj/facts/db") == [1, 2]
+    db.close()
+
+
+def test_create_backend_from_config(tmp_path):
+    config = Config(base_dir=tmp_path, default_backend="sqlite")
+    be = create_backend(config)
+    assert isinstance(be, SqliteBackend)
+    assert (tmp_path / "store.db").exists()
+    be.close()
+    assert isinstance(create_backend(config, "filesystem"), FilesystemBackend)
+
+
+def test_build_namespace_mounts_cached_prefixes(tmp_path):
+    from michigram.afs.mount import CachedMount
+    from michigram.storage.factory import build_namespace
+    config = Config(base_dir=tmp_path, mount_cache={"/context/memory": {"max_size": 1024}})
+    ns = build_namespace(config)
+    assert isinstance(ns.mounts["/context/memory"], CachedMount)
+    ns.write("/context/memory/proj/facts/db", _node("/context/memory/proj/facts/db", "pg"))
+    assert ns.read("/context/memory/proj/facts/db").content == "pg"
+    assert ns.read("/context/memory/proj/facts/db").content == "pg"
+    assert ns.mounts["/context/memory"].stats()["hits"] == 1
+    assert (tmp_path / "store" / "memory" / "proj" / "facts" / "db").exists()
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+from michigram.storage.filesystem import FilesystemBackend
+from michigram.storage.retention import RetentionPolicy, compact
+from michigram.storage.sqlite import SqliteBackend
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _ts(days_ago: float) -> str:
+    return (NOW - timedelta(days=days_ago)).isoformat()
+
+
+def _node(content: str, version: int, days_ago: float = 0) -> ContextNode:
+    return ContextNode(
+        path="m/key",
+        node_type=NodeType.FILE,
+        metadata=NodeMetadata(created_at=_ts(days_ago), updated_at=_ts(days_ago), version=version),
+        content=content,
+    )
+
+
+def test_keep_last():
+    versions = [(v, _ts(0)) for v in range(1, 11)]
+    assert RetentionPolicy(keep_last=3).select_drops(versions, NOW) == list(range(1, 8))
+    assert RetentionPolicy(keep_last=0).select_drops(versions, NOW) == list(range(1, 11))
+
+
+def test_max_age_overrides_keep_last():
+    versions = [(1, _ts(100)), (2, _ts(50)), (3, _ts(1))]
+    assert RetentionPolicy(max_age_days=60).select_drops(versions, NOW) == [1]
+    assert RetentionPolicy(keep_last=3, max_age_days=30).select_drops(versions, NOW) == [1, 2]
+
+
+def test_exponential_keeps_one_per_bucket():
+    # one version per day for 40 days; buckets are <1, [1,2), [2,4), [4,8), ...
+    versions = [(v, _ts(40 - v)) for v in range(1, 41)]
+    drops = RetentionPolicy(exponential=True).select_drops(versions, NOW)
+    kept = sorted(set(range(1, 41)) - set(drops))
+    assert [40 - v for v in reversed(kept)] == [0, 1, 3, 7, 15, 31, 39]
+
+
+def test_exponential_kept_versions_are_stable_as_they_age():
+    policy = RetentionPolicy(exponential=True)
+    versions = [(v, _ts(40 - v)) for v in range(1, 41)]
+    kept = [(v, ts) for v, ts in versions if v not in policy.select_drops(versions, NOW)]
+    later = NOW + timedelta(days=1)
+    kept_later = [v for v, _ in kept if v not in policy.select_drops(kept, later)]
+    assert len(kept_later) >= len(kept) - 1
+
+
+def test_disabled_policy_keeps_everything():
+    policy = RetentionPolicy.from_dict({})
+    assert not policy.enabled
+    assert policy.select_drops([(1, _ts(1000))], NOW) == []
+
+
+def test_negative_keep_last_rejected():
+    with pytest.raises(ValueError):
+        RetentionPolicy(keep_last=-1)
+
+
+@pytest.mark.parametrize("kind", ["filesystem", "sqlite"])
+def test_retention_enforced_on_write(tmp_path, kind):
+    policy = RetentionPolicy(keep_last=2)
+    if kind == "filesystem":
+        be = FilesystemBackend(tmp_path / "store", retention=policy)
+    else:
+        be = SqliteBackend(tmp_path / "store.db", retention=policy)
+    for v in range(1, 7):
+        be.write("m/key", _node(f"content {v}", v))
+    assert be.get_versions("m/key") == [4, 5]
+    assert be.read_version("m/key", 5).content == "content 5"
+    assert be.read("m/key").content == "content 6"
+
+
+def test_compact_filesystem(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    for v in range(1, 6):
+        be.write("m/key", _node(f"content {v}", v, days_ago=10 - v))
+    be.write("m/other", _node("only", 1))
+    nodes, dropped = compact(be, RetentionPolicy(max_age_days=7), now=NOW)
+    assert (nodes, dropped) == (2, 2)
+    assert be.get_versions("m/key") == [3, 4]
+    assert be.read_version_metadata("m/key", 3).load().content == "content 3"
+
+
+def test_compact_removes_empty_version_dir(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    be.write("m/key", _node("a", 1))
+    be.write("m/key", _node("b", 2))
+    compact(be, RetentionPolicy(keep_last=0))
+    assert be.get_versions("m/key") == []
+    assert not (tmp_path / "store" / ".versions" / "m" / "key").exists()
+    assert be.read("m/key").content == "b"
+
+
+@pytest.mark.parametrize("policy", [RetentionPolicy(exponential=True),
+                                    RetentionPolicy(keep_last=0, exponential=True)])
+def test_exponential_retention_on_write_keeps_delta_chain(tmp_path, policy):
+    # Write-time pruning ages versions against the real clock.
+    now = datetime.now(timezone.utc)
+    be = FilesystemBackend(tmp_path / "store", retention=policy)
+    for v, days_ago in [(1, 3), (2, 0.5), (3, 0.2), (4, 0)]:
+        node = _node("shared line\n" * 50 + f"tail {v}\n", v)
+        node.metadata.updated_at = (now - timedelta(days=days_ago)).isoformat()
+        be.write("m/key", node)
+    versions = be.get_versions("m/key")
+    assert 2 in versions
+    assert be._read_delta("m/key", 2) is not None
+    for v in versions:
+        assert be.read_version("m/key", v).content.endswith(f"tail {v}\n")
+    assert be.read("m/key").content.endswith("tail 4\n")
@@ -1,4 +1,4 @@
-from michigram.storage.sqlite import SqliteBackend
+from michigram.storage.sqlite import SCHEMA_VERSION, SqliteBackend
 from michigram.afs.node import ContextNode, NodeType, NodeMetadata
 from michigram.core.primitives import now_iso
 
@@ -84,3 +84,218 @@ def test_search_by_source(tmp_path):
     assert len(be.search("s", source="user")) == 1
     assert len(be.search("s", source="system")) == 0
     be.close()
+
+
+def test_read_metadata_defers_content(tmp_path):
+    be = _backend(tmp_path)
+    ts = now_iso()
+    node = ContextNode(
+        path="lazy/item", node_type=NodeType.FILE,
+        metadata=NodeMetadata(created_at=ts, updated_at=ts, tags=["t"]),
+        content="body",
+    )
+    be.write("lazy/item", node)
+    meta_only = be.read_metadata("lazy/item")
+    assert meta_only.content is None
+    assert meta_only.load().content == "body"
+    results = be.search("lazy", include_content=False)
+    assert results[0].content is None
+    assert results[0].load().content == "body"
+    be.close()
+
+
+def test_search_by_since(tmp_path):
+    be = _backend(tmp_path)
+    for name, ts in [("old", "2025-01-01T00:00:00Z"), ("new", "2026-02-01T00:00:00Z")]:
+        be.write(f"s/{name}", ContextNode(
+            path=f"s/{name}", node_type=NodeType.FILE,
+            metadata=NodeMetadata(created_at=ts, updated_at=ts), content=name,
+        ))
+    results = be.search("s", since="2026-01-01T00:00:00Z")
+    assert [n.path for n in results] == ["s/new"]
+    be.close()
+
+
+def test_search_combined_filters_and_prefix(tmp_path):
+    be = _backend(tmp_path)
+    ts = now_iso()
+    specs = [("p/a", ["x", "y"], "user"), ("p/b", ["x"], "user"),
+             ("p/c", ["x", "y"], "evaluator"), ("p_q/d", ["x", "y"], "user")]
+    for path, tags, source in specs:
+        be.write(path, ContextNode(
+            path=path, node_type=NodeType.FILE,
+            metadata=NodeMetadata(created_at=ts, updated_at=ts, tags=tags, source=source),
+            content=path,
+        ))
+    results = be.search("p", tags=["x", "y"], source="user")
+    assert [n.path for n in results] == ["p/a"]
+    be.write("p/a", ContextNode(
+        path="p/a", node_type=NodeType.FILE,
+        metadata=NodeMetadata(created_at=ts, updated_at=ts, tags=["z"], source="user"),
+        content="retagged",
+    ))
+    assert be.search("p", tags=["y"], source="user") == []
+    assert be.list("p") == ["a", "b", "c"]
+    be.close()
+
+
+def test_migrates_legacy_schema(tmp_path):
+    import json
+    import sqlite3
+    db = tmp_path / "legacy.db"
+    conn = sqlite3.connect(str(db))
+    conn.execute("CREATE TABLE nodes (path TEXT PRIMARY KEY, node_type TEXT NOT NULL,"
+                 " content TEXT, metadata TEXT NOT NULL)")
+    meta = {"created_at": "2026-01-01T00:00:00Z", "updated_at": "2026-01-02T00:00:00Z",
+            "source": "user", "token_estimate": 3, "tags": ["infra"], "version": 2}
+    conn.execute("INSERT INTO nodes VALUES (?, ?, ?, ?)",
+                 ("m/db", "file", "PostgreSQL", json.dumps(meta)))
+    conn.commit()
+    conn.close()
+
+    be = SqliteBackend(db)
+    assert be.schema_version == SCHEMA_VERSION
+    results = be.search("m", tags=["infra"], source="user", since="2026-01-02T00:00:00Z")
+    assert len(results) == 1
+    assert results[0].content == "PostgreSQL"
+    assert results[0].metadata.version == 2
+    be.close()
+
+
+def _simple(path: str, content: str) -> ContextNode:
+    ts = now_iso()
+    return ContextNode(path=path, node_type=NodeType.FILE,
+                       metadata=NodeMetadata(created_at=ts, updated_at=ts), content=content)
+
+
+def test_batch_defers_commit(tmp_path):
+    import sqlite3
+    be = _backend(tmp_path)
+    other = sqlite3.connect(str(tmp_path / "test.db"))
+    with be.batch():
+        be.write("b/one", _simple("b/one", "1"))
+        with be.batch():
+            be.write("b/two", _simple("b/two", "2"))
+        assert other.execute("SELECT COUNT(*) FROM nodes").fetchone()[0] == 0
+    assert other.execute("SELECT COUNT(*) FROM nodes").fetchone()[0] == 2
+    other.close()
+    be.close()
+
+
+def test_batch_rolls_back_on_error(tmp_path):
+    be = _backend(tmp_path)
+    try:
+        with be.batch():
+            be.write("b/one", _simple("b/one", "1"))
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert be.read("b/one") is None
+    be.close()
+
+
+def test_write_many(tmp_path):
+    be = _backend(tmp_path)
+    count = be.write_many((f"w/{i}", _simple(f"w/{i}", str(i))) for i in range(5))
+    assert count == 5
+    assert be.list("w") == ["0", "1", "2", "3", "4"]
+    be.close()
+
+
+def test_walk_pages_through_paths(tmp_path):
+    be = _backend(tmp_path)
+    paths = [f"w/{i}" for i in range(5)] + ["w-x/0", "z"]
+    be.write_many((p, _simple(p, p)) for p in paths)
+    assert list(be.walk(page_size=2)) == sorted(paths)
+    assert list(be.walk("w", page_size=2)) == [f"w/{i}" for i in range(5)]
+    be.close()
+
+
+def test_rejects_unknown_pragmas(tmp_path):
+    import pytest
+    with pytest.raises(ValueError):
+        SqliteBackend(tmp_path / "x.db", journal_mode="bogus")
+    with pytest.raises(ValueError):
+        SqliteBackend(tmp_path / "y.db", synchronous="sometimes")
+
+
+def test_concurrent_reads_during_write_batch(tmp_path):
+    import threading
+    be = _backend(tmp_path)
+    be.write("c/base", _simple("c/base", "committed"))
+    seen = []
+
+    def reader():
+        node = be.read("c/base")
+        seen.append((node.content, be.read("c/pending")))
+
+    with be.batch():
+        be.write("c/pending", _simple("c/pending", "uncommitted"))
+        assert be.read("c/pending").content == "uncommitted"
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+    assert seen == [("committed", None)] * 4
+    assert be.read("c/pending").content == "uncommitted"
+    be.close()
+
+
+def test_concurrent_writers_are_serialized(tmp_path):
+    import threading
+    be = _backend(tmp_path)
+
+    def writer(n):
+        for i in range(10):
+            be.write(f"w/{n}-{i}", _simple(f"w/{n}-{i}", "x"))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=10)
+    assert len(be.list("w")) == 40
+    be.close()
+
+
+def test_write_metadata_keeps_content_without_version(tmp_path):
+    import pytest
+    db = SqliteBackend(tmp_path / "meta.db")
+    node = ContextNode(path="/context/a", node_type=NodeType.FILE,
+                       metadata=NodeMetadata(created_at="t0", updated_at="t0", tags=["x"]),
+                       content="body")
+    db.write("a", node)
+    meta = db.read_metadata("a")
+    meta.metadata.tags = ["y"]
+    meta.metadata.extra = {"seen_count": 2}
+    db.write_metadata("a", meta)
+    got = db.read("a")
+    assert got.content == "body"
+    assert got.metadata.extra == {"seen_count": 2}
+    assert [n.path for n in db.search("", tags=["y"])] == ["/context/a"]
+    assert db.get_versions("a") == []
+    with pytest.raises(KeyError):
+        db.write_metadata("missing", meta)
+    db.close()
+
+
+def test_migrates_v5_to_directory_index(tmp_path):
+    import sqlite3
+    be = _backend(tmp_path)
+    for i, path in enumerate(["p/a/x", "p/a/y", "p/b"]):
+        node = _simple(path, path)
+        node.metadata.updated_at = f"2026-01-0{i + 1}T00:00:00+00:00"
+        node.metadata.token_estimate = 10 - i
+        be.write(path, node)
+    be.close()
+    conn = sqlite3.connect(str(tmp_path / "test.db"))
+    conn.executescript("DROP INDEX idx_nodes_parent_updated; DROP INDEX idx_nodes_parent_tokens;"
+                       " ALTER TABLE nodes DROP COLUMN parent; DROP TABLE dir_counts;"
+                       " PRAGMA user_version = 5;")
+    conn.close()
+    be = _backend(tmp_path)
+    assert be.schema_version == SCHEMA_VERSION
+    assert [n.path for n in be.iter_by_updated("p")] == ["p/b", "p/a/y", "p/a/x"]
+    assert be.token_stats("p") == (3, 8)
+    be.close()
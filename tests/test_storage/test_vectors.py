@@ -0,0 +1,146 @@
+import pytest
+
+from michigram.afs.node import ContextNode, NodeType, NodeMetadata
+from michigram.core.primitives import now_iso
+from michigram.storage import vectors
+from michigram.storage.filesystem import FilesystemBackend
+from michigram.storage.sqlite import SqliteBackend
+from michigram.storage.vectors import Embedder, HashingEmbedder, get_embedder, register_embedder
+
+
+def _node(path: str, content: str) -> ContextNode:
+    ts = now_iso()
+    return ContextNode(path=path, node_type=NodeType.FILE,
+                       metadata=NodeMetadata(created_at=ts, updated_at=ts), content=content)
+
+
+def _open(tmp_path, kind, embedder=None):
+    embedder = embedder or HashingEmbedder(64)
+    if kind == "filesystem":
+        return FilesystemBackend(tmp_path / "store", embedder=embedder)
+    return SqliteBackend(tmp_path / "store.db", embedder=embedder)
+
+
+@pytest.fixture(params=["filesystem", "sqlite"])
+def kind(request):
+    return request.param
+
+
+@pytest.fixture(params=["numpy", "pure-python"])
+def scoring(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(vectors, "np", None)
+    return request.param
+
+
+def _paths(hits):
+    return [path for path, _ in hits]
+
+
+def test_hashing_embedder_is_deterministic():
+    emb = HashingEmbedder(32)
+    assert emb.embed("postgres connection pool") == emb.embed("Postgres, connection pool!")
+    assert len(emb.embed("x")) == 32
+    assert emb.signature == "HashingEmbedder:32"
+
+
+def test_embedder_registry():
+    assert isinstance(get_embedder("hashing", 16), HashingEmbedder)
+    with pytest.raises(KeyError):
+        get_embedder("missing", 16)
+
+
+def test_ranks_by_similarity(tmp_path, kind, scoring):
+    be = _open(tmp_path, kind)
+    be.write("memory/p/a", _node("memory/p/a", "postgres connection pool settings"))
+    be.write("memory/p/b", _node("memory/p/b", "redis cache eviction policy"))
+    be.write("memory/q/a", _node("memory/q/a", "postgres connection pool settings"))
+    hits = list(be.search_vectors("memory/p", "postgres connection pool settings"))
+    assert _paths(hits) == ["memory/p/a", "memory/p/b"]
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+    assert _paths(be.search_vectors("memory/p", "postgres pool", limit=1)) == ["memory/p/a"]
+    assert sorted(_paths(be.search_vectors("memory", "postgres pool", limit=2))) == [
+        "memory/p/a", "memory/q/a"]
+    assert list(be.search_vectors("memory/p", "the")) == []
+    be.close()
+
+
+def test_vectors_follow_writes_and_deletes(tmp_path, kind, scoring):
+    be = _open(tmp_path, kind)
+    be.write("memory/p/a", _node("memory/p/a", "postgres connection pool"))
+    be.write("memory/p/b", _node("memory/p/b", "redis cache"))
+    be.write("memory/p/a", _node("memory/p/a", "kafka consumer group"))
+    assert _paths(be.search_vectors("memory/p", "kafka consumer", limit=1)) == ["memory/p/a"]
+    be.delete("memory/p/a")
+    assert _paths(be.search_vectors("memory/p", "kafka consumer")) == ["memory/p/b"]
+    be.write("memory/p/c", _node("memory/p/c", "kafka consumer group"))  # reuses the freed row
+    assert _paths(be.search_vectors("memory/p", "kafka consumer", limit=1)) == ["memory/p/c"]
+    be.close()
+
+
+def test_rebuilt_when_embedder_changes(tmp_path, kind):
+    be = _open(tmp_path, kind)
+    be.write("memory/p/a", _node("memory/p/a", "postgres connection pool"))
+    be.close()
+    be = _open(tmp_path, kind, HashingEmbedder(128))
+    assert _paths(be.search_vectors("memory/p", "postgres")) == ["memory/p/a"]
+    be.close()
+
+
+def test_custom_embedder(tmp_path, kind):
+    class Vowels(Embedder):
+        def __init__(self, dim):
+            self.dim = dim
+
+        def embed(self, text):
+            return [float(text.count(v)) for v in "aeiou"[:self.dim]]
+
+    register_embedder("vowels", f"{__name__}:Vowels")
+    be = _open(tmp_path, kind, Vowels(5))
+    be.write("memory/p/a", _node("memory/p/a", "aaaa"))
+    be.write("memory/p/u", _node("memory/p/u", "uuuu"))
+    assert _paths(be.search_vectors("memory/p", "a", limit=1)) == ["memory/p/a"]
+    be.close()
+
+
+def test_search_without_embedder_raises(tmp_path):
+    be = FilesystemBackend(tmp_path / "store")
+    with pytest.raises(NotImplementedError):
+        list(be.search_vectors("memory/p", "postgres"))
+
+
+def test_order_past_partial_sort(tmp_path, kind, monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(vectors, "RANK_HEAD", 2)
+    be = _open(tmp_path, kind)
+    for i, text in enumerate(["alpha beta gamma delta", "alpha beta gamma", "alpha beta",
+                              "alpha", "omega"]):
+        be.write(f"memory/p/n{i}", _node(f"memory/p/n{i}", text))
+    hits = list(be.search_vectors("memory/p", "alpha beta gamma delta"))
+    assert _paths(hits)[:4] == ["memory/p/n0", "memory/p/n1", "memory/p/n2", "memory/p/n3"]
+    assert [s for _, s in hits] == sorted((s for _, s in hits), reverse=True)
+    be.close()
+
+
+def test_sqlite_batch_rollback_keeps_vectors(tmp_path, scoring):
+    be = SqliteBackend(tmp_path / "store.db", embedder=HashingEmbedder(64))
+    be.write("memory/p/a", _node("memory/p/a", "postgres connection pool"))
+    be.write("memory/p/b", _node("memory/p/b", "redis cache eviction"))
+    be.delete("memory/p/b")  # leaves a free row for the rewrite below to take
+    with pytest.raises(RuntimeError):
+        with be.batch():
+            be.write("memory/p/a", _node("memory/p/a", "kafka consumer lag"))
+            be.write("memory/p/c", _node("memory/p/c", "kafka consumer lag"))
+            raise RuntimeError("rollback")
+    with pytest.raises(RuntimeError):
+        with be.batch():
+            be.delete("memory/p/a")
+            raise RuntimeError("rollback")
+    assert be.read("memory/p/a").content == "postgres connection pool"
+    assert _paths(be.search_vectors("memory/p", "postgres connection pool")) == ["memory/p/a"]
+    assert list(be.search_vectors("memory/p", "kafka consumer lag"))[0][1] < 0.5
+    be.write("memory/p/d", _node("memory/p/d", "kafka consumer lag"))
+    assert _paths(be.search_vectors("memory/p", "kafka consumer lag", limit=1)) == ["memory/p/d"]
+    be.close()
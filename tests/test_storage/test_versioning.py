@@ -54,3 +54,90 @@ def test_no_version_on_first_write(tmp_path):
 def test_read_version_missing(tmp_path):
     be = _backend(tmp_path)
     assert be.read_version("test/file1", 99) is None
+
+
+def test_sqlite_keeps_versions(tmp_path):
+    from michigram.storage.sqlite import SqliteBackend
+    be = SqliteBackend(tmp_path / "test.db")
+    be.write("test/file1", _node("original", version=1))
+    be.write("test/file1", _node("updated", version=2))
+    assert be.get_versions("test/file1") == [1]
+    assert be.read_version("test/file1", 1).content == "original"
+    assert be.read_version("test/file1", 2) is None
+    be.close()
+
+
+def _history(n: int) -> str:
+    return "".join(f"line {i}: some session text that repeats\n" for i in range(n))
+
+
+def _write_growing(be, count: int) -> None:
+    for v in range(1, count + 1):
+        be.write("test/file1", _node(_history(v * 10), version=v))
+
+
+def test_versions_stored_as_reverse_deltas(tmp_path):
+    be = _backend(tmp_path)
+    _write_growing(be, 20)
+    vdir = tmp_path / "store" / ".versions" / "test" / "file1"
+    assert (vdir / "v3.delta").exists() and not (vdir / "v3").exists()
+    assert (vdir / "v16").exists() and not (vdir / "v16.delta").exists()
+    for v in range(1, 20):
+        assert be.read_version("test/file1", v).content == _history(v * 10)
+    assert be.read_version_metadata("test/file1", 5).load().content == _history(50)
+
+
+def test_delta_skipped_when_version_does_not_advance(tmp_path):
+    be = _backend(tmp_path)
+    be.write("test/file1", _node(_history(10), version=1))
+    be.write("test/file1", _node(_history(11), version=1))
+    vdir = tmp_path / "store" / ".versions" / "test" / "file1"
+    assert (vdir / "v1").read_text() == _history(10)
+
+
+def test_deleting_a_middle_version_keeps_the_chain(tmp_path):
+    be = _backend(tmp_path)
+    _write_growing(be, 8)
+    for v in (6, 3, 4):
+        assert be.delete_version("test/file1", v)
+    assert be.get_versions("test/file1") == [1, 2, 5, 7]
+    for v in (1, 2, 5, 7):
+        assert be.read_version("test/file1", v).content == _history(v * 10)
+
+
+def test_versions_survive_deleting_the_live_node(tmp_path):
+    be = _backend(tmp_path)
+    _write_growing(be, 4)
+    be.delete("test/file1")
+    for v in (1, 2, 3):
+        assert be.read_version("test/file1", v).content == _history(v * 10)
+
+
+def test_concurrent_writers_keep_every_version_readable(tmp_path, monkeypatch):
+    import itertools
+    import threading
+    import time
+    from michigram.storage import filesystem
+    real_delta = filesystem.make_delta
+
+    def make_delta(*args):
+        time.sleep(0.001)  # widen the window between reading the live node and replacing it
+        return real_delta(*args)
+
+    monkeypatch.setattr(filesystem, "make_delta", make_delta)
+    be = FilesystemBackend(tmp_path / "store", content_addressed=True)
+    versions = itertools.count(1)
+
+    def writer():
+        for _ in range(20):
+            v = next(versions)
+            be.write("test/file1", _node(_history(v * 10), version=v))
+
+    threads = [threading.Thread(target=writer) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for v in be.get_versions("test/file1"):
+        assert be.read_version("test/file1", v).content == _history(v * 10)
+    be.close()